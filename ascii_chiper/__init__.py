@@ -1,10 +1,17 @@
 from .chiper import Chiper
-from .key_generator import KeyGenerator
+from .core import encrypt, decrypt, compile_model, clear_caches
+from .pipeline import CompiledPipeline, KeyRelative
+from .parallel import ParallelChiper
+from .async_chiper import AsyncChiper
+from .key_generator import KeyGenerator, KeyCache
+from .key_schedule import KeySchedule
+from .codec import CODECS, JsonCodec, TaggedCodec, BinaryCodec
 from .models import DecryptionModel, EncryptionModel
+from .steps import STEPS, StepDefinition, register_step, unregister_step
 from .utils import OPPOSITE_ENCRYPTION_FUNCTIONS, swap_back, swap, xor_unshift, xor_shift, \
     deinterleave, interleave, unrotate, rotate, unxor_base, xor_base, xor_unadd, xor_add, \
         deinterleave_key, interleave_key, string_to_ascii, ascii_to_string, ascii_to_base64, \
             base64_to_ascii, clean_input, revert_clean_input, reverse
 from .exceptions import InvalidModelException, InvalidSeedInputException, InvalidKeyException, InvalidModeException, \
     InvalidStartIndexException, InvalidEndIndexException, InvalidBaseException, InvalidKeyInputException, \
-        EncryptionException, DecryptionException
\ No newline at end of file
+        EncryptionException, DecryptionException, InvalidBackendException, InvalidCodecException
\ No newline at end of file
@@ -0,0 +1,149 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from pickle import dumps
+from weakref import WeakKeyDictionary
+from typing import Any, Iterable, List, Union
+
+from .exceptions import AsciiChiperException, InvalidModelException
+from .models import DecryptionModel, EncryptionModel
+from .pipeline import CompiledPipeline
+
+# The pipelines compiled by a process of a `ProcessPoolExecutor`, by (seed, model, backend)
+_process_pipelines = {}
+
+def _run_in_process(seed: int, model: Union[EncryptionModel, DecryptionModel], backend: str, method: str, argument: Any) -> Any:
+    cache_key = (seed, model, backend)
+    pipeline = _process_pipelines.get(cache_key)
+    if pipeline is None:
+        pipeline = _process_pipelines[cache_key] = CompiledPipeline.from_model(seed, model, backend)
+    return getattr(pipeline, method)(argument)
+
+class AsyncChiper:
+    """Encrypts and decrypts messages with a single model from asyncio code, without blocking the event loop."""
+
+    def __init__(
+        self,
+        seed: int,
+        model: Union[EncryptionModel, DecryptionModel],
+        backend: str="python",
+        executor: Executor=None,
+        inline_threshold: int=16384,
+        max_concurrency: int=8,
+    ):
+        """
+        Args:
+            seed: The seed to use for key generation.
+            model: The model to use. It is compiled once (see `Chiper.compile`).
+            backend: The backend running the steps, one of `BACKENDS`. Default is "python".
+            executor: The executor running the large messages. With a `ProcessPoolExecutor`, the model is
+                sent to the processes, so lambdas can't be used in its steps (see `KeyRelative`).
+                Default is None, the event loop's default thread pool.
+            inline_threshold: The length up to which a string message is processed directly in the
+                event loop. Other messages (dictionaries, lists) are always sent to the executor. Default is 16384.
+            max_concurrency: The number of messages processed at once by the executor. Calls past this
+                limit wait for a slot. Default is 8.
+
+        Raises:
+            InvalidModelException: If the model can't be sent to the executor's processes.
+            InvalidKeyInputException: If the key can't be generated or the model is invalid.
+            InvalidModeException: If one of the steps is invalid.
+        """
+        if isinstance(executor, ProcessPoolExecutor):
+            try: dumps((seed, model))
+            except Exception as e:
+                raise InvalidModelException(f"Invalid model: it can't be sent to the executor processes ({e}). Use KeyRelative instead of lambdas.")
+        self.pipeline = CompiledPipeline.from_model(seed, model, backend)
+        self.seed, self.model, self.backend, self.executor = seed, model, backend, executor
+        self.inline_threshold, self.max_concurrency = inline_threshold, max_concurrency
+        # A semaphore only works in the event loop it was first used in: one per loop
+        self._semaphores = WeakKeyDictionary()
+
+    def _is_small(self, message: Any) -> bool:
+        if isinstance(message, str):
+            return len(message) <= self.inline_threshold
+        return isinstance(message, (int, float))
+
+    async def _offload(self, method: str, argument: Any) -> Any:
+        """Runs a method of the pipeline in the executor, once a slot is free."""
+        # In a coroutine, this is the running loop (`get_running_loop` needs Python 3.7)
+        loop = asyncio.get_event_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            # The semaphores keep their loop alive: drop the ones of the closed loops
+            for closed in [other for other in list(self._semaphores.keys()) if other.is_closed()]:
+                self._semaphores.pop(closed, None)
+            semaphore = self._semaphores.setdefault(loop, asyncio.Semaphore(self.max_concurrency))
+        async with semaphore:
+            if isinstance(self.executor, ProcessPoolExecutor):
+                function = partial(_run_in_process, self.seed, self.model, self.backend, method, argument)
+            else:
+                function = partial(getattr(self.pipeline, method), argument)
+            return await loop.run_in_executor(self.executor, function)
+
+    async def encrypt(self, message: Union[str, dict, int]) -> str:
+        """
+        ### Encrypts a message.
+
+        Args:
+            `message` (Union[str, dict, int]): The message to encrypt.
+
+        Returns:
+            str: The encrypted message.
+
+        Raises:
+            InvalidKeyInputException: If the message type is not supported.
+            EncryptionException: If the encryption fails.
+
+        Examples:
+            >>> from ascii_chiper import AsyncChiper, Chiper, EncryptionModel
+            >>> chiper = AsyncChiper(123, EncryptionModel(113, 40, Chiper.BASIC_SWAP_INTERLEAVE))
+            >>> await chiper.encrypt("Hello World!")
+            'xSJJSHNlQWyubF1vDyClV7RvfnKobCZkzyGUIg=='
+        """
+        if self._is_small(message):
+            return self.pipeline.encrypt(message)
+        return await self._offload("encrypt", message)
+
+    async def decrypt(self, message: str) -> Union[str, dict, int]:
+        """
+        ### Decrypts a message.
+
+        Args:
+            `message` (str): The message to decrypt.
+
+        Returns:
+            The decrypted message.
+
+        Raises:
+            DecryptionException: If the decryption fails.
+        """
+        if self._is_small(message):
+            return self.pipeline.decrypt(message)
+        return await self._offload("decrypt", message)
+
+    async def encrypt_many(self, messages: Iterable[Union[str, dict, int]]) -> List[Union[str, AsciiChiperException]]:
+        """
+        ### Encrypts many messages in the executor (see `CompiledPipeline.encrypt_many`).
+
+        Args:
+            `messages` (Iterable[Union[str, dict, int]]): The messages to encrypt.
+
+        Returns:
+            List[Union[str, AsciiChiperException]]: The encrypted messages, in order, with the
+                exception raised for each message that couldn't be encrypted.
+        """
+        return await self._offload("encrypt_many", list(messages))
+
+    async def decrypt_many(self, messages: Iterable[str]) -> List[Union[str, dict, int, AsciiChiperException]]:
+        """
+        ### Decrypts many messages in the executor (see `CompiledPipeline.decrypt_many`).
+
+        Args:
+            `messages` (Iterable[str]): The messages to decrypt.
+
+        Returns:
+            List[Union[str, dict, int, AsciiChiperException]]: The decrypted messages, in order, with the
+                `DecryptionException` raised for each message that couldn't be decrypted.
+        """
+        return await self._offload("decrypt_many", list(messages))
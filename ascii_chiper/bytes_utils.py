@@ -0,0 +1,524 @@
+from base64 import b64encode, b64decode
+from collections import OrderedDict
+from itertools import accumulate, chain
+from operator import xor
+from threading import local
+from typing import Any, List, Union
+
+# Versions of the steps in `utils.py` working on `bytearray`s instead of lists of ints, with the standard
+# library only. A bytearray takes one byte per value instead of a pointer to an int per value.
+# Every function takes ownership of the buffer it's given: the steps that can run in place modify it and
+# return it, the others write their output to a buffer of `scratch_pool` and give the input back to it.
+# Every function produces the same bytes as its `utils.py` counterpart; key values and bases mixed into the
+# output (`interleave`, `interleave_key`, `xor_base`) must be bytes, as the ones created by `KeyGenerator` are.
+# The position-wise XORs and additions run on the whole buffer at once as big integers.
+
+class ScratchPool:
+    """
+    Bytearrays recycled by the steps that can't run in place, by length, so that a pipeline running on
+    messages of the same lengths stops allocating new buffers. Every thread has its own buffers.
+    """
+
+    def __init__(self, max_bytes: int=1 << 24):
+        """
+        Args:
+            max_bytes: The total size of the buffers kept per thread. The lengths used least recently
+                are dropped first. Default is 16 MiB.
+        """
+        self.max_bytes = max_bytes
+        self._local = local()
+
+    def _free(self) -> "OrderedDict[int, List[bytearray]]":
+        free = getattr(self._local, "free", None)
+        if free is None:
+            free = self._local.free = OrderedDict()
+            self._local.size = 0
+        return free
+
+    def take(self, length: int) -> bytearray:
+        """Returns a bytearray of `length` bytes, whose content is undefined."""
+        free = self._free()
+        buffers = free.get(length)
+        if not buffers:
+            return bytearray(length)
+        self._local.size -= length
+        if len(buffers) == 1:
+            del free[length]
+        return buffers.pop()
+
+    def give(self, buffer: bytearray) -> None:
+        """Recycles a bytearray nothing uses anymore."""
+        if type(buffer) is not bytearray or not buffer or len(buffer) > self.max_bytes:
+            return
+        free = self._free()
+        free.setdefault(len(buffer), []).append(buffer)
+        free.move_to_end(len(buffer))
+        self._local.size += len(buffer)
+        while self._local.size > self.max_bytes:
+            length, buffers = next(iter(free.items()))
+            buffers.pop(0)
+            if not buffers:
+                del free[length]
+            self._local.size -= length
+
+    def clear(self) -> None:
+        """Drops the buffers of the current thread."""
+        self._free().clear()
+        self._local.size = 0
+
+scratch_pool = ScratchPool()
+
+# The byte maps of `rotate`/`xor_shift` and `unrotate`/`xor_unshift`, by shift
+_ROTATE_LEFT = [bytes((b << shift | b >> 8 - shift) & 255 for b in range(256)) for shift in range(8)]
+_ROTATE_RIGHT = [bytes((b >> shift | b << 8 - shift) & 255 for b in range(256)) for shift in range(8)]
+
+def _key_cycle(key: List[int], start_idx: int, end_idx: int, length: int, schedule: Any=None) -> Union[bytes, memoryview]:
+    """Returns `length` byte values of the key slice repeated cyclically, from the schedule if there is one."""
+    if schedule is not None:
+        return schedule.cycle_bytes(length)
+    key_slice = bytes(key[start_idx:end_idx])
+    return (key_slice * (length // len(key_slice) + 1))[:length] if length else b""
+
+def _key_masked(key: List[int], start_idx: int, end_idx: int, length: int, schedule: Any=None) -> Union[bytes, memoryview]:
+    """Returns `length` values of the key slice repeated cyclically and ANDed with 127, from the schedule if there is one."""
+    if schedule is not None:
+        return schedule.masked_bytes(length)
+    key_slice = bytes(k & 127 for k in key[start_idx:end_idx])
+    return (key_slice * (length // len(key_slice) + 1))[:length] if length else b""
+
+def _base_byte(base: int) -> int:
+    """Checks the base of `xor_base`/`unxor_base` is a byte."""
+    if not 0 <= base <= 255:
+        raise ValueError("Base must be in the range 0-255")
+    return base
+
+def _high_bits(length: int) -> int:
+    """Returns the big integer of `length` bytes 0x80."""
+    return int.from_bytes(b"\x01" * length, "big") << 7
+
+def string_to_ascii(string: str, static_num: int = 0) -> bytearray:
+    """
+    Convert a string to a bytearray of ASCII values using a static number.
+
+    Args:
+        string: The string to convert to ASCII values. Every character must be in the range 0-255.
+        static_num: A static number to XOR each ASCII value with. Default is 0.
+
+    Returns:
+        A bytearray of ASCII values.
+    """
+    buffer = bytearray(string.encode("latin-1"))
+    if static_num:
+        buffer[:] = buffer.translate(bytes(b ^ static_num for b in range(256)))
+    return buffer
+
+def ascii_to_string(buffer: bytearray, static_num: int = 0) -> str:
+    """
+    Convert a bytearray of ASCII values to a string using a static number.
+
+    Args:
+        buffer: The bytearray of ASCII values to convert to a string.
+        static_num: A static number to XOR each ASCII value with. Default is 0.
+
+    Returns:
+        The resulting string.
+    """
+    data = buffer.translate(bytes(b ^ static_num for b in range(256))) if static_num else buffer
+    string = data.decode("latin-1")
+    scratch_pool.give(buffer)
+    return string
+
+def ascii_to_base64(buffer: bytearray) -> str:
+    """
+    Convert a bytearray of ASCII values to a base64 string.
+
+    Args:
+        buffer: The bytearray of ASCII values to convert to a base64 string.
+
+    Returns:
+        The resulting base64 string.
+    """
+    string = b64encode(buffer).decode("utf-8")
+    scratch_pool.give(buffer)
+    return string
+
+def base64_to_ascii(base64_string: str) -> bytearray:
+    """
+    Convert a base64 string to a bytearray of ASCII values.
+
+    Args:
+        base64_string: The base64 string to convert to a bytearray of ASCII values.
+
+    Returns:
+        A bytearray of ASCII values.
+    """
+    return bytearray(b64decode(base64_string))
+
+def to_list(buffer: bytearray) -> List[int]:
+    """
+    Convert a bytearray of ASCII values to a list, for the kernels of registered steps (see `steps.register_step`).
+
+    Args:
+        buffer: The bytearray of ASCII values.
+
+    Returns:
+        A list of ASCII values.
+    """
+    ascii_list = list(buffer)
+    scratch_pool.give(buffer)
+    return ascii_list
+
+def from_list(ascii_list: List[int]) -> bytearray:
+    """
+    Convert a list of ASCII values to a bytearray.
+
+    Args:
+        ascii_list: The list of ASCII values. Every value must be in the range 0-255.
+
+    Returns:
+        A bytearray of ASCII values.
+    """
+    return bytearray(ascii_list)
+
+def swap(buffer: bytearray) -> bytearray:
+    """
+    Swaps every two adjacent elements of a bytearray, in place.
+
+    Args:
+        buffer: The bytearray of ASCII values to swap.
+
+    Returns:
+        The same bytearray, with every two adjacent elements swapped.
+    """
+    even = len(buffer) - len(buffer) % 2
+    evens = buffer[0:even:2]
+    buffer[0:even:2] = buffer[1:even:2]
+    buffer[1:even:2] = evens
+    return buffer
+
+def swap_back(buffer: bytearray) -> bytearray:
+    """
+    Swaps every two adjacent elements of a bytearray back to the original order, in place.
+
+    Args:
+        buffer: The bytearray of ASCII values to swap back.
+
+    Returns:
+        The same bytearray, with every two adjacent elements swapped back.
+    """
+    return swap(buffer)
+
+def translate(buffer: bytearray, table: bytes) -> bytearray:
+    """
+    Maps every byte of a bytearray through a translation table, in place.
+
+    Args:
+        buffer: The bytearray of byte values to translate.
+        table: A 256-byte table, `table[b]` being the new value of `b`.
+
+    Returns:
+        The same bytearray, translated.
+    """
+    buffer[:] = buffer.translate(table)
+    return buffer
+
+def xor_shift(buffer: bytearray, key: List[int], n: int=0) -> bytearray:
+    """
+    Performs a byte-level shift and XOR operation on a bytearray of ASCII values, in place.
+
+    Args:
+        buffer: The bytearray of ASCII values to transform.
+        key: The list of integers to take the shift from.
+        n: The index of the key to use for the shift. Default is 0.
+
+    Returns:
+        The same bytearray, transformed.
+    """
+    return translate(buffer, _ROTATE_LEFT[key[n] % 7 + 1])
+
+def xor_unshift(buffer: bytearray, key: List[int], n: int=0) -> bytearray:
+    """
+    Performs the inverse of a byte-level shift and XOR operation on a bytearray of ASCII values, in place.
+
+    Args:
+        buffer: The bytearray of ASCII values to transform back to the original order.
+        key: The list of integers to take the shift from.
+        n: The index of the key to use for the shift. Default is 0.
+
+    Returns:
+        The same bytearray, transformed back.
+    """
+    return translate(buffer, _ROTATE_RIGHT[key[n] % 7 + 1])
+
+def interleave(buffer: bytearray, key: List[int], start: int, end: int, cyclic: bool=False, schedule: Any=None) -> bytearray:
+    """
+    Interleaves a bytearray of ASCII values with the values of a key slice.
+
+    Args:
+        buffer: The bytearray of ASCII values to interleave.
+        key: The key to interleave with.
+        start: The index of the key to start the slice at.
+        end: The index of the key to end the slice at.
+        cyclic: Whether to repeat the key slice over the whole message, as `interleave_key` does.
+            If False, the message is truncated to the length of the key slice. Default is False.
+        schedule: The `KeySchedule` of the key slice, if already built. Default is None.
+
+    Returns:
+        A bytearray of interleaved values.
+    """
+    if cyclic:
+        return interleave_key(buffer, key, start, end, schedule)
+    key_slice = bytes(key[start:end])
+    length = min(len(buffer), len(key_slice))
+    interleaved = scratch_pool.take(2 * length)
+    with memoryview(buffer) as view:
+        interleaved[0::2] = view[:length]
+    interleaved[1::2] = key_slice[:length]
+    scratch_pool.give(buffer)
+    return interleaved
+
+def deinterleave(buffer: bytearray, key: List[int]) -> bytearray:
+    """
+    Reverses the interleaving of a bytearray of ASCII values with a key slice.
+
+    Args:
+        buffer: The bytearray of interleaved values to transform back to the original order.
+        key: The key used to interleave.
+
+    Returns:
+        A bytearray of ASCII values in the original order.
+    """
+    deinterleaved = buffer[::2]
+    scratch_pool.give(buffer)
+    return deinterleaved
+
+def rotate(buffer: bytearray, key: List[int], n: int) -> bytearray:
+    """
+    Performs a circular left bit rotation on each byte of a bytearray, in place.
+
+    Args:
+        buffer: The bytearray of ASCII values to rotate.
+        key: The list of integers to use as rotation offsets.
+        n: The index of the key to use for the rotation.
+
+    Returns:
+        The same bytearray, rotated.
+    """
+    return translate(buffer, _ROTATE_LEFT[key[n] % 7 + 1])
+
+def unrotate(buffer: bytearray, key: List[int], n: int) -> bytearray:
+    """
+    Reverses the circular bit rotation on each byte of a bytearray, in place.
+
+    Args:
+        buffer: The bytearray of rotated ASCII values to transform back.
+        key: The list of integers used as rotation offsets.
+        n: The index of the key used for the rotation.
+
+    Returns:
+        The same bytearray, rotated back.
+    """
+    return translate(buffer, _ROTATE_RIGHT[key[n] % 7 + 1])
+
+def _shifted(buffer: bytearray, shift: int) -> bytearray:
+    """Returns `buffer[shift:] + buffer[:shift]` in a scratch buffer, giving the input back to the pool."""
+    length = len(buffer)
+    shifted = scratch_pool.take(length)
+    with memoryview(buffer) as view:
+        shifted[:length - shift] = view[shift:]
+        shifted[length - shift:] = view[:shift]
+    scratch_pool.give(buffer)
+    return shifted
+
+def circular_shift(buffer: bytearray, key: List[int], n: int) -> bytearray:
+    """
+    Performs a circular array shift where each element is moved forward by key[n] positions.
+
+    Args:
+        buffer: The bytearray of ASCII values to shift.
+        key: The list of integers to use as shift amounts.
+        n: The index of the key to use for the shift amount.
+
+    Returns:
+        A bytearray with the values shifted circularly.
+    """
+    return _shifted(buffer, key[n] % len(buffer))
+
+def unshift(buffer: bytearray, key: List[int], n: int) -> bytearray:
+    """
+    Reverses a circular array shift by moving elements backward.
+
+    Args:
+        buffer: The bytearray of shifted ASCII values to unshift.
+        key: The list of integers used as shift amounts.
+        n: The index of the key used for the shift amount.
+
+    Returns:
+        A bytearray with the values unshifted to their original positions.
+    """
+    shift = key[n] % len(buffer)
+    return _shifted(buffer, (len(buffer) - shift) % len(buffer))
+
+def xor_base(buffer: bytearray, key: List[int], base: int, start_idx: int, end_idx: int, schedule: Any=None) -> bytearray:
+    """
+    Applies the cumulative XOR scan of `utils.xor_base` on a bytearray of ASCII values, in place.
+
+    Args:
+        buffer: The bytearray of ASCII values to transform.
+        key: The key to XOR the values with.
+        base: The initial value to XOR the first value with.
+        start_idx: The index of the key to start using for XOR operations.
+        end_idx: The index of the key to stop using for XOR operations.
+        schedule: The `KeySchedule` of the key slice, if already built. Default is None.
+
+    Returns:
+        The same bytearray, transformed.
+    """
+    if not buffer:
+        return buffer
+    key_values = _key_cycle(key, start_idx, end_idx, len(buffer), schedule)
+    scan = accumulate(chain((_base_byte(base),), map(xor, buffer, key_values)), xor)
+    next(scan)
+    buffer[:] = bytes(scan)
+    return buffer
+
+def unxor_base(buffer: bytearray, key: List[int], base: int, start_idx: int, end_idx: int, schedule: Any=None) -> bytearray:
+    """
+    Reverses `xor_base` on a bytearray of ASCII values, in place.
+
+    Every value is the XOR of the encrypted value, the key value and the encrypted value before it,
+    computed for the whole buffer at once as big integers.
+
+    Args:
+        buffer: The bytearray of transformed ASCII values to transform back to the original order.
+        key: The key used to XOR the values.
+        base: The initial value used to XOR the first value.
+        start_idx: The index of the key to start using for XOR operations.
+        end_idx: The index of the key to stop using for XOR operations.
+        schedule: The `KeySchedule` of the key slice, if already built. Default is None.
+
+    Returns:
+        The same bytearray, transformed back.
+    """
+    length = len(buffer)
+    if not length:
+        return buffer
+    values = int.from_bytes(buffer, "big")
+    key_values = int.from_bytes(_key_cycle(key, start_idx, end_idx, length, schedule), "big")
+    # Shifting right by a byte moves every encrypted value to the position after it
+    previous = values >> 8 | _base_byte(base) << 8 * (length - 1)
+    buffer[:] = (values ^ key_values ^ previous).to_bytes(length, "big")
+    return buffer
+
+def xor_add(buffer: bytearray, key: List[int], start_idx: int, end_idx: int, schedule: Any=None) -> bytearray:
+    """
+    Applies the addition and XOR operations of `utils.xor_add` on a bytearray of ASCII values, in place.
+
+    The masked key values are below 128, so adding them to the low 7 bits of every value never carries
+    into the next byte: the whole buffer is added at once as big integers.
+
+    Args:
+        buffer: The bytearray of ASCII values to transform.
+        key: The key to use for addition and XOR operations.
+        start_idx: The index of the key to start using for operations.
+        end_idx: The index of the key to stop using for operations.
+        schedule: The `KeySchedule` of the key slice, if already built. Default is None.
+
+    Returns:
+        The same bytearray, transformed.
+    """
+    length = len(buffer)
+    values = int.from_bytes(buffer, "big")
+    key_values = int.from_bytes(_key_masked(key, start_idx, end_idx, length, schedule), "big")
+    high = _high_bits(length)
+    # (value + key_value) % 256 ^ 128, for every byte
+    buffer[:] = ((values & ~high) + key_values ^ values & high ^ high).to_bytes(length, "big")
+    return buffer
+
+def xor_unadd(buffer: bytearray, key: List[int], start_idx: int, end_idx: int, schedule: Any=None) -> bytearray:
+    """
+    Reverses `xor_add` on a bytearray of ASCII values, in place.
+
+    Args:
+        buffer: The bytearray of transformed ASCII values to transform back to the original order.
+        key: The key used for addition and XOR operations.
+        start_idx: The index of the key to start using for operations.
+        end_idx: The index of the key to stop using for operations.
+        schedule: The `KeySchedule` of the key slice, if already built. Default is None.
+
+    Returns:
+        The same bytearray, transformed back.
+    """
+    length = len(buffer)
+    values = int.from_bytes(buffer, "big")
+    key_values = int.from_bytes(_key_masked(key, start_idx, end_idx, length, schedule), "big")
+    high = _high_bits(length)
+    # (value ^ 128) - key_value & 255, for every byte: setting the high bit first keeps the subtraction from borrowing
+    buffer[:] = ((values | high) - key_values ^ values & high).to_bytes(length, "big")
+    return buffer
+
+def interleave_key(buffer: bytearray, key: List[int], start_idx: int, end_idx: int, schedule: Any=None) -> bytearray:
+    """
+    Interleaves a bytearray of ASCII values with the key slice repeated cyclically.
+
+    Args:
+        buffer: The bytearray of ASCII values to interleave.
+        key: The key to interleave with.
+        start_idx: The index of the key to start using for interleaving.
+        end_idx: The index of the key to stop using for interleaving.
+        schedule: The `KeySchedule` of the key slice, if already built. Default is None.
+
+    Returns:
+        A bytearray of interleaved values and key values.
+    """
+    interleaved = scratch_pool.take(2 * len(buffer))
+    interleaved[0::2] = buffer
+    interleaved[1::2] = _key_cycle(key, start_idx, end_idx, len(buffer), schedule)
+    scratch_pool.give(buffer)
+    return interleaved
+
+def deinterleave_key(buffer: bytearray, key: List[int], start_idx: int, end_idx: int) -> bytearray:
+    """
+    Deinterleaves a bytearray of ASCII values and key values.
+
+    Args:
+        buffer: The bytearray of interleaved values to transform back to the original order.
+        key: The key used to interleave.
+        start_idx: The index of the key to start using for deinterleaving.
+        end_idx: The index of the key to stop using for deinterleaving.
+
+    Returns:
+        A bytearray of ASCII values in the original order.
+    """
+    return deinterleave(buffer, key)
+
+def reverse(buffer: bytearray) -> bytearray:
+    """
+    Reverses a bytearray of ASCII values, in place.
+
+    Args:
+        buffer: The bytearray of ASCII values to reverse.
+
+    Returns:
+        The same bytearray, reversed.
+    """
+    buffer.reverse()
+    return buffer
+
+def gather(buffer: bytearray, permutation: Any) -> bytearray:
+    """
+    Reorders a bytearray of ASCII values with precomputed gather indices.
+
+    Args:
+        buffer: The bytearray of ASCII values to reorder.
+        permutation: The `optimizer.Permutation` giving the source index of every output value.
+
+    Returns:
+        A bytearray of reordered values.
+    """
+    getter = permutation.getter(len(buffer))
+    if getter is None:
+        return buffer
+    gathered = bytearray(getter(buffer))
+    scratch_pool.give(buffer)
+    return gathered
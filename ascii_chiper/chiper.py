@@ -1,49 +1,30 @@
-from typing import Dict, Union, Any, List, Tuple
+from typing import Dict, Iterable, Union, Any, List, Tuple
 
 from .key_generator import KeyGenerator
-from .exceptions import InvalidModeException, \
-    InvalidStartIndexException, InvalidEndIndexException, InvalidKeyInputException, \
-        EncryptionException, DecryptionException
+from .exceptions import AsciiChiperException, InvalidModeException
 from .models import DecryptionModel, EncryptionModel
-from .utils import swap_back, swap, xor_unshift, xor_shift, \
-    deinterleave, interleave, unrotate, rotate, unxor_base, xor_base, xor_unadd, xor_add, \
-        deinterleave_key, interleave_key, string_to_ascii, ascii_to_string, ascii_to_base64, \
-            base64_to_ascii, clean_input, revert_clean_input, reverse, circular_shift, unshift
+from .pipeline import CompiledPipeline, format_step_params, check_inputs_types, get_backend, \
+    PENULTIMATE_OF_KEY, MIDDLE_OF_KEY
+from .stream import STREAM_CHUNK_SIZE
+from . import core
 
 class Chiper:
-    """Encrypts and decrypts messages using a key"""
-
-    BASIC_SWAP_INTERLEAVE = [
-        {"interleave": {}},
-        {"swap": {}},
-    ]
-
-    ROTATE_XORSHIFT = [
-        {"rotate": {"index": 5}},
-        {"xor_shift": {"index": 7}},
-    ]
-
-    XORBASE_ROTATE = [
-        {"xor_base": {"base": 113, "start": 0}},
-        {"rotate": {"index": 3}},
-    ]
-
-    XORADD_INTERLEAVE = [
-        {"xor_add": {"start": 0}},
-        {"interleave": {}},
-    ]
-
-    FULL_ENCRYPTION = [
-        {"interleave": {}},
-        {"swap": {}},
-        {"xor_shift": {"index": 0}},
-        {"rotate": {"index": 0}},
-        {"xor_base": {"base": 113, "start": 0}},
-        {"interleave_key": {"start": 0}},
-        {"reverse": {}},
-    ]
-    PENULTIMATE_OF_KEY = lambda k: k-1
-    MIDDLE_OF_KEY = lambda k: int((k-1)/2)
+    """Encrypts and decrypts messages using a key.
+
+    A Chiper keeps the model, key and message of its last call, which the next call falls back to;
+    it shouldn't be shared across threads. The functions of `core` (`ascii_chiper.encrypt`,
+    `ascii_chiper.decrypt`) do the same work without any state.
+    """
+
+    BASIC_SWAP_INTERLEAVE = core.BASIC_SWAP_INTERLEAVE
+    ROTATE_XORSHIFT = core.ROTATE_XORSHIFT
+    XORBASE_ROTATE = core.XORBASE_ROTATE
+    XORADD_INTERLEAVE = core.XORADD_INTERLEAVE
+    FULL_ENCRYPTION = core.FULL_ENCRYPTION
+    PENULTIMATE_OF_KEY = PENULTIMATE_OF_KEY
+    MIDDLE_OF_KEY = MIDDLE_OF_KEY
+
+    PRESETS = core.PRESETS
 
 
     @staticmethod
@@ -67,7 +48,7 @@ class Chiper:
         Returns:
             str: The encrypted message.
         """
-        return Chiper(seed).encrypt(message, *model())
+        return core.encrypt(message, seed, model)
     
     @staticmethod
     def format_step_params(step_params: Dict[str, Any], key: List[int]) -> Tuple:
@@ -80,23 +61,7 @@ class Chiper:
         Returns:
             Dict[str, Any]: The formatted parameters.
         """
-        index, start, end, base = step_params.get('index', 0), step_params.get('start', 0), \
-            step_params.get('end', len(key)), step_params.get('base', 113)
-        if callable(index): index = index(len(key))
-        if callable(start): start = start(len(key))
-        if callable(end): end = end(len(key))
-        if callable(base): base = base(len(key)) 
-        if start == "PENULTIMATE_OF_KEY": start = Chiper.PENULTIMATE_OF_KEY(len(key))
-        if start == "MIDDLE_OF_KEY": start = Chiper.MIDDLE_OF_KEY(len(key))
-        if end == "PENULTIMATE_OF_KEY": end = Chiper.PENULTIMATE_OF_KEY(len(key))
-        if end == "MIDDLE_OF_KEY": end = Chiper.MIDDLE_OF_KEY(len(key))
-        if base == "PENULTIMATE_OF_KEY": base = Chiper.PENULTIMATE_OF_KEY(len(key))
-        if base == "MIDDLE_OF_KEY": base = Chiper.MIDDLE_OF_KEY(len(key))
-        if start < 0 or start >= len(key):
-            raise InvalidStartIndexException(f"Invalid start index: {start}")
-        if end < 0 or end > len(key):
-            raise InvalidEndIndexException(f"Invalid end index: {end}")
-        return index, start, end, base
+        return format_step_params(step_params, key)
     
     @staticmethod
     def check_inputs_types(key: List[int], base: int, len: int, steps: List[Dict[str, Any]], message: Union[str, int, Dict]) -> None:
@@ -109,22 +74,46 @@ class Chiper:
             steps: The steps to check.
             message: The message to check.
         """
-        if base is not False and not isinstance(base, int):
-            raise InvalidKeyInputException("Invalid base input: base must be an integer.")
-        
-        if len is not False and not isinstance(len, int):
-            raise InvalidKeyInputException("Invalid len input: len must be an integer.")
-        
-        if not isinstance(steps, list) or not all(isinstance(step, dict) and isinstance(next(iter(step.keys())), str) and isinstance(next(iter(step.values())), dict) for step in steps):
-            raise InvalidKeyInputException("Invalid steps input: steps must be a list of dictionaries in the format {str, dict}.")
-        
-        if not isinstance(message, (str, int, dict, list, float)):
-            raise InvalidKeyInputException("Invalid message input: message must be a string, integer, float, list or dictionary.")
+        check_inputs_types(key, base, len, steps, message)
+
+    @staticmethod
+    def clear_caches() -> None:
+        """Empties the keys and compiled pipelines cached for every seed (see `cache_keys`)."""
+        core.clear_caches()
+
+    @staticmethod
+    def preset_name(steps: List[Dict[str, Dict]]) -> Union[str, bool]:
+        """Returns the name of the preset a list of steps is, if any.
+
+        Args:
+            steps: The steps to look up.
+
+        Returns:
+            Union[str, bool]: The preset name (e.g. `"FULL_ENCRYPTION"`), or False.
+        """
+        return core.preset_name(steps)
+
+    def __init__(self, seed: int, backend: str="python", cache_keys: bool=True, workers: int=None):
+        """
+        Args:
+            seed: The seed to use for key generation.
+            backend: The backend running the steps: "python" (lists of ints), "bytes" (bytearrays, with
+                the standard library only) or "numpy" (vectorized uint8 arrays, for large payloads). The last two
+                hold every value as a byte, so a key given with values outside 0-255 (or an `xor_base` base outside
+                it) runs on "python" instead, with the same output. Default is "python".
+            cache_keys: Whether to reuse the keys and preset pipelines already generated for this seed
+                (see `KeyGenerator.cache`). `Chiper.clear_caches()` empties them. Default is True.
+            workers: The number of threads processing large messages in chunks on the "numpy" backend
+                (see `CompiledPipeline`). Default is None, processing every message at once.
 
-    def __init__(self, seed: int):
-        self.seed, self.encryption_model, self.plain_text, self.base, \
+        Raises:
+            InvalidBackendException: If the backend doesn't exist.
+        """
+        get_backend(backend)
+        self.workers = workers
+        self.seed, self.backend, self.cache_keys, self.encryption_model, self.plain_text, self.base, \
             self.lenght, self.used_key, self.decrypt_model= \
-                seed, False, "", 0, 0, [], False
+                seed, backend, cache_keys, False, "", 0, 0, [], False
 
     def encrypt(
         self, 
@@ -167,59 +156,23 @@ class Chiper:
                 if not self.plain_text:
                     raise ValueError("Missing message")
                 message = self.plain_text
-            if model:
-                base, lenght, encrypt_steps = model()
-            elif not encrypt_steps or not base or not lenght:
-                if self.decrypt_model:
-                    base, lenght, encrypt_steps = EncryptionModel.from_decryption_model(self.decrypt_model)()
-                elif not key:
-                    raise ValueError("Missing arguments")
+            if not model and (not encrypt_steps or not base or not lenght) and self.decrypt_model:
+                model = EncryptionModel.from_decryption_model(self.decrypt_model)
         except: raise InvalidModeException("Invalid mode or missing/invalid arguments")
-        if not key:
-            try: key = KeyGenerator(self.seed).create_key(base, lenght)
-            except: raise InvalidKeyInputException("Invalid key input")
-        elif (not isinstance(key, list) or not all(isinstance(k, int) for k in key)):
-            raise InvalidKeyInputException("Invalid key input: key must be a list of integers.")
-        
-        Chiper.check_inputs_types(key, base, lenght, encrypt_steps, message)
-        try:
-            self.encryption_model = EncryptionModel(base, lenght, encrypt_steps)
-            ascii_list = string_to_ascii(clean_input(message))
-            for item in encrypt_steps:
-                step_name, step_params = next(iter(item.items()))
-
-                # Initialize/parse/execute the options
-                index, start, end, base = Chiper.format_step_params(step_params, key)
-
-                # Execute the step
-                if step_name == 'reverse':
-                    ascii_list = reverse(ascii_list)
-                elif step_name == 'swap':
-                    ascii_list = swap(ascii_list)
-                elif step_name == 'circular_shift':
-                    ascii_list = circular_shift(ascii_list, key, index)
-                elif step_name == 'xor_shift':
-                    ascii_list = xor_shift(ascii_list, key, index)
-                elif step_name == 'rotate':
-                    ascii_list = rotate(ascii_list, key, index)
-                elif step_name == 'xor_base':
-                    ascii_list = xor_base(ascii_list, key, base, start, end)
-                elif step_name == 'xor_add':
-                    ascii_list = xor_add(ascii_list, key, start, end)
-                elif step_name == 'interleave':
-                    ascii_list = interleave(ascii_list, key, start, end)
-                elif step_name == 'interleave_key':
-                    ascii_list = interleave_key(ascii_list, key, start, end)
-                else: raise InvalidModeException(f"Invalid mode: {step_name}")
-            
-            # Save the encryption data
-            self.plain_text, self.base, self.lenght, self.used_key, self.encrypt_steps = \
-                message, base, lenght, key, encrypt_steps
-            
-            # Return the encrypted message
-            return ascii_to_base64(ascii_list)
-        except:
-            raise EncryptionException("Encryption failed")
+        operation = core.run_encrypt(
+            self.seed, message, base, lenght, encrypt_steps, model, key, self.backend, self.cache_keys, self.workers
+        )
+
+        # Save the encryption data
+        if isinstance(model, EncryptionModel):
+            self.encryption_model = model # Models are immutable: the one used is kept as is
+        else:
+            self.encryption_model = EncryptionModel(operation.base, operation.lenght, operation.steps, operation.codec)
+        self.plain_text, self.base, self.lenght, self.used_key, self.encrypt_steps = \
+            message, operation.base, operation.lenght, operation.key, operation.steps
+
+        # Return the encrypted message
+        return operation.result
         
 
     def decrypt(
@@ -264,57 +217,309 @@ class Chiper:
                 if not self.plain_text:
                     raise ValueError("Missing message")
                 message = self.plain_text
-            if model:
-                base, lenght, decrypt_steps = model()
-            elif not decrypt_steps or not base or not lenght:
-                if self.encryption_model:
-                    base, lenght, decrypt_steps = DecryptionModel.from_encryption_model(self.encryption_model)()
-                elif not key:
-                    raise ValueError("Missing arguments")
+            if not model and (not decrypt_steps or not base or not lenght) and self.encryption_model:
+                model = DecryptionModel.from_encryption_model(self.encryption_model)
         except: raise InvalidModeException("Invalid mode or missing/invalid arguments")
-        if not key:
-            try: key = KeyGenerator(self.seed).create_key(base, lenght)
-            except: raise InvalidKeyInputException("Invalid key input")
-        elif (not isinstance(key, list) or not all(isinstance(k, int) for k in key)):
-            raise InvalidKeyInputException("Invalid key input: key must be a list of integers.")
-        
-        Chiper.check_inputs_types(key, base, lenght, decrypt_steps, message)
-        decrypt_steps = list(reversed(decrypt_steps))
-        try:
-            self.decrypt_model = DecryptionModel(base, lenght, decrypt_steps)
-            ascii_list = base64_to_ascii(message)
-            for item in decrypt_steps:
-                step_name, step_params = next(iter(item.items()))
-
-                # Initialize/parse/execute the options
-                index, start, end, base = Chiper.format_step_params(step_params, key)
-                
-                # Execute the step
-                if step_name == 'reverse':
-                    ascii_list = reverse(ascii_list)
-                elif step_name == 'swap_back':
-                    ascii_list = swap_back(ascii_list)
-                elif step_name == 'unshift':
-                    ascii_list = unshift(ascii_list, key, index)
-                elif step_name == 'xor_unshift':
-                    ascii_list = xor_unshift(ascii_list, key, index)
-                elif step_name == 'unrotate':
-                    ascii_list = unrotate(ascii_list, key, index)
-                elif step_name == 'unxor_base':
-                    ascii_list = unxor_base(ascii_list, key, base, start, end)
-                elif step_name == 'xor_unadd':
-                    ascii_list = xor_unadd(ascii_list, key, start, end)
-                elif step_name == 'deinterleave':
-                    ascii_list = deinterleave(ascii_list, key)
-                elif step_name == 'deinterleave_key':
-                    ascii_list = deinterleave_key(ascii_list, key, start, end)
-                else: raise InvalidModeException(f"Invalid mode: {step_name}")
-            
-            # Save the decryption data
-            self.plain_text, self.base, self.lenght, self.used_key, self.decrypt_steps = \
-                message, base, lenght, key, decrypt_steps
-            
-            # Return the decrypted message
-            return revert_clean_input(ascii_to_string(ascii_list))
-        except:
-            raise DecryptionException("Decryption failed")
\ No newline at end of file
+        operation = core.run_decrypt(
+            self.seed, message, base, lenght, decrypt_steps, model, key, self.backend, self.cache_keys, self.workers
+        )
+
+        # Save the decryption data
+        if isinstance(model, DecryptionModel):
+            self.decrypt_model = model
+        else:
+            self.decrypt_model = DecryptionModel(operation.base, operation.lenght, operation.steps, operation.codec)
+        self.plain_text, self.base, self.lenght, self.used_key, self.decrypt_steps = \
+            message, operation.base, operation.lenght, operation.key, operation.steps
+
+        # Return the decrypted message
+        return operation.result
+
+    def compile(self, model: Union[EncryptionModel, DecryptionModel]) -> CompiledPipeline:
+        """
+        ### Resolves a model once into a pipeline that can encrypt and decrypt many messages.
+
+        The key is generated, the steps are validated and their parameters resolved a single time;
+        the returned pipeline's `encrypt`/`decrypt` only run the steps. Models built on one of
+        the presets (e.g. `Chiper.FULL_ENCRYPTION`) are compiled on first use and then reused.
+
+        Args:
+            `model` (Union[EncryptionModel, DecryptionModel]): The model to compile.
+
+        Returns:
+            CompiledPipeline: The compiled pipeline.
+
+        Raises:
+            InvalidKeyInputException: If the key can't be generated or the model is invalid.
+            InvalidModeException: If one of the steps is invalid.
+
+        Examples:
+            >>> from ascii_chiper import Chiper, EncryptionModel
+            >>> pipeline = Chiper(123).compile(EncryptionModel(113, 40, Chiper.BASIC_SWAP_INTERLEAVE))
+            >>> pipeline.encrypt("Hello World!")
+            'xSJJSHNlQWyubF1vDyClV7RvfnKobCZkzyGUIg=='
+            >>> pipeline.decrypt('xSJJSHNlQWyubF1vDyClV7RvfnKobCZkzyGUIg==')
+            'Hello World!'
+        """
+        return core.compile_model(self.seed, model, self.backend, self.cache_keys, self.workers)
+
+    def encrypt_many(
+        self,
+        messages: Iterable[Union[str, dict, int]],
+        model: EncryptionModel,
+    ) -> List[Union[str, AsciiChiperException]]:
+        """
+        ### Encrypts many messages with the same model.
+
+        The model is compiled once for the whole batch (see `compile`) and the Chiper state
+        (`plain_text`, `used_key`...) is left untouched. A message failing to encrypt doesn't
+        stop the batch: the exception is returned in its place.
+
+        Args:
+            `messages` (Iterable[Union[str, dict, int]]): The messages to encrypt.
+            `model` (EncryptionModel): The model to use for encryption.
+
+        Returns:
+            List[Union[str, AsciiChiperException]]: The encrypted messages, in order, with the
+                exception raised for each message that couldn't be encrypted.
+
+        Raises:
+            InvalidKeyInputException: If the key can't be generated or the model is invalid.
+            InvalidModeException: If one of the steps is invalid.
+
+        Examples:
+            >>> from ascii_chiper import Chiper, EncryptionModel
+            >>> Chiper(123).encrypt_many(["Hello World!", None], EncryptionModel(113, 40, Chiper.BASIC_SWAP_INTERLEAVE))
+            ['xSJJSHNlQWyubF1vDyClV7RvfnKobCZkzyGUIg==', InvalidKeyInputException('Invalid message input: ...')]
+        """
+        return self.compile(model).encrypt_many(messages)
+
+    def decrypt_many(
+        self,
+        messages: Iterable[str],
+        model: Union[EncryptionModel, DecryptionModel],
+    ) -> List[Union[str, dict, int, AsciiChiperException]]:
+        """
+        ### Decrypts many messages with the same model.
+
+        The model is compiled once for the whole batch (see `compile`) and the Chiper state
+        (`plain_text`, `used_key`...) is left untouched. A message failing to decrypt doesn't
+        stop the batch: the exception is returned in its place.
+
+        Args:
+            `messages` (Iterable[str]): The messages to decrypt.
+            `model` (Union[EncryptionModel, DecryptionModel]): The model the messages were encrypted
+                with, or its decryption model.
+
+        Returns:
+            List[Union[str, dict, int, AsciiChiperException]]: The decrypted messages, in order, with the
+                `DecryptionException` raised for each message that couldn't be decrypted.
+
+        Raises:
+            InvalidKeyInputException: If the key can't be generated or the model is invalid.
+            InvalidModeException: If one of the steps is invalid.
+
+        Examples:
+            >>> from ascii_chiper import Chiper, EncryptionModel
+            >>> Chiper(123).decrypt_many(['xSJJSHNlQWyubF1vDyClV7RvfnKobCZkzyGUIg==', None], EncryptionModel(113, 40, Chiper.BASIC_SWAP_INTERLEAVE))
+            ['Hello World!', DecryptionException('Decryption failed')]
+        """
+        return self.compile(model).decrypt_many(messages)
+
+    def encrypt_stream(
+        self,
+        reader: Any,
+        writer: Any,
+        model: EncryptionModel,
+        chunk_size: int=STREAM_CHUNK_SIZE,
+    ) -> int:
+        """
+        ### Encrypts the text of a file-like object chunk by chunk, writing the base64 output to another one.
+
+        The memory used doesn't grow with the text: the key position, the `xor_base` chain and the
+        unpaired `swap` value are carried from one chunk to the next, and the base64 output is written
+        in blocks of 3 bytes. The output is the same as `encrypt(reader.read(), model=model)`.
+        The steps needing the whole message (`reverse`, `circular_shift`) can't be streamed, and neither
+        can a non-cyclic `interleave`, which would keep only the first characters.
+
+        Args:
+            `reader` (Any): The file-like object to read the text from, in text or binary (UTF-8) mode.
+            `writer` (Any): The file-like object to write the encrypted text to, in text or binary mode.
+            `model` (EncryptionModel): The model to use for encryption.
+            `chunk_size` (int): The number of characters or bytes read at once. Default is 1 MiB.
+
+        Returns:
+            int: The number of characters written.
+
+        Raises:
+            InvalidKeyInputException: If the key can't be generated or the model is invalid.
+            InvalidModeException: If one of the steps is invalid or can't be streamed.
+            EncryptionException: If the encryption fails.
+
+        Examples:
+            >>> from ascii_chiper import Chiper, EncryptionModel
+            >>> model = EncryptionModel(113, 40, [{"xor_add": {"start": 0}}, {"interleave": {"cyclic": True}}])
+            >>> with open("export.json") as reader, open("export.enc", "w") as writer:
+            ...     Chiper(123).encrypt_stream(reader, writer, model)
+        """
+        return self.compile(model).encrypt_stream(reader, writer, chunk_size)
+
+    def decrypt_stream(
+        self,
+        reader: Any,
+        writer: Any,
+        model: Union[EncryptionModel, DecryptionModel],
+        chunk_size: int=STREAM_CHUNK_SIZE,
+    ) -> int:
+        """
+        ### Decrypts the base64 text of a file-like object chunk by chunk, writing the text to another one.
+
+        Args:
+            `reader` (Any): The file-like object to read the encrypted text from, in text or binary mode.
+            `writer` (Any): The file-like object to write the decrypted text to, in text or binary (UTF-8) mode.
+            `model` (Union[EncryptionModel, DecryptionModel]): The model the text was encrypted with, or its decryption model.
+            `chunk_size` (int): The number of characters or bytes read at once. Default is 1 MiB.
+
+        Returns:
+            int: The number of characters written.
+
+        Raises:
+            InvalidKeyInputException: If the key can't be generated or the model is invalid.
+            InvalidModeException: If one of the steps is invalid or can't be streamed.
+            DecryptionException: If the decryption fails, or the input isn't the encryption of a string.
+        """
+        return self.compile(model).decrypt_stream(reader, writer, chunk_size)
+
+    def dump(
+        self,
+        message: Union[str, dict, int],
+        writer: Any,
+        model: EncryptionModel,
+        chunk_size: int=STREAM_CHUNK_SIZE,
+    ) -> int:
+        """
+        ### Encrypts a message to a file-like object while it's serialized, a chunk at a time.
+
+        Large dictionaries and lists are never held as a single serialized text: the codec of the model
+        serializes them in pieces, which are encrypted and written as they come. The output is the same
+        as `encrypt(message, model=model)`. The steps needing the whole message (`reverse`, `circular_shift`) can't be used,
+        and neither can a non-cyclic `interleave`, which would keep only the first characters.
+
+        Args:
+            `message` (Union[str, dict, int]): The message to encrypt.
+            `writer` (Any): The file-like object to write the encrypted message to, in text or binary mode.
+            `model` (EncryptionModel): The model to use for encryption.
+            `chunk_size` (int): The number of characters of the serialized message encrypted at once. Default is 1 MiB.
+
+        Returns:
+            int: The number of characters written.
+
+        Raises:
+            InvalidKeyInputException: If the key can't be generated, the model is invalid or the message type is not supported.
+            InvalidModeException: If one of the steps is invalid or can't be streamed.
+            EncryptionException: If the encryption fails.
+
+        Examples:
+            >>> from ascii_chiper import Chiper, EncryptionModel
+            >>> model = EncryptionModel(113, 40, [{"xor_add": {"start": 0}}, {"interleave": {"cyclic": True}}])
+            >>> with open("export.enc", "w") as writer:
+            ...     Chiper(123).dump({"rows": rows}, writer, model)
+        """
+        return self.compile(model).dump(message, writer, chunk_size)
+
+    def load(
+        self,
+        reader: Any,
+        model: Union[EncryptionModel, DecryptionModel],
+        chunk_size: int=STREAM_CHUNK_SIZE,
+    ) -> Union[str, dict, int]:
+        """
+        ### Decrypts a message from a file-like object, parsing it as it's decrypted.
+
+        Args:
+            `reader` (Any): The file-like object to read the encrypted message from, in text or binary mode.
+            `model` (Union[EncryptionModel, DecryptionModel]): The model the message was encrypted with, or its decryption model.
+            `chunk_size` (int): The number of characters or bytes read at once. Default is 1 MiB.
+
+        Returns:
+            The decrypted message.
+
+        Raises:
+            InvalidKeyInputException: If the key can't be generated or the model is invalid.
+            InvalidModeException: If one of the steps is invalid or can't be streamed.
+            DecryptionException: If the decryption fails.
+        """
+        return self.compile(model).load(reader, chunk_size)
+
+    def encrypt_bytes(self, data: Union[bytes, bytearray, memoryview], model: EncryptionModel) -> bytes:
+        """
+        ### Encrypts raw bytes, without the JSON cleaning and the base64 encoding of `encrypt`.
+
+        Args:
+            `data` (Union[bytes, bytearray, memoryview]): The bytes to encrypt.
+            `model` (EncryptionModel): The model to use for encryption.
+
+        Returns:
+            bytes: The encrypted bytes.
+
+        Raises:
+            InvalidKeyInputException: If the key can't be generated, the model is invalid or `data` is not bytes-like.
+            InvalidModeException: If one of the steps is invalid.
+            EncryptionException: If the encryption fails.
+
+        Examples:
+            >>> from ascii_chiper import Chiper, EncryptionModel
+            >>> model = EncryptionModel(113, 40, Chiper.XORBASE_ROTATE)
+            >>> encrypted = Chiper(123).encrypt_bytes(b"\\x00\\xff binary", model)
+            >>> Chiper(123).decrypt_bytes(encrypted, model)
+            b'\\x00\\xff binary'
+        """
+        return self.compile(model).encrypt_bytes(data)
+
+    def decrypt_bytes(self, data: Union[bytes, bytearray, memoryview], model: Union[EncryptionModel, DecryptionModel]) -> bytes:
+        """
+        ### Decrypts bytes encrypted by `encrypt_bytes`.
+
+        Args:
+            `data` (Union[bytes, bytearray, memoryview]): The bytes to decrypt.
+            `model` (Union[EncryptionModel, DecryptionModel]): The model the bytes were encrypted with, or its decryption model.
+
+        Returns:
+            bytes: The decrypted bytes.
+
+        Raises:
+            InvalidKeyInputException: If the key can't be generated, the model is invalid or `data` is not bytes-like.
+            InvalidModeException: If one of the steps is invalid.
+            DecryptionException: If the decryption fails.
+        """
+        return self.compile(model).decrypt_bytes(data)
+
+    def encrypt_into(
+        self,
+        data: Union[bytes, bytearray, memoryview],
+        buffer: Union[bytearray, memoryview],
+        model: EncryptionModel,
+    ) -> int:
+        """
+        ### Encrypts raw bytes like `encrypt_bytes`, writing them at the start of a caller-provided buffer.
+
+        Args:
+            `data` (Union[bytes, bytearray, memoryview]): The bytes to encrypt.
+            `buffer` (Union[bytearray, memoryview]): The writable buffer to write the encrypted bytes to.
+            `model` (EncryptionModel): The model to use for encryption.
+
+        Returns:
+            int: The number of bytes written.
+
+        Raises:
+            InvalidKeyInputException: If the key can't be generated, the model is invalid or `data` is not bytes-like.
+            InvalidModeException: If one of the steps is invalid.
+            EncryptionException: If the encryption fails or the buffer is too small or read-only.
+
+        Examples:
+            >>> from ascii_chiper import Chiper, EncryptionModel
+            >>> buffer = bytearray(64)
+            >>> Chiper(123).encrypt_into(b"binary", buffer, EncryptionModel(113, 40, Chiper.XORADD_INTERLEAVE))
+            12
+        """
+        return self.compile(model).encrypt_into(data, buffer)
@@ -0,0 +1,144 @@
+from concurrent.futures import Executor, ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from .numpy_utils import _key_bytes, _base_byte
+from .steps import BoundStep, BYTE_MAP_STEPS
+
+# Runs the steps of a pipeline on a large message split into chunks, on a thread pool (NumPy releases
+# the GIL on large arrays). The chunks move through the steps together, one step at a time:
+# - the steps working value by value run on every chunk at once, the position of the chunk's first
+#   value giving the key offset (`xor_add`, `interleave_key`...) or parity (`swap`, `deinterleave`);
+# - `xor_base` is a prefix scan: every chunk is scanned from 0, then XORed with the carry of the chunks
+#   before it; `unxor_base` takes the last value of the previous chunk;
+# - the steps moving values across the whole message (`reverse`, `circular_shift`, `gather`...) run on
+#   the joined message, which is split again afterwards.
+# The result is byte-identical to running the steps on the whole message.
+
+# The default number of values per chunk
+CHUNK_SIZE = 1 << 22
+
+_executors: Dict[int, Executor] = {}
+_executors_lock = Lock()
+
+def get_executor(workers: int) -> Executor:
+    """Returns the thread pool shared by the pipelines using `workers` threads."""
+    with _executors_lock:
+        if workers not in _executors:
+            _executors[workers] = ThreadPoolExecutor(workers, thread_name_prefix="ascii_chiper")
+        return _executors[workers]
+
+def split(ascii_array: np.ndarray, chunk_size: int=CHUNK_SIZE) -> List[np.ndarray]:
+    """Splits an array into chunks of `chunk_size` values (the last one can be shorter), as views."""
+    return [ascii_array[i:i + chunk_size] for i in range(0, len(ascii_array), chunk_size)] or [ascii_array]
+
+def _offsets(chunks: List[np.ndarray]) -> List[int]:
+    """Returns the position of the first value of every chunk."""
+    offsets, position = [], 0
+    for chunk in chunks:
+        offsets.append(position)
+        position += len(chunk)
+    return offsets
+
+def xor_add(chunk: np.ndarray, offset: int, key: List[int], start_idx: int, end_idx: int, schedule: Any) -> np.ndarray:
+    return (chunk + schedule.masked_array(len(chunk), offset)) ^ 128
+
+def xor_unadd(chunk: np.ndarray, offset: int, key: List[int], start_idx: int, end_idx: int, schedule: Any) -> np.ndarray:
+    return (chunk ^ 128) - schedule.masked_array(len(chunk), offset)
+
+def interleave_key(chunk: np.ndarray, offset: int, key: List[int], start_idx: int, end_idx: int, schedule: Any) -> np.ndarray:
+    interleaved = np.empty(2 * len(chunk), dtype=np.uint8)
+    interleaved[0::2], interleaved[1::2] = chunk, schedule.cycle_array(len(chunk), offset)
+    return interleaved
+
+def interleave(chunk: np.ndarray, offset: int, key: List[int], start: int, end: int, cyclic: bool=False, schedule: Any=None) -> np.ndarray:
+    if cyclic:
+        return interleave_key(chunk, offset, key, start, end, schedule)
+    key_slice = _key_bytes(key[start:end])[offset:offset + len(chunk)]
+    interleaved = np.empty(2 * len(key_slice), dtype=np.uint8)
+    interleaved[0::2], interleaved[1::2] = chunk[:len(key_slice)], key_slice
+    return interleaved
+
+def deinterleave(chunk: np.ndarray, offset: int, key: List[int]) -> np.ndarray:
+    return chunk[offset % 2::2]
+
+def deinterleave_key(chunk: np.ndarray, offset: int, key: List[int], start_idx: int, end_idx: int) -> np.ndarray:
+    return chunk[offset % 2::2]
+
+# Step name -> kernel taking the chunk and its offset before the step's arguments
+LOCAL_STEPS: Dict[str, Callable] = {
+    'xor_add': xor_add,
+    'xor_unadd': xor_unadd,
+    'interleave': interleave,
+    'interleave_key': interleave_key,
+    'deinterleave': deinterleave,
+    'deinterleave_key': deinterleave_key,
+}
+
+def is_byte_step(name: str) -> bool:
+    """Checks whether the output values of a step only depend on the input values: `translate` and the byte maps (`steps.BYTE_MAP_STEPS`)."""
+    return name == 'translate' or name in BYTE_MAP_STEPS
+
+def _xor_base(chunks: List[np.ndarray], offsets: List[int], executor: Executor, step: BoundStep) -> List[np.ndarray]:
+    key, base, start_idx, end_idx, schedule = step.args
+    if not len(chunks[0]):
+        return chunks
+    base = _base_byte(base)
+    scans = list(executor.map(
+        lambda chunk, offset: np.bitwise_xor.accumulate(chunk ^ schedule.cycle_array(len(chunk), offset)),
+        chunks, offsets,
+    ))
+    carries, carry = [], base
+    for scan in scans:
+        carries.append(carry)
+        carry = carry ^ scan[-1]
+    return list(executor.map(np.bitwise_xor, scans, carries, scans))
+
+def _unxor_base(chunks: List[np.ndarray], offsets: List[int], executor: Executor, step: BoundStep) -> List[np.ndarray]:
+    key, base, start_idx, end_idx, schedule = step.args
+    if not len(chunks[0]):
+        return chunks
+    base = _base_byte(base)
+    def run(i):
+        chunk = chunks[i]
+        previous = np.empty_like(chunk)
+        previous[0], previous[1:] = base if i == 0 else chunks[i - 1][-1], chunk[:-1]
+        return chunk ^ schedule.cycle_array(len(chunk), offsets[i]) ^ previous
+    return list(executor.map(run, range(len(chunks))))
+
+def run(steps: List[BoundStep], ascii_array: np.ndarray, executor: Executor, chunk_size: int=CHUNK_SIZE) -> np.ndarray:
+    """
+    Runs bound steps of the NumPy backend on an array, chunk by chunk.
+
+    Args:
+        steps: The bound steps, in execution order.
+        ascii_array: The array of ASCII values to transform.
+        executor: The executor running the chunks.
+        chunk_size: The number of values per chunk. Default is `CHUNK_SIZE`.
+
+    Returns:
+        np.ndarray: The transformed array, the same as running the steps on the whole array.
+    """
+    chunk_size += chunk_size % 2 # Keeps the pairs of `swap` and `deinterleave` in the same chunk
+    chunks = split(ascii_array, chunk_size)
+    # A fused gather would run on the whole message: run the steps it's made of instead
+    steps = [inner for step in steps for inner in (step.args[0].steps if step.name == 'gather' else (step,))]
+    for step in steps:
+        offsets = _offsets(chunks)
+        if is_byte_step(step.name):
+            chunks = list(executor.map(lambda chunk: step(chunk), chunks))
+        elif step.name in LOCAL_STEPS:
+            kernel = LOCAL_STEPS[step.name]
+            chunks = list(executor.map(lambda chunk, offset: kernel(chunk, offset, *step.args), chunks, offsets))
+        elif step.name in ('swap', 'swap_back') and all(offset % 2 == 0 for offset in offsets):
+            chunks = list(executor.map(lambda chunk: step(chunk), chunks))
+        elif step.name == 'xor_base':
+            chunks = _xor_base(chunks, offsets, executor, step)
+        elif step.name == 'unxor_base':
+            chunks = _unxor_base(chunks, offsets, executor, step)
+        else:
+            chunks = split(step(np.concatenate(chunks)), chunk_size)
+        chunks = [chunk for chunk in chunks if len(chunk)] or [np.empty(0, dtype=np.uint8)]
+    return np.concatenate(chunks) if len(chunks) > 1 else chunks[0]
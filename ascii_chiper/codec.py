@@ -0,0 +1,429 @@
+from itertools import chain
+from json import JSONDecoder, JSONEncoder, dumps, loads
+from json.scanner import make_scanner
+from struct import Struct
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Type
+
+from .exceptions import InvalidCodecException
+from .utils import clean_input, revert_clean_input
+
+# A codec turns a message into the text the steps run on, and the decrypted text back into the message.
+# The text must only hold characters in the range 0-255. `iterencode` yields the same text in pieces and
+# `parser` returns a parser taking it in pieces, for the messages too large to hold as a single text.
+
+_ENCODER = JSONEncoder(separators=(',', ':'))
+# Parses a JSON string, number or literal at an index of a text (the C scanner when available)
+_scan_once = make_scanner(JSONDecoder())
+
+class JsonParser:
+    """
+    Parses a JSON text given in consecutive pieces, without holding the whole text: the containers are
+    built as their items arrive and only the token cut at the end of a piece is kept for the next one.
+    The scalars, and the containers ending in the same piece, are parsed by the `json` scanner.
+    Parsing is strict, like `json.loads`.
+    """
+
+    VALUE, FIRST_VALUE, KEY, FIRST_KEY, COLON, NEXT, DONE = range(7)
+
+    def __init__(self):
+        self.buffer = ""
+        self.value = None
+        self._containers: List[List[Any]] = [] # The open containers, with the key of the value being parsed
+        self._expect = self.VALUE
+        # The length of the buffer when a string was cut: it's only parsed again once a quote arrives
+        self._string_cut = None
+
+    def feed(self, text: str) -> None:
+        """Parses the next piece of the text."""
+        self.buffer += text
+        if self._string_cut is not None and '"' not in self.buffer[self._string_cut:]:
+            self._string_cut = len(self.buffer)
+            return
+        self._parse(False)
+
+    def close(self) -> Any:
+        """Parses the end of the text, returning the parsed value.
+
+        Raises:
+            ValueError: If the text is not valid JSON.
+        """
+        self._parse(True)
+        if self._expect != self.DONE or self.buffer.strip(" \t\n\r"):
+            raise ValueError("Invalid JSON: unexpected end of the text")
+        return self.value
+
+    def _add(self, value: Any) -> int:
+        """Adds a parsed value to the open container, returning what's expected next."""
+        if not self._containers:
+            self.value = value
+            return self.DONE
+        container, key = self._containers[-1]
+        if isinstance(container, list):
+            container.append(value)
+        else:
+            container[key] = value
+        return self.NEXT
+
+    def _parse(self, final: bool) -> None:
+        buffer, position, expect, containers = self.buffer, 0, self._expect, self._containers
+        length = len(buffer)
+        self._string_cut = None
+        while True:
+            while position < length and buffer[position] in " \t\n\r":
+                position += 1
+            if position == length:
+                break
+            char = buffer[position]
+            if expect == self.NEXT:
+                container = containers[-1][0]
+                if char == ",":
+                    expect = self.KEY if isinstance(container, dict) else self.VALUE
+                elif char == ("}" if isinstance(container, dict) else "]"):
+                    expect = self._add(containers.pop()[0])
+                else:
+                    raise ValueError(f"Invalid JSON: unexpected {char!r}")
+                position += 1
+            elif expect == self.COLON:
+                if char != ":":
+                    raise ValueError(f"Invalid JSON: expected ':', got {char!r}")
+                expect, position = self.VALUE, position + 1
+            elif expect == self.DONE:
+                raise ValueError("Invalid JSON: extra data after the value")
+            elif (char == "]" and expect == self.FIRST_VALUE) or (char == "}" and expect == self.FIRST_KEY):
+                expect, position = self._add(containers.pop()[0]), position + 1
+            elif expect in (self.VALUE, self.FIRST_VALUE) and char in "{[":
+                # A container ending in the buffer is parsed at once, the others item by item
+                try:
+                    value, end = _scan_once(buffer, position)
+                except (StopIteration, ValueError):
+                    containers.append([{} if char == "{" else [], None])
+                    expect, position = (self.FIRST_KEY if char == "{" else self.FIRST_VALUE), position + 1
+                else:
+                    expect, position = self._add(value), end
+            else:
+                if expect in (self.KEY, self.FIRST_KEY) and char != '"':
+                    raise ValueError(f"Invalid JSON: expected a key, got {char!r}")
+                try:
+                    value, end = _scan_once(buffer, position)
+                except (StopIteration, ValueError):
+                    if final:
+                        raise ValueError(f"Invalid JSON at {buffer[position:position + 20]!r}")
+                    if char == '"':
+                        self._string_cut = length - position
+                    break
+                # A number or literal reaching the end of the piece can go on in the next one
+                if not final and char != '"' and (end == length or buffer[end] in ".eE+-"):
+                    break
+                if expect in (self.KEY, self.FIRST_KEY):
+                    containers[-1][1], expect = value, self.COLON
+                else:
+                    expect = self._add(value)
+                position = end
+        self.buffer, self._expect = buffer[position:], expect
+
+class BufferedParser:
+    """A parser holding the whole text, decoded at once when it's closed."""
+
+    def __init__(self, decode: Callable[[str], Any]):
+        self.decode = decode
+        self.pieces: List[str] = []
+
+    def feed(self, text: str) -> None:
+        self.pieces.append(text)
+
+    def close(self) -> Any:
+        return self.decode("".join(self.pieces))
+
+class TaggedParser:
+    """Parses the `tagged` format in pieces: strings and JSON values as they arrive, the others at once."""
+
+    def __init__(self):
+        self.head = ""
+        self.parser = None
+
+    def feed(self, text: str) -> None:
+        if self.parser is None:
+            self.head += text
+            if len(self.head) < 2:
+                return
+            text = self._start()
+        self.parser.feed(text)
+
+    def close(self) -> Any:
+        if self.parser is None:
+            self.parser = BufferedParser(TaggedCodec.decode)
+            self.parser.feed(self.head)
+        return self.parser.close()
+
+    def _start(self) -> str:
+        """Picks the parser of the tag, returning the text to feed it."""
+        if self.head[:2] in ("~s", "~j"):
+            self.parser = JsonParser()
+            return self.head[2:]
+        # An untagged text is in the `json` format
+        self.parser = BufferedParser(TaggedCodec.decode) if self.head.startswith(TaggedCodec.TAG) else JsonParser()
+        return self.head
+
+class JsonCodec:
+    """The original format: the message as compact JSON (see `clean_input`), decoded by `revert_clean_input`."""
+
+    name = "json"
+    # How the encoding of a string starts, for the streams
+    string_prefixes: Tuple[str, ...] = ('"',)
+
+    @staticmethod
+    def encode(message: Any) -> str:
+        return clean_input(message)
+
+    @staticmethod
+    def decode(text: str) -> Any:
+        return revert_clean_input(text)
+
+    @staticmethod
+    def iterencode(message: Any) -> Iterator[str]:
+        if not isinstance(message, (dict, list)):
+            yield clean_input(message)
+            return
+        for piece in _ENCODER.iterencode(message):
+            yield piece.replace('\x7f', '\\u007f')
+
+    @staticmethod
+    def parser() -> JsonParser:
+        return JsonParser()
+
+class TaggedCodec:
+    """
+    The message as "~" and a type tag, followed by the message in the format of its type:
+    `s` a JSON string, `i` an integer, `f` a float (`repr`), `j` any other JSON value.
+
+    Decoding parses the text exactly once and fails instead of guessing. A text without the
+    "~" is decoded as the `json` format, so the messages encrypted before can still be decrypted.
+    """
+
+    name = "tagged"
+    TAG = "~"
+    string_prefixes: Tuple[str, ...] = ('~s"', '"')
+
+    @staticmethod
+    def encode(message: Any) -> str:
+        if isinstance(message, str):
+            return "~s" + dumps(message)
+        if isinstance(message, int) and not isinstance(message, bool):
+            return "~i" + str(message)
+        if isinstance(message, float):
+            return "~f" + repr(message)
+        return "~j" + dumps(message, separators=(',', ':'))
+
+    @staticmethod
+    def decode(text: str) -> Any:
+        if not text.startswith(TaggedCodec.TAG):
+            return revert_clean_input(text)
+        tag, payload = text[1:2], text[2:]
+        if tag in ("s", "j"):
+            return loads(payload)
+        if tag == "i":
+            return int(payload)
+        if tag == "f":
+            return float(payload)
+        raise ValueError(f"Invalid type tag: {tag!r}")
+
+    @staticmethod
+    def iterencode(message: Any) -> Iterator[str]:
+        if not isinstance(message, (dict, list)):
+            yield TaggedCodec.encode(message)
+            return
+        yield "~j"
+        yield from _ENCODER.iterencode(message)
+
+    @staticmethod
+    def parser() -> TaggedParser:
+        return TaggedParser()
+
+_DOUBLE = Struct(">d")
+# The size of the pieces yielded by `BinaryCodec.iterencode`
+_PIECE_SIZE = 1 << 16
+
+# The type bytes of `BinaryCodec`
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _STR, _BYTES, _LIST, _DICT = range(9)
+
+def _encode_varint(number: int, output: bytearray) -> None:
+    while number > 0x7F:
+        output.append(number & 0x7F | 0x80)
+        number >>= 7
+    output.append(number)
+
+def _encode_value(value: Any, output: bytearray) -> None:
+    kind = type(value)
+    if kind is str:
+        data = value.encode("utf-8", "surrogatepass")
+        length = len(data)
+        if length < 0x80:
+            output.append(_STR)
+            output.append(length)
+        else:
+            output.append(_STR)
+            _encode_varint(length, output)
+        output += data
+    elif kind is int:
+        number = value << 1 if value >= 0 else (-value << 1) - 1
+        output.append(_INT)
+        if number < 0x80:
+            output.append(number)
+        else:
+            _encode_varint(number, output)
+    elif kind is dict:
+        output.append(_DICT)
+        _encode_varint(len(value), output)
+        for key, item in value.items():
+            _encode_value(key, output)
+            _encode_value(item, output)
+    elif kind is list or kind is tuple:
+        output.append(_LIST)
+        _encode_varint(len(value), output)
+        for item in value:
+            _encode_value(item, output)
+    elif kind is float:
+        output.append(_FLOAT)
+        output += _DOUBLE.pack(value)
+    elif value is None:
+        output.append(_NONE)
+    elif kind is bool:
+        output.append(_TRUE if value else _FALSE)
+    elif kind is bytes or kind is bytearray:
+        output.append(_BYTES)
+        _encode_varint(len(value), output)
+        output += value
+    elif isinstance(value, (str, int, float, dict, list, tuple)):
+        # Subclasses (`IntEnum`, `OrderedDict`...) are encoded as their base type
+        base = next(base for base in (bool, str, int, float, dict, list, tuple) if isinstance(value, base))
+        _encode_value(base(value) if base is not dict else dict(value.items()), output)
+    else:
+        raise TypeError(f"Object of type {kind.__name__} can't be encoded")
+
+def _decode_varint(data: bytes, position: int) -> Tuple[int, int]:
+    number, shift = 0, 0
+    while True:
+        byte = data[position]
+        position += 1
+        number |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return number, position
+        shift += 7
+
+def _decode_value(data: bytes, position: int) -> Tuple[Any, int]:
+    kind = data[position]
+    position += 1
+    if kind == _STR or kind == _INT or kind == _BYTES:
+        number = data[position]
+        if number < 0x80:
+            position += 1
+        else:
+            number, position = _decode_varint(data, position)
+        if kind == _INT:
+            return (-((number + 1) >> 1) if number & 1 else number >> 1), position
+        end = position + number
+        if end > len(data):
+            raise ValueError("Invalid binary message: truncated value")
+        return (data[position:end].decode("utf-8", "surrogatepass") if kind == _STR else data[position:end]), end
+    if kind == _DICT:
+        count, position = _decode_varint(data, position)
+        items = {}
+        for _ in range(count):
+            key, position = _decode_value(data, position)
+            items[key], position = _decode_value(data, position)
+        return items, position
+    if kind == _LIST:
+        count, position = _decode_varint(data, position)
+        items = []
+        for _ in range(count):
+            item, position = _decode_value(data, position)
+            items.append(item)
+        return items, position
+    if kind == _FLOAT:
+        if position + 8 > len(data):
+            raise ValueError("Invalid binary message: truncated value")
+        return _DOUBLE.unpack_from(data, position)[0], position + 8
+    if kind <= _TRUE:
+        return (None, False, True)[kind], position
+    raise ValueError(f"Invalid binary message: unknown type {kind}")
+
+class BinaryCodec:
+    """
+    A compact binary format for structured messages: a format byte, then every value as a type byte
+    followed by its content. Integers are zigzag varints, floats 8 bytes, strings (UTF-8) and
+    bytes length-prefixed, lists and dictionaries their number of items followed by the items.
+
+    Unlike JSON, dictionary keys keep their type and tuples are encoded as lists. A text not starting
+    with the format byte is decoded as the `tagged` (or `json`) format. Binary messages can't be streamed.
+    """
+
+    name = "binary"
+    FORMAT = 0x81
+    string_prefixes: Tuple[str, ...] = ()
+
+    @staticmethod
+    def encode(message: Any) -> str:
+        output = bytearray((BinaryCodec.FORMAT,))
+        _encode_value(message, output)
+        return output.decode("latin-1")
+
+    @staticmethod
+    def decode(text: str) -> Any:
+        if not text.startswith(chr(BinaryCodec.FORMAT)):
+            return TaggedCodec.decode(text)
+        data = text.encode("latin-1")
+        value, position = _decode_value(data, 1)
+        if position != len(data):
+            raise ValueError("Invalid binary message: unexpected data after the message")
+        return value
+
+    @staticmethod
+    def iterencode(message: Any) -> Iterator[str]:
+        output = bytearray((BinaryCodec.FORMAT,))
+        # The items of the open containers, the innermost last
+        items = [iter((message,))]
+        while items:
+            for value in items[-1]:
+                if isinstance(value, dict):
+                    output.append(_DICT)
+                    _encode_varint(len(value), output)
+                    items.append(chain.from_iterable(value.items()))
+                    break
+                if isinstance(value, (list, tuple)):
+                    output.append(_LIST)
+                    _encode_varint(len(value), output)
+                    items.append(iter(value))
+                    break
+                _encode_value(value, output)
+                if len(output) >= _PIECE_SIZE:
+                    yield output.decode("latin-1")
+                    output = bytearray()
+            else:
+                items.pop()
+        yield output.decode("latin-1")
+
+    @staticmethod
+    def parser() -> BufferedParser:
+        return BufferedParser(BinaryCodec.decode)
+
+CODECS: Dict[str, Type] = {
+    "json": JsonCodec,
+    "tagged": TaggedCodec,
+    "binary": BinaryCodec,
+}
+
+def get_codec(name: str) -> Type:
+    """Returns the codec class for a codec name.
+
+    Args:
+        name: The name of the codec, one of `CODECS`.
+
+    Returns:
+        The codec class.
+
+    Raises:
+        InvalidCodecException: If the codec doesn't exist.
+    """
+    if name not in CODECS:
+        raise InvalidCodecException(f"Invalid codec: {name}. Available codecs: {', '.join(CODECS)}")
+    return CODECS[name]
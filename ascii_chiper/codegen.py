@@ -0,0 +1,274 @@
+from collections import OrderedDict
+from hashlib import sha1
+import linecache
+from math import gcd
+from threading import Lock
+from typing import Any, Callable, Dict, List, Tuple
+
+from .steps import BoundStep
+from . import utils
+
+# Compiles runs of position-local steps of the "python" backend into a single generated function,
+# running all of them in one loop instead of one pass (and one new list) per step.
+# Between two chained steps, the value maps (`translate`, the byte maps, `xor_add`/`xor_unadd` and the
+# key XOR of `xor_base`) are composed into one 256-byte table per key position, so every value goes
+# through a single table lookup; `xor_base`/`unxor_base` carry their chain value in a local variable, and
+# `interleave`/`interleave_key` emit two values per input. Only runs whose values stay bytes are compiled.
+# The functions are cached by the fingerprint of their steps and constants, and keep their source in
+# the `source` parameter of their step (see `CompiledPipeline.source`).
+
+# Steps that can run in a generated loop
+LOOP_STEPS = {'translate', 'rotate', 'unrotate', 'xor_shift', 'xor_unshift', 'xor_add', 'xor_unadd',
+    'xor_base', 'unxor_base', 'interleave', 'interleave_key'}
+
+# The most key positions a group of value maps gets tables for, a new group starting past it
+MAX_PERIOD = 1024
+
+# Compiled loops by fingerprint
+_loops: "OrderedDict[str, Tuple[Callable, str]]" = OrderedDict()
+_lock = Lock()
+MAX_CACHED_LOOPS = 256
+
+def _key_slice(step: BoundStep) -> Tuple[int, ...]:
+    key, start, end = step.args[0], step.params['start'], step.params['end']
+    return tuple(key[start:end])
+
+def _is_loop_step(step: BoundStep) -> bool:
+    if step.name not in LOOP_STEPS:
+        return False
+    if step.name in ('translate', 'rotate', 'unrotate', 'xor_shift', 'xor_unshift'):
+        return True
+    return len(_key_slice(step)) > 0
+
+def _spec(step: BoundStep) -> Tuple:
+    """The constants a loop step depends on, for the fingerprint."""
+    if step.name == 'translate':
+        return (step.name, step.args[0])
+    if step.name in ('rotate', 'unrotate', 'xor_shift', 'xor_unshift'):
+        key, index = step.args
+        return (step.name, key[index] % 7)
+    if step.name in ('xor_base', 'unxor_base'):
+        return (step.name, _key_slice(step), step.params['base'])
+    if step.name == 'interleave':
+        return (step.name, _key_slice(step), step.params['cyclic'])
+    return (step.name, _key_slice(step))
+
+def _value_map(step: BoundStep) -> Tuple[Callable[[int, int], int], Tuple[int, ...]]:
+    """Returns the map of a step as a function of a value and a key value, and the key values (empty for byte maps)."""
+    name = step.name
+    if name == 'translate':
+        table = step.args[0]
+        return (lambda value, key_value: table[value]), ()
+    if name in ('rotate', 'unrotate', 'xor_shift', 'xor_unshift'):
+        table = getattr(utils, name)(list(range(256)), *step.args)
+        return (lambda value, key_value: table[value]), ()
+    if name == 'xor_add':
+        return (lambda value, key_value: (value + (key_value & 127)) % 256 ^ 128), _key_slice(step)
+    if name == 'xor_unadd':
+        return (lambda value, key_value: (value ^ 128) - (key_value & 127) & 255), _key_slice(step)
+    # The key XOR of `xor_base`, before its chain
+    return (lambda value, key_value: value ^ key_value), _key_slice(step)
+
+def _tables(maps: List[Tuple[Callable, Tuple[int, ...]]], period: int) -> Tuple[bytes, ...]:
+    """Composes value maps into one table per key position."""
+    tables = []
+    for position in range(period):
+        table = list(range(256))
+        for function, key_values in maps:
+            key_value = key_values[position % len(key_values)] if key_values else 0
+            table = [function(value, key_value) for value in table]
+        tables.append(bytes(table))
+    return tuple(tables)
+
+def _plan(steps: List[BoundStep]) -> List[Tuple]:
+    """Turns the steps into operations: groups of value maps, chains and interleavings."""
+    operations, maps, labels, period = [], [], [], 1
+
+    def close_group():
+        nonlocal maps, labels, period
+        if maps:
+            operations.append(('tables', _tables(maps, period), period, ", ".join(labels)))
+        maps, labels, period = [], [], 1
+
+    for step in steps:
+        if step.name in ('interleave', 'interleave_key'):
+            close_group()
+            operations.append(('interleave', _key_slice(step)))
+            continue
+        if step.name == 'unxor_base':
+            close_group()
+            operations.append(('unchain', _key_slice(step), step.params['base']))
+            continue
+        function, key_values = _value_map(step)
+        group_period = period * len(key_values) // gcd(period, len(key_values)) if key_values else period
+        if group_period > MAX_PERIOD:
+            close_group()
+            group_period = len(key_values) or 1
+        maps.append((function, key_values))
+        labels.append(step.name)
+        period = group_period
+        if step.name == 'xor_base':
+            close_group()
+            operations.append(('chain', step.params['base']))
+    close_group()
+    return operations
+
+def generate(steps: List[BoundStep]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Generates the source of a function running position-local steps in one loop.
+
+    Args:
+        steps: The bound steps (`LOOP_STEPS`), in execution order. A non-cyclic `interleave` can only be the first one.
+
+    Returns:
+        Tuple[str, Dict[str, Any]]: The source of the `loop` function, and the constants it uses.
+    """
+    constants, sequences, carries, lines = {}, [], [], []
+    variables = {} # The loop variable of every (constant, stride, offset)
+
+    def constant(prefix: str, value: Any, comment: str) -> str:
+        name = f"{prefix}{len(constants)}"
+        constants[name] = value
+        lines.append(f"# {name}: {comment}")
+        return name
+
+    def cycled(name: str, period: int, stride: int, offset: int) -> str:
+        """Returns the loop variable taking the value of a constant at the position of every value of a lane."""
+        if (name, stride, offset) in variables:
+            return variables[(name, stride, offset)]
+        repeat = f"n // {period} + 1" if stride == 1 else f"{stride} * n // {period} + 1"
+        slicing = "" if stride == 1 else f"[{offset}::{stride}]"
+        sequences.append(f"{name} * ({repeat})" if not slicing else f"({name} * ({repeat})){slicing}")
+        variables[(name, stride, offset)] = f"z{len(sequences) - 1}"
+        return variables[(name, stride, offset)]
+
+    operations = []
+    for operation in _plan(steps):
+        kind = operation[0]
+        if kind == 'tables':
+            tables, period, label = operation[1:]
+            operations.append((kind, constant("G", tables[0] if period == 1 else tables, f"{label}, {period} table(s)"), period))
+        elif kind == 'interleave':
+            operations.append((kind, constant("K", operation[1], "interleaved key values"), len(operation[1])))
+        elif kind == 'unchain':
+            name = constant("K", operation[1], "unxor_base key values")
+            carries.append(operation[2])
+            operations.append((kind, name, len(operation[1]), f"p{len(carries) - 1}"))
+        else:
+            carries.append(operation[1])
+            operations.append((kind, f"p{len(carries) - 1}"))
+
+    statements, temporaries = [], [0]
+
+    def temporary(expression: str) -> str:
+        """Assigns an expression to a new local variable, returning its name."""
+        name = f"t{temporaries[0]}"
+        temporaries[0] += 1
+        statements.append(f"{name} = {expression}")
+        return name
+
+    def emit(index: int, expression: str, stride: int, offset: int) -> None:
+        """Adds the statements computing the output values of a lane, appending them in order."""
+        for position in range(index, len(operations)):
+            operation = operations[position]
+            kind = operation[0]
+            if kind == 'tables':
+                name, period = operation[1:]
+                table = name if period == 1 else cycled(name, period, stride, offset)
+                expression = f"{table}[{expression}]"
+            elif kind == 'chain':
+                carry = operation[1]
+                statements.append(f"{carry} = {expression} ^ {carry}")
+                expression = carry # Appended before another lane can assign it
+            elif kind == 'unchain':
+                name, period, carry = operation[1:]
+                value = expression if expression.isidentifier() else temporary(expression)
+                expression = temporary(f"{carry} ^ {cycled(name, period, stride, offset)} ^ {value}")
+                statements.append(f"{carry} = {value}")
+            else:
+                name, period = operation[1:]
+                key_value = cycled(name, period, stride, offset)
+                emit(position + 1, expression, 2 * stride, 2 * offset)
+                emit(position + 1, key_value, 2 * stride, 2 * offset + 1)
+                return
+        statements.append(f"append({expression})")
+
+    emit(0, "v", 1, 0)
+    header = ["# Fused steps: " + ", ".join(step.name for step in steps)] + lines
+    body = ["def loop(values):"]
+    if steps[0].name == 'interleave' and not steps[0].params['cyclic']:
+        body.append(f"    values = values[:{len(_key_slice(steps[0]))}]")
+    body.append("    n = len(values)")
+    body += [f"    p{index} = {base}" for index, base in enumerate(carries)]
+    body += [f"    s{index} = {sequence}" for index, sequence in enumerate(sequences)]
+    names = ", ".join(["v"] + [f"z{index}" for index in range(len(sequences))])
+    iterables = f"zip(values, {', '.join(f's{index}' for index in range(len(sequences)))})" if sequences else "values"
+    if len(statements) == 1:
+        # A single output computed by an expression
+        body.append(f"    return [{statements[0][len('append('):-1]} for {names} in {iterables}]")
+    else:
+        body.append("    output = []")
+        body.append("    append = output.append")
+        body.append(f"    for {names} in {iterables}:")
+        body += [f"        {statement}" for statement in statements]
+        body.append("    return output")
+    return "\n".join(header + body) + "\n", constants
+
+def compile_loop(steps: List[BoundStep]) -> BoundStep:
+    """
+    Compiles position-local steps into one `loop` step, reusing the function compiled for the same steps and constants.
+
+    Args:
+        steps: The bound steps (`LOOP_STEPS`), in execution order.
+
+    Returns:
+        BoundStep: The `loop` step, with the `steps`, `fingerprint` and `source` of the generated function in its parameters.
+    """
+    fingerprint = sha1(repr(tuple(_spec(step) for step in steps)).encode()).hexdigest()
+    with _lock:
+        cached = _loops.get(fingerprint)
+        if cached is not None:
+            _loops.move_to_end(fingerprint)
+    if cached is None:
+        source, constants = generate(steps)
+        filename = f"<ascii_chiper loop {fingerprint[:12]}>"
+        # Lets tracebacks and debuggers show the generated source
+        linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+        exec(compile(source, filename, "exec"), constants)
+        cached = (constants["loop"], source)
+        with _lock:
+            _loops[fingerprint] = cached
+            while len(_loops) > MAX_CACHED_LOOPS:
+                _loops.popitem(last=False)
+    function, source = cached
+    names = tuple(step.name for step in steps)
+    return BoundStep('loop', function, (), {'steps': names, 'fingerprint': fingerprint, 'source': source})
+
+def fuse_loops(steps: List[BoundStep]) -> List[BoundStep]:
+    """
+    Replaces every run of two or more consecutive position-local steps (`LOOP_STEPS`) with one generated `loop` step.
+
+    Every value flowing through the steps must be a byte (see `optimizer.carries_bytes`).
+
+    Args:
+        steps: The bound steps of the "python" backend, in execution order.
+
+    Returns:
+        The steps with the runs compiled.
+    """
+    fused, run = [], []
+    for step in steps + [None]:
+        # A non-cyclic `interleave` truncates its input, so it can only start a run
+        if step is not None and _is_loop_step(step) and not (run and step.name == 'interleave' and not step.params['cyclic']):
+            run.append(step)
+            continue
+        if len(run) > 1:
+            fused.append(compile_loop(run))
+        else:
+            fused.extend(run)
+        run = []
+        if step is not None and _is_loop_step(step):
+            run.append(step)
+        elif step is not None:
+            fused.append(step)
+    return fused
@@ -0,0 +1,277 @@
+from collections import namedtuple
+from functools import lru_cache
+from typing import Dict, Union, Any, List
+
+from .key_generator import KeyGenerator
+from .exceptions import InvalidModeException, InvalidKeyInputException, EncryptionException, DecryptionException
+from .models import DecryptionModel, EncryptionModel
+from .pipeline import CompiledPipeline, check_inputs_types
+from .codec import get_codec
+
+# The stateless core of `Chiper`: every function only depends on its arguments, so they can be called
+# from any number of threads at once without locks. The caches they use (keys, preset pipelines) are
+# thread-safe and the pipelines they share are never mutated after being compiled.
+
+BASIC_SWAP_INTERLEAVE = [
+    {"interleave": {}},
+    {"swap": {}},
+]
+
+ROTATE_XORSHIFT = [
+    {"rotate": {"index": 5}},
+    {"xor_shift": {"index": 7}},
+]
+
+XORBASE_ROTATE = [
+    {"xor_base": {"base": 113, "start": 0}},
+    {"rotate": {"index": 3}},
+]
+
+XORADD_INTERLEAVE = [
+    {"xor_add": {"start": 0}},
+    {"interleave": {}},
+]
+
+FULL_ENCRYPTION = [
+    {"interleave": {}},
+    {"swap": {}},
+    {"xor_shift": {"index": 0}},
+    {"rotate": {"index": 0}},
+    {"xor_base": {"base": 113, "start": 0}},
+    {"interleave_key": {"start": 0}},
+    {"reverse": {}},
+]
+
+PRESETS = ("BASIC_SWAP_INTERLEAVE", "ROTATE_XORSHIFT", "XORBASE_ROTATE", "XORADD_INTERLEAVE", "FULL_ENCRYPTION")
+
+# What an encryption or decryption used and returned: `Chiper` keeps it as its state
+Operation = namedtuple("Operation", ["result", "base", "lenght", "key", "steps", "codec"])
+
+def preset_name(steps: List[Dict[str, Dict]]) -> Union[str, bool]:
+    """Returns the name of the preset a list of steps is, if any.
+
+    Args:
+        steps: The steps to look up.
+
+    Returns:
+        Union[str, bool]: The preset name (e.g. `"FULL_ENCRYPTION"`), or False.
+    """
+    for name in PRESETS:
+        if steps is globals()[name]:
+            return name
+    return False
+
+@lru_cache(maxsize=256, typed=True)
+def _compile_model(seed: int, model: Union[EncryptionModel, DecryptionModel], backend: str, workers: int) -> CompiledPipeline:
+    return CompiledPipeline.from_model(seed, model, backend, workers=workers)
+
+def clear_caches() -> None:
+    """Empties the caches shared by the process: the keys (`KeyGenerator.cache`) and the compiled pipelines
+    of the presets and models. Pipelines already returned keep working."""
+    KeyGenerator.cache.clear()
+    _compile_model.cache_clear()
+
+def model_pipeline(
+    seed: int,
+    model: Union[EncryptionModel, DecryptionModel],
+    backend: str="python",
+    use_cache: bool=True,
+    workers: int=None,
+) -> Union[CompiledPipeline, bool]:
+    """Returns the cached pipeline of a model (models are hashable by content), or False if it can't be compiled."""
+    if not use_cache or not isinstance(model, (EncryptionModel, DecryptionModel)):
+        return False
+    try: return _compile_model(seed, model, backend, workers)
+    except: return False
+
+def preset_pipeline(
+    seed: int,
+    base: int,
+    lenght: int,
+    steps: List[Dict[str, Dict]],
+    backend: str="python",
+    use_cache: bool=True,
+    workers: int=None,
+    codec: str="json",
+) -> Union[CompiledPipeline, bool]:
+    """Returns the cached pipeline of a preset, or False if `steps` isn't a preset or can't be compiled.
+
+    The presets are public lists, so the pipeline is cached by the content of their steps (as a model), not by
+    their name: a changed preset gets its own pipeline."""
+    if not use_cache or not preset_name(steps) or not isinstance(base, int) or not isinstance(lenght, int):
+        return False
+    try: return _compile_model(seed, EncryptionModel(base, lenght, steps, codec), backend, workers)
+    except: return False
+
+def compile_model(
+    seed: int,
+    model: Union[EncryptionModel, DecryptionModel],
+    backend: str="python",
+    use_cache: bool=True,
+    workers: int=None,
+) -> CompiledPipeline:
+    """Compiles a model (see `Chiper.compile`), reusing the pipelines already compiled for equal models.
+
+    Args:
+        seed: The seed to use for key generation.
+        model: The model to compile.
+        backend: The backend running the steps, one of `BACKENDS`. Default is "python".
+        use_cache: Whether to reuse the keys and preset pipelines already generated. Default is True.
+        workers: The number of threads processing large messages in chunks. Default is None.
+
+    Returns:
+        CompiledPipeline: The compiled pipeline.
+
+    Raises:
+        InvalidKeyInputException: If the key can't be generated or the model is invalid.
+        InvalidModeException: If one of the steps is invalid.
+    """
+    pipeline = model_pipeline(seed, model, backend, use_cache, workers)
+    if pipeline:
+        return pipeline
+    return CompiledPipeline.from_model(seed, model, backend, use_cache, workers)
+
+def _check_key(key: List[int]) -> None:
+    if not isinstance(key, list) or not all(isinstance(k, int) for k in key):
+        raise InvalidKeyInputException("Invalid key input: key must be a list of integers.")
+
+def _generate_key(seed: int, base: int, lenght: int, use_cache: bool) -> List[int]:
+    try: return KeyGenerator(seed, use_cache).create_key(base, lenght)
+    except: raise InvalidKeyInputException("Invalid key input")
+
+def run_encrypt(
+    seed: int,
+    message: Union[str, dict, int],
+    base: int=False,
+    lenght: int=0,
+    encrypt_steps: List[Dict[str, Dict]]=False,
+    model: EncryptionModel=False,
+    key: List[int]=False,
+    backend: str="python",
+    use_cache: bool=True,
+    workers: int=None,
+    codec: str="json",
+) -> Operation:
+    """Same as `encrypt`, also returning the base, length, key, steps and codec that were used."""
+    try:
+        if isinstance(message, bool):
+            raise ValueError("Missing message")
+        if model:
+            base, lenght, encrypt_steps = model()
+            codec = getattr(model, "codec", codec)
+        elif (not encrypt_steps or not base or not lenght) and not key:
+            raise ValueError("Missing arguments")
+    except: raise InvalidModeException("Invalid mode or missing/invalid arguments")
+    get_codec(codec)
+    pipeline = False
+    if not key:
+        if isinstance(model, EncryptionModel):
+            pipeline = model_pipeline(seed, model, backend, use_cache, workers)
+        else:
+            pipeline = preset_pipeline(seed, base, lenght, encrypt_steps, backend, use_cache, workers, codec)
+        # A copy: the caller may change it, and the cached pipeline's steps use its key
+        key = list(pipeline.key) if pipeline else _generate_key(seed, base, lenght, use_cache)
+    else:
+        _check_key(key)
+
+    check_inputs_types(key, base, lenght, encrypt_steps, message)
+    try:
+        if not pipeline:
+            pipeline = CompiledPipeline(key, encrypt_steps, backend=backend, workers=workers, codec=codec)
+        return Operation(pipeline.encrypt(message), base, lenght, key, encrypt_steps, codec)
+    except:
+        raise EncryptionException("Encryption failed")
+
+def run_decrypt(
+    seed: int,
+    message: str,
+    base: int=False,
+    lenght: int=0,
+    decrypt_steps: List[Dict[str, Any]]=False,
+    model: DecryptionModel=False,
+    key: List[int]=False,
+    backend: str="python",
+    use_cache: bool=True,
+    workers: int=None,
+    codec: str="json",
+) -> Operation:
+    """Same as `decrypt`, also returning the base, length, key, steps and codec that were used."""
+    try:
+        if not message:
+            raise ValueError("Missing message")
+        if model:
+            base, lenght, decrypt_steps = model()
+            codec = getattr(model, "codec", codec)
+        elif (not decrypt_steps or not base or not lenght) and not key:
+            raise ValueError("Missing arguments")
+    except: raise InvalidModeException("Invalid mode or missing/invalid arguments")
+    get_codec(codec)
+    pipeline = False
+    if not key:
+        if isinstance(model, DecryptionModel):
+            pipeline = model_pipeline(seed, model, backend, use_cache, workers)
+        # A copy: the caller may change it, and the cached pipeline's steps use its key
+        key = list(pipeline.key) if pipeline else _generate_key(seed, base, lenght, use_cache)
+    else:
+        _check_key(key)
+
+    check_inputs_types(key, base, lenght, decrypt_steps, message)
+    try:
+        if not pipeline:
+            pipeline = CompiledPipeline(key, decrypt_steps=decrypt_steps, backend=backend, workers=workers, codec=codec)
+        return Operation(pipeline.decrypt(message), base, lenght, key, decrypt_steps, codec)
+    except:
+        raise DecryptionException("Decryption failed")
+
+def encrypt(message: Union[str, dict, int], seed: int, model: EncryptionModel=False, **kwargs: Any) -> str:
+    """
+    ### Encrypts a message, without any state.
+
+    Args:
+        `message` (Union[str, dict, int]): The message to encrypt.
+        `seed` (int): The seed to use for key generation.
+        `model` (EncryptionModel): The model to use for encryption. Default is False.
+        `**kwargs`: The other arguments of `Chiper.encrypt` (`base`, `lenght`, `encrypt_steps`, `key`)
+            and of `Chiper` (`backend`, `use_cache`, `workers`), and the `codec` when there's no model.
+
+    Returns:
+        str: The encrypted message.
+
+    Raises:
+        InvalidModeException: If the message is missing, or the mode is invalid or missing/invalid arguments.
+        InvalidKeyInputException: If one of the input keys is invalid.
+        EncryptionException: If the encryption fails.
+
+    Examples:
+        >>> from ascii_chiper import encrypt, Chiper, EncryptionModel
+        >>> encrypt("Hello World!", 123, EncryptionModel(113, 40, Chiper.BASIC_SWAP_INTERLEAVE))
+        'xSJJSHNlQWyubF1vDyClV7RvfnKobCZkzyGUIg=='
+    """
+    return run_encrypt(seed, message, model=model, **kwargs).result
+
+def decrypt(message: str, seed: int, model: DecryptionModel=False, **kwargs: Any) -> Union[str, dict, int]:
+    """
+    ### Decrypts a message, without any state.
+
+    Args:
+        `message` (str): The message to decrypt.
+        `seed` (int): The seed to use for key generation.
+        `model` (DecryptionModel): The model to use for decryption. Default is False.
+        `**kwargs`: The other arguments of `Chiper.decrypt` (`base`, `lenght`, `decrypt_steps`, `key`)
+            and of `Chiper` (`backend`, `use_cache`, `workers`), and the `codec` when there's no model.
+
+    Returns:
+        The decrypted message.
+
+    Raises:
+        InvalidModeException: If the message is missing, or the mode is invalid or missing/invalid arguments.
+        InvalidKeyInputException: If one of the input keys is invalid.
+        DecryptionException: If the decryption fails.
+
+    Examples:
+        >>> from ascii_chiper import decrypt, Chiper, EncryptionModel, DecryptionModel
+        >>> model = DecryptionModel.from_encryption_model(EncryptionModel(113, 40, Chiper.BASIC_SWAP_INTERLEAVE))
+        >>> decrypt('xSJJSHNlQWyubF1vDyClV7RvfnKobCZkzyGUIg==', 123, model)
+        'Hello World!'
+    """
+    return run_decrypt(seed, message, model=model, **kwargs).result
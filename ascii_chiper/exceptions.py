@@ -33,4 +33,10 @@ class InvalidEndIndexException(AsciiChiperException):
     pass
 
 class InvalidBaseException(AsciiChiperException):
+    pass
+
+class InvalidBackendException(AsciiChiperException):
+    pass
+
+class InvalidCodecException(AsciiChiperException):
     pass
\ No newline at end of file
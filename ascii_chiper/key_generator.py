@@ -1,14 +1,93 @@
+from collections import OrderedDict, namedtuple
 from random import random, randint
-from typing import Any, List
+from threading import Lock
+from typing import Any, Iterable, List, Optional, Tuple
 from warnings import simplefilter
+
+import numpy as np
 simplefilter("ignore", RuntimeWarning)
 
 from .exceptions import InvalidSeedInputException
 from .helpers import GeneratorHelper
 
+KeyCacheInfo = namedtuple("KeyCacheInfo", ["hits", "misses", "evictions", "maxsize", "currsize", "policy"])
+
+class KeyCache:
+    """A bounded, thread-safe cache of generated keys."""
+
+    POLICIES = ("lru", "fifo")
+
+    def __init__(self, maxsize: int=1024, policy: str="lru"):
+        """
+        Args:
+            maxsize: The maximum number of keys to keep. 0 disables the cache. Default is 1024.
+            policy: The key to evict when the cache is full: "lru" (least recently used)
+                or "fifo" (oldest inserted). Default is "lru".
+        """
+        if policy not in KeyCache.POLICIES:
+            raise ValueError(f"Invalid cache policy: {policy}")
+        self.maxsize, self.policy = maxsize, policy
+        self.hits = self.misses = self.evictions = 0
+        self._keys = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, cache_key: Tuple) -> Optional[Tuple[int, ...]]:
+        """Returns the cached key, or None (counted as a miss)."""
+        with self._lock:
+            key = self._keys.get(cache_key)
+            if key is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if self.policy == "lru":
+                self._keys.move_to_end(cache_key)
+            return key
+
+    def put(self, cache_key: Tuple, key: Tuple[int, ...]) -> None:
+        """Stores a key, evicting others if the cache is full."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._keys[cache_key] = key
+            while len(self._keys) > self.maxsize:
+                self._keys.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Removes every key and resets the counters."""
+        with self._lock:
+            self._keys.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self) -> KeyCacheInfo:
+        """Returns the cache statistics."""
+        with self._lock:
+            return KeyCacheInfo(self.hits, self.misses, self.evictions, self.maxsize, len(self._keys), self.policy)
+
 class KeyGenerator:
     """Generate key for encryption and decryption."""
 
+    # Keys created by every generator of the process, by (seed, base, length, offset)
+    cache = KeyCache()
+
+    # The xorshift transition matrix over GF(2) squared 0, 1, 2... times (see `jump`)
+    _jump_powers = []
+    _jump_lock = Lock()
+
+    @staticmethod
+    def configure_cache(maxsize: int=1024, policy: str="lru") -> KeyCache:
+        """Replaces the key cache shared by every generator.
+
+        Args:
+            maxsize: The maximum number of keys to keep. 0 disables the cache. Default is 1024.
+            policy: The eviction policy, "lru" or "fifo". Default is "lru".
+
+        Returns:
+            KeyCache: The new cache.
+        """
+        KeyGenerator.cache = KeyCache(maxsize, policy)
+        return KeyGenerator.cache
+
     @staticmethod
     def generate_seed() -> int:
         """Generate seed for key generation.
@@ -18,10 +97,16 @@ class KeyGenerator:
         """
         return GeneratorHelper.generate_seed()
     
-    def __init__(self, seed: int=None):
+    def __init__(self, seed: int=None, use_cache: bool=True):
+        """
+        Args:
+            seed: The seed for key generation. If None, a random one is generated.
+            use_cache: Whether to look keys up in (and add them to) `KeyGenerator.cache`. Default is True.
+        """
         if seed is None:
             seed = KeyGenerator.generate_seed()
         self.seed = seed
+        self.use_cache = use_cache
 
     def _xorshift_generator(self, initial_key: int, initial_shift: int) -> Any:
         """Generate xorshift function.
@@ -78,14 +163,225 @@ class KeyGenerator:
             return final_value & 0xFFFFFFFF
         return inner_function
 
-    def create_key(self, base: int, length: int = 12) -> List[int]:
+    @staticmethod
+    def _xorshift_step(state: int) -> int:
+        """Advance a generator state by one step.
+
+        Args:
+            state: The state, packed as `key | shift << 32` (unsigned, see `_xorshift_bytes`).
+
+        Returns:
+            int: The next state.
+        """
+        current_key, current_shift = state & 0xFFFFFFFF, state >> 32
+        result_value = (current_key ^ (current_key << 23)) & 0xFFFFFFFF
+        result_value ^= (result_value >> 17) ^ (-(result_value >> 31) & 0xFFFF8000)
+        result_value ^= current_shift ^ (current_shift >> 26) ^ (-(current_shift >> 31) & 0xFFFFFFC0)
+        return current_shift | result_value << 32
+
+    @staticmethod
+    def _apply_matrix(columns: List[int], state: int) -> int:
+        """Multiply a 64x64 GF(2) matrix, given by the image of every bit, by a packed state."""
+        result = 0
+        for column in columns:
+            if state & 1:
+                result ^= column
+            state >>= 1
+            if not state:
+                break
+        return result
+
+    @staticmethod
+    def _jump_power(power: int) -> List[int]:
+        """Returns the transition matrix advancing a state by `2 ** power` steps, computing it on first use."""
+        powers = KeyGenerator._jump_powers
+        if power >= len(powers):
+            with KeyGenerator._jump_lock:
+                if not powers:
+                    powers.append([KeyGenerator._xorshift_step(1 << bit) for bit in range(64)])
+                while power >= len(powers):
+                    columns = powers[-1]
+                    powers.append([KeyGenerator._apply_matrix(columns, column) for column in columns])
+        return powers[power]
+
+    @staticmethod
+    def jump(initial_key: int, initial_shift: int, n: int) -> Tuple[int, int]:
+        """Compute the state of a generator after `n` steps, without running them.
+
+        Every operation of the generator is linear over GF(2), so `n` steps are a single 64x64
+        bit matrix: it is built from the squares of the one step matrix, in O(log n) products.
+
+        Args:
+            initial_key: The initial key value for the generator (the base).
+            initial_shift: The initial shift value for the generator (the seed).
+            n: The number of steps to skip.
+
+        Returns:
+            Tuple[int, int]: The key and shift values after `n` steps, as unsigned 32-bit integers.
+
+        Raises:
+            ValueError: If `n` is negative.
+        """
+        if n < 0:
+            raise ValueError("Can't jump a negative number of steps")
+        state = (initial_key & 0xFFFFFFFF) | (initial_shift & 0xFFFFFFFF) << 32
+        power = 0
+        while n:
+            if n & 1:
+                state = KeyGenerator._apply_matrix(KeyGenerator._jump_power(power), state)
+            n >>= 1
+            power += 1
+        return state & 0xFFFFFFFF, state >> 32
+
+    @staticmethod
+    def _xorshift_bytes(initial_key: int, initial_shift: int, length: int) -> List[int]:
+        """Generate `length` key bytes, as `_xorshift_generator` does, using unsigned arithmetic.
+
+        The generator only ever keeps the low 32 bits of its values, so they can be held unsigned:
+        `<<`, `^` and `+` are the same on both representations once masked, and the arithmetic
+        right shift of a negative number only adds the sign bits it shifted in, i.e.
+        `-(x >> 31) & 0xFFFF8000` for `>> 17` and `-(x >> 31) & 0xFFFFFFC0` for `>> 26`.
+
+        Args:
+            initial_key: The initial key value for the generator
+            initial_shift: The initial shift value for the generator
+            length: The number of bytes to generate
+
+        Returns:
+            List[int]: The generated bytes.
+        """
+        key = []
+        if length <= 0:
+            return key
+        append = key.append
+        current_key, current_shift = initial_key & 0xFFFFFFFF, initial_shift & 0xFFFFFFFF
+        for _ in range(length):
+            result_value = (current_key ^ (current_key << 23)) & 0xFFFFFFFF
+            result_value ^= (result_value >> 17) ^ (-(result_value >> 31) & 0xFFFF8000)
+            result_value ^= current_shift ^ (current_shift >> 26) ^ (-(current_shift >> 31) & 0xFFFFFFC0)
+            append((current_shift + result_value) & 0xFF)
+            current_key, current_shift = current_shift, result_value
+        return key
+
+    @staticmethod
+    def _xorshift_batch(initial_keys: np.ndarray, initial_shifts: np.ndarray, length: int) -> np.ndarray:
+        """Run one generator per row, all at once.
+
+        Args:
+            initial_keys: The initial key value of every generator, as uint32.
+            initial_shifts: The initial shift value of every generator, as uint32 (same shape).
+            length: The number of bytes to generate per generator.
+
+        Returns:
+            np.ndarray: A uint8 array of shape (generators, length).
+        """
+        current_key, current_shift = initial_keys.copy(), initial_shifts.copy()
+        keys = np.empty((max(length, 0), current_key.size), dtype=np.uint8)
+        for i in range(keys.shape[0]):
+            # uint32 wraps like the masks of the scalar version; the int32 views give the arithmetic shifts
+            result_value = current_key ^ (current_key << np.uint32(23))
+            result_value ^= (result_value.view(np.int32) >> 17).view(np.uint32)
+            result_value ^= current_shift ^ (current_shift.view(np.int32) >> 26).view(np.uint32)
+            keys[i] = current_shift + result_value
+            current_key, current_shift = current_shift, result_value
+        return np.ascontiguousarray(keys.T)
+
+    @staticmethod
+    def _uint32_array(values: Iterable[int]) -> np.ndarray:
+        """Converts integers of any size or sign to their low 32 bits."""
+        return np.array([value & 0xFFFFFFFF for value in values], dtype=np.uint32)
+
+    def create_keys(self, bases: Iterable[int], length: int = 12) -> np.ndarray:
+        """Create the keys of many bases at once, e.g. one per record.
+
+        Args:
+            bases: The bases of the keys.
+            length: The length of the keys. Default is 12.
+
+        Returns:
+            np.ndarray: A uint8 array of shape (len(bases), length), whose row `i` is `create_key(bases[i], length)`.
+
+        Raises:
+            InvalidSeedInputException: If the keys can't be generated from the seed and bases.
+        """
         try:
-            xorshift = self._xorshift_generator(base, self.seed)
-            return [xorshift() & 0xFF for _ in range(length)]
+            initial_keys = KeyGenerator._uint32_array(bases)
+            initial_shifts = np.full(initial_keys.shape, self.seed & 0xFFFFFFFF, dtype=np.uint32)
+            return KeyGenerator._xorshift_batch(initial_keys, initial_shifts, length)
         except Exception:
             raise InvalidSeedInputException("Invalid seed input")
+
+    @staticmethod
+    def create_keys_for_seeds(seeds: Iterable[int], base: int, length: int = 12) -> np.ndarray:
+        """Create the keys of many seeds at once, for the same base.
+
+        Args:
+            seeds: The seeds of the keys.
+            base: The base of the keys.
+            length: The length of the keys. Default is 12.
+
+        Returns:
+            np.ndarray: A uint8 array of shape (len(seeds), length), whose row `i` is
+                `KeyGenerator(seeds[i]).create_key(base, length)`.
+
+        Raises:
+            InvalidSeedInputException: If the keys can't be generated from the seeds and base.
+        """
+        try:
+            initial_shifts = KeyGenerator._uint32_array(seeds)
+            initial_keys = np.full(initial_shifts.shape, base & 0xFFFFFFFF, dtype=np.uint32)
+            return KeyGenerator._xorshift_batch(initial_keys, initial_shifts, length)
+        except Exception:
+            raise InvalidSeedInputException("Invalid seed input")
+
+    def create_key(self, base: int, length: int = 12, offset: int = 0) -> List[int]:
+        """Create a key, or return it from the cache if it was already created.
+
+        Args:
+            base: The base of the key.
+            length: The length of the key. Default is 12.
+            offset: The position of the key in the generated stream: the key is
+                `create_key(base, offset + length)[offset:]`, without generating the first
+                `offset` bytes (see `jump`). Default is 0.
+
+        Returns:
+            List[int]: The key.
+
+        Raises:
+            InvalidSeedInputException: If the key can't be generated from the seed and base.
+        """
+        cache = KeyGenerator.cache if self.use_cache else None
+        cache_key = (self.seed, base, length, offset)
+        if cache is not None and not all(type(value) is int for value in cache_key):
+            cache = None
+        if cache is not None:
+            key = cache.get(cache_key)
+            if key is not None:
+                return list(key)
+        try:
+            if offset:
+                key = KeyGenerator._xorshift_bytes(*KeyGenerator.jump(base, self.seed, offset), length)
+            else:
+                key = KeyGenerator._xorshift_bytes(base, self.seed, length)
+        except Exception:
+            raise InvalidSeedInputException("Invalid seed input")
+        if cache is not None:
+            cache.put(cache_key, tuple(key))
+        return key
 if __name__ == '__main__':
     expected = [14, 236, 95, 36, 157, 37, 161, 162, 255, 38, 205, 36]
     keygen = KeyGenerator(123123123)
     key = keygen.create_key(9797987, 12)
     print(key == expected)
+
+    # The unsigned and batched generators against the signed reference
+    for _ in range(1000):
+        seed, base = randint(-2**40, 2**40), randint(-2**40, 2**40)
+        xorshift = keygen._xorshift_generator(base, seed)
+        reference = [xorshift() & 0xFF for _ in range(64)]
+        assert KeyGenerator._xorshift_bytes(base, seed, 64) == reference
+        assert KeyGenerator(seed).create_keys([base], 64)[0].tolist() == reference
+        assert KeyGenerator.create_keys_for_seeds([seed], base, 64)[0].tolist() == reference
+        offset = randint(0, 48)
+        assert KeyGenerator(seed, False).create_key(base, 16, offset) == reference[offset:offset + 16]
+    print(True)
@@ -0,0 +1,145 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+class KeySchedule:
+    """The slice of a key used by a step, with its cyclic expansion and derived values cached."""
+
+    # Longest expansion kept in memory; longer messages get a fresh expansion on every call
+    MAX_CACHED_LENGTH = 1 << 20
+
+    def __init__(self, key: List[int], start: int, end: int):
+        """
+        Args:
+            key: The key to take the slice from.
+            start: The index of the key to start the slice at.
+            end: The index of the key to end the slice at.
+        """
+        self.start, self.end = start, end
+        self.key_slice = key[start:end]
+        self._cache: Dict[str, Tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self.key_slice)
+
+    def _expand(self, name: str, length: int, build) -> Tuple:
+        """Returns a cached expansion at least `length` long, building (and caching) a longer one if needed."""
+        cached = self._cache.get(name)
+        if cached is not None and len(cached) >= length:
+            return cached
+        if length and not self.key_slice:
+            raise ZeroDivisionError("integer modulo by zero")
+        if length > self.MAX_CACHED_LENGTH:
+            return build(length)
+        size = max(length, 2 * len(cached) if cached is not None else 0, len(self.key_slice))
+        expanded = build(min(size, self.MAX_CACHED_LENGTH))
+        self._cache[name] = expanded
+        return expanded
+
+    def _cycled_list(self, length: int) -> List[int]:
+        return (self.key_slice * (length // len(self.key_slice) + 1))[:length] if length else []
+
+    def _phase(self, offset: int) -> int:
+        return offset % len(self.key_slice) if offset and self.key_slice else 0
+
+    def cycle(self, length: int, offset: int=0) -> List[int]:
+        """
+        Repeats the key slice cyclically, like `key_slice[i % len(key_slice)]` for every `i`.
+
+        Args:
+            length: The number of values to return.
+            offset: The position of the first value, e.g. of a chunk of a message. Default is 0.
+
+        Returns:
+            `length` values of the cyclic key slice, from `offset`.
+        """
+        phase = self._phase(offset)
+        return self._expand("cycle", phase + length, self._cycled_list)[phase:phase + length]
+
+    def masked(self, length: int, offset: int=0) -> List[int]:
+        """
+        Repeats the key slice cyclically with every value ANDed with 127, as used by `xor_add`/`xor_unadd`.
+
+        Args:
+            length: The number of values to return.
+            offset: The position of the first value. Default is 0.
+
+        Returns:
+            `length` masked values of the cyclic key slice, from `offset`.
+        """
+        phase = self._phase(offset)
+        return self._expand("masked", phase + length, lambda n: [k & 127 for k in self._cycled_list(n)])[phase:phase + length]
+
+    def cycle_array(self, length: int, offset: int=0) -> np.ndarray:
+        """
+        Same as `cycle` as a read-only uint8 array, for the NumPy backend.
+
+        Args:
+            length: The number of values to return.
+            offset: The position of the first value. Default is 0.
+
+        Returns:
+            `length` values of the cyclic key slice, from `offset`.
+
+        Raises:
+            ValueError: If a key value is not a byte.
+        """
+        def build(n):
+            values = np.array(self.key_slice, dtype=np.int64)
+            if values.size and (values.min() < 0 or values.max() > 255):
+                raise ValueError("Key values must be in the range 0-255")
+            return _read_only(np.resize(values.astype(np.uint8), n))
+        phase = self._phase(offset)
+        return self._expand("cycle_array", phase + length, build)[phase:phase + length]
+
+    def masked_array(self, length: int, offset: int=0) -> np.ndarray:
+        """
+        Same as `masked` as a read-only uint8 array, for the NumPy backend.
+
+        Args:
+            length: The number of values to return.
+            offset: The position of the first value. Default is 0.
+
+        Returns:
+            `length` masked values of the cyclic key slice, from `offset`.
+        """
+        build = lambda n: _read_only((np.resize(np.array(self.key_slice, dtype=np.int64), n) & 127).astype(np.uint8))
+        phase = self._phase(offset)
+        return self._expand("masked_array", phase + length, build)[phase:phase + length]
+
+    def cycle_bytes(self, length: int, offset: int=0) -> memoryview:
+        """
+        Same as `cycle` as a view of bytes, for the bytes backend.
+
+        Args:
+            length: The number of values to return.
+            offset: The position of the first value. Default is 0.
+
+        Returns:
+            `length` values of the cyclic key slice, from `offset`.
+
+        Raises:
+            ValueError: If a key value is not a byte.
+        """
+        build = lambda n: bytes(self.key_slice) * (n // len(self.key_slice) + 1) if n else b""
+        phase = self._phase(offset)
+        return memoryview(self._expand("cycle_bytes", phase + length, build))[phase:phase + length]
+
+    def masked_bytes(self, length: int, offset: int=0) -> memoryview:
+        """
+        Same as `masked` as a view of bytes, for the bytes backend.
+
+        Args:
+            length: The number of values to return.
+            offset: The position of the first value. Default is 0.
+
+        Returns:
+            `length` masked values of the cyclic key slice, from `offset`.
+        """
+        build = lambda n: bytes(k & 127 for k in self.key_slice) * (n // len(self.key_slice) + 1) if n else b""
+        phase = self._phase(offset)
+        return memoryview(self._expand("masked_bytes", phase + length, build))[phase:phase + length]
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
@@ -1,66 +1,189 @@
-from typing import Any, Dict, Tuple
+from hashlib import sha1
+from typing import Any, Dict, List, Tuple
 
-from .utils import OPPOSITE_ENCRYPTION_FUNCTIONS
+from .steps import STEPS
 from .exceptions import InvalidModelException
 
-class DecryptionModel:
+_SCALARS = frozenset((int, float, bool, str, type(None)))
+
+def _freeze(value: Any) -> Any:
+    """Returns a hashable copy of a step parameter value paired with its type, so that values comparing
+    equal across types (1, 1.0 and True) stay distinct, with its dictionaries as sorted tuples of items."""
+    kind = type(value)
+    if kind in _SCALARS:
+        return kind, value
+    if isinstance(value, dict):
+        return dict, tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return kind, tuple(_freeze(item) for item in value)
+    return kind, value
+
+class _Model:
+    """The immutable content shared by `EncryptionModel` and `DecryptionModel`.
+
+    The steps are copied when the model is created and every access returns a new copy, so the model
+    can't change: it has a content fingerprint, is hashable and can be used as a cache key.
+    """
+
+    __slots__ = ("base", "lenght", "codec", "_steps", "_key", "_hash", "_fingerprint", "_inverse")
+
+    def __init__(self, base: int, lenght: int, steps: List[Dict[str, Any]], codec: str):
+        try:
+            # The keys of the parameters are unique, so sorting them never compares their values
+            copied = tuple((name, tuple(sorted(params.items()))) for name, params in (next(iter(step.items())) for step in steps))
+            frozen = tuple((name, tuple([(param, _freeze(value)) for param, value in params])) for name, params in copied)
+            key = (_freeze(base), _freeze(lenght), frozen, codec)
+            hashed = hash((type(self),) + key)
+        except Exception as e:
+            raise InvalidModelException(f"Invalid model: {e}")
+        assign = object.__setattr__
+        assign(self, "base", base)
+        assign(self, "lenght", lenght)
+        assign(self, "codec", codec)
+        assign(self, "_steps", copied)
+        assign(self, "_key", key)
+        assign(self, "_hash", hashed)
+        assign(self, "_fingerprint", None)
+        assign(self, "_inverse", None)
+
+    def _copy_steps(self) -> List[Dict[str, Dict]]:
+        return [{name: dict(params)} for name, params in self._steps]
+
+    def _inverse_steps(self) -> List[Dict[str, Dict]]:
+        """Returns the steps reversing the model's steps, in the same order (see `steps.StepDefinition.inverse`)."""
+        return [{STEPS[name].inverse: dict(params)} for name, params in self._steps if name in STEPS]
+
+    def _memoized_inverse(self, build) -> "_Model":
+        inverse = self._inverse
+        if inverse is None:
+            try: inverse = build(self.base, self.lenght, self._inverse_steps(), self.codec)
+            except Exception as e: raise InvalidModelException(f"Invalid model: {e}")
+            object.__setattr__(inverse, "_inverse", self)
+            object.__setattr__(self, "_inverse", inverse)
+        return inverse
+
+    @property
+    def fingerprint(self) -> str:
+        """The SHA-1 of the model's content, the same in every process as long as its step parameters
+        are plain values or `KeyRelative` (functions and lambdas are identified by their address)."""
+        if self._fingerprint is None:
+            content = repr((type(self).__name__,) + self._key)
+            object.__setattr__(self, "_fingerprint", sha1(content.encode()).hexdigest())
+        return self._fingerprint
+
+    def __call__(self) -> Tuple:
+        return self.base, self.lenght, self._copy_steps()
+
+    def __eq__(self, other: Any) -> bool:
+        if self is other:
+            return True
+        return type(other) is type(self) and self._hash == other._hash and self._key == other._key
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self) -> Tuple:
+        return type(self), (self.base, self.lenght, self._copy_steps(), self.codec)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.base!r}, {self.lenght!r}, {self._copy_steps()!r}, codec={self.codec!r})"
+
+class DecryptionModel(_Model):
     """A model for decryption and encryption steps."""
 
+    __slots__ = ()
+
     @staticmethod
     def from_encryption_model(model: Any) -> "DecryptionModel":
         """Creates a decryption model from an encryption model.
 
+        The decryption model of an `EncryptionModel` is only built once, and keeps it as its own inverse.
+
         Args:
             model: The encryption model to use.
 
         Returns:
             DecryptionModel: The decryption model.
         """
+        if isinstance(model, EncryptionModel):
+            return model._memoized_inverse(DecryptionModel)
         try:
             new_steps = []
             for d in model.encrypt_steps:
                 key, value = next(iter(d.items()))
-                if not key in list(OPPOSITE_ENCRYPTION_FUNCTIONS): continue
-                new_steps.append({OPPOSITE_ENCRYPTION_FUNCTIONS[key].__name__: value})
-            return DecryptionModel(model.base, model.lenght, new_steps)
+                if not key in STEPS: continue
+                new_steps.append({STEPS[key].inverse: value})
+            return DecryptionModel(model.base, model.lenght, new_steps, getattr(model, "codec", "json"))
         except Exception as e:
             raise InvalidModelException(f"Invalid model: {e}")
 
-    def __init__(self, base: int, lenght: int, decrypt_steps: Dict[str, Any]):
-        self.base = base
-        self.lenght = lenght
-        self.decrypt_steps = decrypt_steps
-    
-    def __call__(self) -> Tuple:
-        return self.base, self.lenght, self.decrypt_steps
+    def __init__(self, base: int, lenght: int, decrypt_steps: List[Dict[str, Any]], codec: str="json"):
+        """
+        Args:
+            base: The base for key generation.
+            lenght: The length of the key.
+            decrypt_steps: The decryption steps. They are copied: changing them afterwards doesn't change the model.
+            codec: The format of the messages before encryption, one of `CODECS`. Default is "json".
+
+        Raises:
+            InvalidModelException: If the steps aren't a list of `{name: parameters}` dictionaries.
+        """
+        super().__init__(base, lenght, decrypt_steps, codec)
+
+    @property
+    def decrypt_steps(self) -> List[Dict[str, Dict]]:
+        """A copy of the decryption steps."""
+        return self._copy_steps()
 
-class EncryptionModel:
+class EncryptionModel(_Model):
     """A model for encryption and decryption steps."""
 
+    __slots__ = ()
+
     @staticmethod
     def from_decryption_model(model: Any) -> "EncryptionModel":
         """Creates an encryption model from a decryption model.
 
+        The encryption model of a `DecryptionModel` is only built once, and keeps it as its own inverse.
+
         Args:
             model: The decryption model to use.
 
         Returns:
             EncryptionModel: The encryption model.
         """
+        if isinstance(model, DecryptionModel):
+            return model._memoized_inverse(EncryptionModel)
         try:
             new_steps = []
-            for d in model.encrypt_steps:
+            for d in model.decrypt_steps:
                 key, value = next(iter(d.items()))
-                if not key in list(OPPOSITE_ENCRYPTION_FUNCTIONS): continue
-                new_steps.append({OPPOSITE_ENCRYPTION_FUNCTIONS[key].__name__: value})
-            return EncryptionModel(model.base, model.lenght, new_steps)
+                if not key in STEPS: continue
+                new_steps.append({STEPS[key].inverse: value})
+            return EncryptionModel(model.base, model.lenght, new_steps, getattr(model, "codec", "json"))
         except Exception as e:
             raise InvalidModelException(f"Invalid model: {e}")
 
-    def __init__(self, base: int, lenght: int, encrypt_steps: Dict[str, Any]):
-        self.base = base
-        self.lenght = lenght
-        self.encrypt_steps = encrypt_steps
-    
-    def __call__(self) -> Tuple:
-        return self.base, self.lenght, self.encrypt_steps
+    def __init__(self, base: int, lenght: int, encrypt_steps: List[Dict[str, Any]], codec: str="json"):
+        """
+        Args:
+            base: The base for key generation.
+            lenght: The length of the key.
+            encrypt_steps: The encryption steps. They are copied: changing them afterwards doesn't change the model.
+            codec: The format of the messages before encryption, one of `CODECS`. Default is "json".
+
+        Raises:
+            InvalidModelException: If the steps aren't a list of `{name: parameters}` dictionaries.
+        """
+        super().__init__(base, lenght, encrypt_steps, codec)
+
+    @property
+    def encrypt_steps(self) -> List[Dict[str, Dict]]:
+        """A copy of the encryption steps."""
+        return self._copy_steps()
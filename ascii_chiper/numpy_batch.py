@@ -0,0 +1,243 @@
+from typing import Any, List, Sequence, Tuple
+
+import numpy as np
+
+from .numpy_utils import _key_bytes, _base_byte, _key_cycle, _key_masked
+from .steps import STEPS
+from . import numpy_utils
+
+# Ragged versions of the steps in `numpy_utils.py`, running on many messages at once.
+# A batch is a uint8 matrix holding one message per row, left-aligned and padded to the longest one,
+# with the vector of the row lengths: the values past the length of a row are padding, never read back.
+# Every step takes and returns a (matrix, lengths) pair, and gives each row the same bytes as its
+# `numpy_utils.py` counterpart would give the message alone.
+
+Batch = Tuple[np.ndarray, np.ndarray]
+
+# The number of rows processed at once, after sorting the messages by length (see `blocks`)
+BLOCK_ROWS = 2048
+
+def pack(messages: Sequence[bytes]) -> Batch:
+    """
+    Packs messages into a batch.
+
+    Args:
+        messages: The messages, as bytes.
+
+    Returns:
+        Batch: The padded matrix and the length of every row.
+    """
+    lengths = np.fromiter(map(len, messages), dtype=np.intp, count=len(messages))
+    matrix = np.zeros((len(messages), int(lengths.max(initial=0))), dtype=np.uint8)
+    if matrix.size:
+        rows = np.repeat(np.arange(len(messages)), lengths)
+        starts = np.cumsum(lengths) - lengths
+        columns = np.arange(len(rows)) - np.repeat(starts, lengths)
+        matrix[rows, columns] = np.frombuffer(b"".join(messages), dtype=np.uint8)
+    return matrix, lengths
+
+def unpack(matrix: np.ndarray, lengths: np.ndarray) -> List[bytes]:
+    """
+    Unpacks a batch into its messages.
+
+    Args:
+        matrix: The padded matrix.
+        lengths: The length of every row.
+
+    Returns:
+        List[bytes]: The messages.
+    """
+    width, data = matrix.shape[1], np.ascontiguousarray(matrix).tobytes()
+    return [data[row * width:row * width + length] for row, length in enumerate(lengths.tolist())]
+
+def blocks(lengths: Sequence[int], size: int=BLOCK_ROWS) -> List[np.ndarray]:
+    """
+    Splits the messages into blocks of similar lengths, to keep the padding small.
+
+    Args:
+        lengths: The length of every message.
+        size: The maximum number of messages per block. Default is `BLOCK_ROWS`.
+
+    Returns:
+        List[np.ndarray]: The indices of the messages of every block.
+    """
+    order = np.argsort(np.asarray(lengths, dtype=np.intp), kind="stable")
+    return [order[i:i + size] for i in range(0, len(order), size)]
+
+def run(steps: List[Any], matrix: np.ndarray, lengths: np.ndarray) -> Batch:
+    """
+    Runs bound steps (see `pipeline.bind_steps`) on a batch.
+
+    Args:
+        steps: The bound steps, in execution order.
+        matrix: The padded matrix.
+        lengths: The length of every row.
+
+    Returns:
+        Batch: The transformed matrix and lengths.
+    """
+    for step in steps:
+        matrix, lengths = KERNELS[step.name](matrix, lengths, *step.args)
+    return matrix, lengths
+
+def supports(steps: List[Any]) -> bool:
+    """
+    Checks whether every bound step has a batch kernel in `KERNELS`.
+
+    Registered steps (see `steps.register_step`) and steps compiled for other backends have none:
+    the messages must then be run one by one.
+
+    Args:
+        steps: The bound steps.
+
+    Returns:
+        bool: Whether `run` can run the steps.
+    """
+    return all(step.name in KERNELS and (step.name not in STEPS or STEPS[step.name].builtin) for step in steps)
+
+def _positions(matrix: np.ndarray) -> np.ndarray:
+    """Returns the column indices of the matrix, as a row vector."""
+    return np.arange(matrix.shape[1], dtype=np.intp)[None, :]
+
+def xor_shift(matrix: np.ndarray, lengths: np.ndarray, key: List[int], n: int=0) -> Batch:
+    """Applies `numpy_utils.xor_shift` to every row."""
+    return numpy_utils.xor_shift(matrix, key, n), lengths
+
+def xor_unshift(matrix: np.ndarray, lengths: np.ndarray, key: List[int], n: int=0) -> Batch:
+    """Applies `numpy_utils.xor_unshift` to every row."""
+    return numpy_utils.xor_unshift(matrix, key, n), lengths
+
+def rotate(matrix: np.ndarray, lengths: np.ndarray, key: List[int], n: int) -> Batch:
+    """Applies `numpy_utils.rotate` to every row."""
+    return numpy_utils.rotate(matrix, key, n), lengths
+
+def unrotate(matrix: np.ndarray, lengths: np.ndarray, key: List[int], n: int) -> Batch:
+    """Applies `numpy_utils.unrotate` to every row."""
+    return numpy_utils.unrotate(matrix, key, n), lengths
+
+def translate(matrix: np.ndarray, lengths: np.ndarray, table: bytes) -> Batch:
+    """Maps every byte through a translation table."""
+    return numpy_utils.translate(matrix, table), lengths
+
+def swap(matrix: np.ndarray, lengths: np.ndarray) -> Batch:
+    """
+    Swaps every two adjacent elements of every row.
+
+    The last value of an odd-length row has no pair and stays in place.
+    """
+    width = matrix.shape[1]
+    even = width - width % 2
+    swapped = matrix.copy()
+    swapped[:, 0:even:2], swapped[:, 1:even:2] = matrix[:, 1:even:2], matrix[:, 0:even:2]
+    rows = np.flatnonzero(lengths % 2)
+    last = lengths[rows] - 1
+    swapped[rows, last] = matrix[rows, last]
+    return swapped, lengths
+
+def swap_back(matrix: np.ndarray, lengths: np.ndarray) -> Batch:
+    """Swaps every two adjacent elements of every row back to the original order."""
+    return swap(matrix, lengths)
+
+def reverse(matrix: np.ndarray, lengths: np.ndarray) -> Batch:
+    """Reverses every row."""
+    indices = np.maximum(lengths[:, None] - 1 - _positions(matrix), 0)
+    return np.take_along_axis(matrix, indices, axis=1), lengths
+
+def _shift_amounts(lengths: np.ndarray, key: List[int], n: int) -> np.ndarray:
+    """Returns `key[n] % length` for every row, failing like `utils.circular_shift` on empty rows."""
+    if not lengths.all():
+        raise ZeroDivisionError("integer modulo by zero")
+    return (key[n] % lengths)[:, None]
+
+def circular_shift(matrix: np.ndarray, lengths: np.ndarray, key: List[int], n: int) -> Batch:
+    """Moves the elements of every row forward by key[n] positions, circularly."""
+    indices = (_positions(matrix) + _shift_amounts(lengths, key, n)) % np.maximum(lengths, 1)[:, None]
+    return np.take_along_axis(matrix, indices, axis=1), lengths
+
+def unshift(matrix: np.ndarray, lengths: np.ndarray, key: List[int], n: int) -> Batch:
+    """Moves the elements of every row backward by key[n] positions, circularly."""
+    lengths_column = np.maximum(lengths, 1)[:, None]
+    indices = (_positions(matrix) - _shift_amounts(lengths, key, n) + lengths_column) % lengths_column
+    return np.take_along_axis(matrix, indices, axis=1), lengths
+
+def xor_base(matrix: np.ndarray, lengths: np.ndarray, key: List[int], base: int, start_idx: int, end_idx: int, schedule: Any=None) -> Batch:
+    """Applies the `xor_base` chain to every row, as a row-wise cumulative XOR scan."""
+    if not matrix.shape[1]:
+        return matrix.copy(), lengths
+    scan = np.bitwise_xor.accumulate(matrix ^ _key_cycle(key, start_idx, end_idx, matrix.shape[1], schedule), axis=1)
+    return scan ^ _base_byte(base), lengths
+
+def unxor_base(matrix: np.ndarray, lengths: np.ndarray, key: List[int], base: int, start_idx: int, end_idx: int, schedule: Any=None) -> Batch:
+    """Reverses the `xor_base` chain of every row."""
+    if not matrix.shape[1]:
+        return matrix.copy(), lengths
+    previous = np.empty_like(matrix)
+    previous[:, 0], previous[:, 1:] = _base_byte(base), matrix[:, :-1]
+    return matrix ^ _key_cycle(key, start_idx, end_idx, matrix.shape[1], schedule) ^ previous, lengths
+
+def xor_add(matrix: np.ndarray, lengths: np.ndarray, key: List[int], start_idx: int, end_idx: int, schedule: Any=None) -> Batch:
+    """Adds the key values to every row, then XORs it with 128."""
+    return (matrix + _key_masked(key, start_idx, end_idx, matrix.shape[1], schedule)) ^ 128, lengths
+
+def xor_unadd(matrix: np.ndarray, lengths: np.ndarray, key: List[int], start_idx: int, end_idx: int, schedule: Any=None) -> Batch:
+    """Reverses `xor_add` on every row."""
+    return (matrix ^ 128) - _key_masked(key, start_idx, end_idx, matrix.shape[1], schedule), lengths
+
+def interleave(matrix: np.ndarray, lengths: np.ndarray, key: List[int], start: int, end: int, cyclic: bool=False, schedule: Any=None) -> Batch:
+    """Interleaves every row with the key slice, truncating the rows longer than it unless `cyclic` is set."""
+    if cyclic:
+        return interleave_key(matrix, lengths, key, start, end, schedule)
+    key_slice = _key_bytes(key[start:end])
+    width = min(matrix.shape[1], len(key_slice))
+    interleaved = np.empty((matrix.shape[0], 2 * width), dtype=np.uint8)
+    interleaved[:, 0::2], interleaved[:, 1::2] = matrix[:, :width], key_slice[:width]
+    return interleaved, 2 * np.minimum(lengths, len(key_slice))
+
+def interleave_key(matrix: np.ndarray, lengths: np.ndarray, key: List[int], start_idx: int, end_idx: int, schedule: Any=None) -> Batch:
+    """Interleaves every row with the key slice, repeated as many times as needed."""
+    interleaved = np.empty((matrix.shape[0], 2 * matrix.shape[1]), dtype=np.uint8)
+    interleaved[:, 0::2], interleaved[:, 1::2] = matrix, _key_cycle(key, start_idx, end_idx, matrix.shape[1], schedule)
+    return interleaved, 2 * lengths
+
+def deinterleave(matrix: np.ndarray, lengths: np.ndarray, key: List[int]) -> Batch:
+    """Keeps every other value of every row."""
+    return matrix[:, ::2], (lengths + 1) // 2
+
+def deinterleave_key(matrix: np.ndarray, lengths: np.ndarray, key: List[int], start_idx: int, end_idx: int) -> Batch:
+    """Keeps every other value of every row, dropping the key values."""
+    return deinterleave(matrix, lengths, key)
+
+def gather(matrix: np.ndarray, lengths: np.ndarray, permutation: Any) -> Batch:
+    """Reorders every row with the gather indices of its length (see `optimizer.Permutation`)."""
+    indices_by_length = {}
+    for length in np.unique(lengths).tolist():
+        indices = permutation.array(length)
+        indices_by_length[length] = np.arange(length, dtype=np.intp) if indices is None else indices
+    new_lengths = np.fromiter((len(indices_by_length[length]) for length in lengths.tolist()), dtype=np.intp, count=len(lengths))
+    indices = np.zeros((len(lengths), int(new_lengths.max(initial=0))), dtype=np.intp)
+    for length, row_indices in indices_by_length.items():
+        indices[lengths == length, :len(row_indices)] = row_indices
+    return np.take_along_axis(matrix, indices, axis=1), new_lengths
+
+# Step name -> batch kernel, for the built-in steps and the steps of the optimizer (`translate`, `gather`)
+KERNELS = {
+    "xor_shift": xor_shift,
+    "xor_unshift": xor_unshift,
+    "rotate": rotate,
+    "unrotate": unrotate,
+    "translate": translate,
+    "swap": swap,
+    "swap_back": swap_back,
+    "reverse": reverse,
+    "circular_shift": circular_shift,
+    "unshift": unshift,
+    "xor_base": xor_base,
+    "unxor_base": unxor_base,
+    "xor_add": xor_add,
+    "xor_unadd": xor_unadd,
+    "interleave": interleave,
+    "interleave_key": interleave_key,
+    "deinterleave": deinterleave,
+    "deinterleave_key": deinterleave_key,
+    "gather": gather,
+}
@@ -0,0 +1,419 @@
+from typing import Any, List, Sequence
+from base64 import b64encode, b64decode
+
+import numpy as np
+
+# Vectorized versions of the steps in `utils.py`, working on `numpy.uint8` arrays instead of lists of ints.
+# Every function produces the same bytes as its `utils.py` counterpart; key values and bases mixed into the
+# output (`interleave`, `interleave_key`, `xor_base`) must be bytes, as the ones created by `KeyGenerator` are.
+
+def _key_bytes(key_slice: Sequence[int]) -> np.ndarray:
+    """Converts key values that end up in the output to a uint8 array, rejecting non-byte values."""
+    values = np.array(key_slice, dtype=np.int64)
+    if values.size and (values.min() < 0 or values.max() > 255):
+        raise ValueError("Key values must be in the range 0-255")
+    return values.astype(np.uint8)
+
+def _base_byte(base: int) -> np.uint8:
+    """Converts the base of `xor_base`/`unxor_base` to a uint8, rejecting non-byte values."""
+    if not 0 <= base <= 255:
+        raise ValueError("Base must be in the range 0-255")
+    return np.uint8(base)
+
+def _cycle(values: np.ndarray, length: int) -> np.ndarray:
+    """Repeats `values` cyclically up to `length` items, like `values[i % len(values)]`."""
+    if length and not len(values):
+        raise ZeroDivisionError("integer modulo by zero")
+    return np.resize(values, length)
+
+def _key_cycle(key: List[int], start_idx: int, end_idx: int, length: int, schedule: Any=None) -> np.ndarray:
+    """Returns `length` byte values of the key slice repeated cyclically, from the schedule if there is one."""
+    if schedule is not None:
+        return schedule.cycle_array(length)
+    return _cycle(_key_bytes(key[start_idx:end_idx]), length)
+
+def _key_masked(key: List[int], start_idx: int, end_idx: int, length: int, schedule: Any=None) -> np.ndarray:
+    """Returns `length` values of the key slice repeated cyclically and ANDed with 127, from the schedule if there is one."""
+    if schedule is not None:
+        return schedule.masked_array(length)
+    return (_cycle(np.array(key[start_idx:end_idx], dtype=np.int64), length) & 127).astype(np.uint8)
+
+def string_to_ascii(string: str, static_num: int = 0) -> np.ndarray:
+    """
+    Convert a string to an array of ASCII values using a static number.
+
+    Args:
+        string: The string to convert to ASCII values. Every character must be in the range 0-255.
+        static_num: A static number to XOR each ASCII value with. Default is 0.
+
+    Returns:
+        A uint8 array of ASCII values.
+    """
+    ascii_array = np.frombuffer(bytearray(string.encode("latin-1")), dtype=np.uint8)
+    if static_num:
+        ascii_array ^= static_num
+    return ascii_array
+
+def ascii_to_string(ascii_array: np.ndarray, static_num: int = 0) -> str:
+    """
+    Convert an array of ASCII values to a string using a static number.
+
+    Args:
+        ascii_array: The array of ASCII values to convert to a string.
+        static_num: A static number to XOR each ASCII value with. Default is 0.
+
+    Returns:
+        The resulting string.
+    """
+    if static_num:
+        ascii_array = ascii_array ^ static_num
+    return ascii_array.tobytes().decode("latin-1")
+
+def ascii_to_base64(ascii_array: np.ndarray) -> str:
+    """
+    Convert an array of ASCII values to a base64 string.
+
+    Args:
+        ascii_array: The array of ASCII values to convert to a base64 string.
+
+    Returns:
+        The resulting base64 string.
+    """
+    return b64encode(ascii_array.tobytes()).decode("utf-8")
+
+def base64_to_ascii(base64_string: str) -> np.ndarray:
+    """
+    Convert a base64 string to an array of ASCII values.
+
+    Args:
+        base64_string: The base64 string to convert to an array of ASCII values.
+
+    Returns:
+        A uint8 array of ASCII values.
+    """
+    return np.frombuffer(bytearray(b64decode(base64_string)), dtype=np.uint8)
+
+def to_list(ascii_array: np.ndarray) -> List[int]:
+    """
+    Convert an array of ASCII values to a list, for the kernels of registered steps (see `steps.register_step`).
+
+    Args:
+        ascii_array: The array of ASCII values.
+
+    Returns:
+        A list of ASCII values.
+    """
+    return ascii_array.tolist()
+
+def from_list(ascii_list: List[int]) -> np.ndarray:
+    """
+    Convert a list of ASCII values to an array.
+
+    Args:
+        ascii_list: The list of ASCII values. Every value must be in the range 0-255.
+
+    Returns:
+        A uint8 array of ASCII values.
+    """
+    return np.array(ascii_list, dtype=np.uint8)
+
+def swap(ascii_array: np.ndarray) -> np.ndarray:
+    """
+    Swaps every two adjacent elements in an array.
+
+    Args:
+        ascii_array: The array of ASCII values to swap.
+
+    Returns:
+        A new array with every two adjacent elements swapped.
+    """
+    even = len(ascii_array) - len(ascii_array) % 2
+    swapped = ascii_array.copy()
+    swapped[0:even:2], swapped[1:even:2] = ascii_array[1:even:2], ascii_array[0:even:2]
+    return swapped
+
+def swap_back(ascii_array: np.ndarray) -> np.ndarray:
+    """
+    Swaps every two adjacent elements in an array back to the original order.
+
+    Args:
+        ascii_array: The array of ASCII values to swap back.
+
+    Returns:
+        A new array with every two adjacent elements swapped back.
+    """
+    return swap(ascii_array)
+
+def xor_shift(ascii_array: np.ndarray, key: List[int], n: int=0) -> np.ndarray:
+    """
+    Performs a byte-level shift and XOR operation on an array of ASCII values.
+
+    Args:
+        ascii_array: The array of ASCII values to transform.
+        key: The list of integers to take the shift from.
+        n: The index of the key to use for the shift. Default is 0.
+
+    Returns:
+        A new array of transformed ASCII values.
+    """
+    shift = key[n] % 7 + 1
+    return (ascii_array << shift) | (ascii_array >> (8 - shift))
+
+def xor_unshift(ascii_array: np.ndarray, key: List[int], n: int=0) -> np.ndarray:
+    """
+    Performs the inverse of a byte-level shift and XOR operation on an array of ASCII values.
+
+    Args:
+        ascii_array: The array of ASCII values to transform back to the original order.
+        key: The list of integers to take the shift from.
+        n: The index of the key to use for the shift. Default is 0.
+
+    Returns:
+        A new array of ASCII values in the original order.
+    """
+    shift = key[n] % 7 + 1
+    return (ascii_array >> shift) | (ascii_array << (8 - shift))
+
+def interleave(ascii_array: np.ndarray, key: List[int], start: int, end: int, cyclic: bool=False, schedule: Any=None) -> np.ndarray:
+    """
+    Interleaves the ASCII values with the key slice, truncating to the shortest of the two.
+
+    Args:
+        ascii_array: The array of ASCII values to interleave.
+        key: The list of integers to interleave with `ascii_array`.
+        start: The index of the key to start using for interleaving.
+        end: The index of the key to stop using for interleaving.
+        cyclic: Whether to repeat the key slice over the whole array instead of truncating. Default is False.
+        schedule: The `KeySchedule` of the key slice, if already built. Default is None.
+
+    Returns:
+        A new array of interleaved ASCII values.
+    """
+    if cyclic:
+        return interleave_key(ascii_array, key, start, end, schedule)
+    key_slice = _key_bytes(key[start:end])
+    length = min(len(ascii_array), len(key_slice))
+    interleaved = np.empty(2 * length, dtype=np.uint8)
+    interleaved[0::2], interleaved[1::2] = ascii_array[:length], key_slice[:length]
+    return interleaved
+
+def deinterleave(interleaved_array: np.ndarray, key: List[int]) -> np.ndarray:
+    """
+    Reverses the interleaving of two arrays of ASCII values.
+
+    Args:
+        interleaved_array: The array of interleaved ASCII values to transform back to the original order.
+        key: The list of integers used to interleave the first array.
+
+    Returns:
+        A new array of ASCII values in the original order.
+    """
+    return interleaved_array[::2]
+
+def rotate(ascii_array: np.ndarray, key: List[int], n: int) -> np.ndarray:
+    """
+    Performs a circular left bit rotation on each byte in the array.
+
+    Args:
+        ascii_array: The array of ASCII values to rotate.
+        key: The list of integers to use as rotation offsets.
+        n: The index of the key to use for the rotation.
+
+    Returns:
+        A new array of rotated ASCII values.
+    """
+    shift = (key[n] % 7) + 1
+    return (ascii_array << shift) | (ascii_array >> (8 - shift))
+
+def unrotate(ascii_array: np.ndarray, key: List[int], n: int) -> np.ndarray:
+    """
+    Reverses the circular bit rotation on each byte in the array.
+
+    Args:
+        ascii_array: The array of rotated ASCII values to transform back.
+        key: The list of integers used as rotation offsets.
+        n: The index of the key used for the rotation.
+
+    Returns:
+        A new array of ASCII values with reversed bit rotation.
+    """
+    shift = (key[n] % 7) + 1
+    return (ascii_array >> shift) | (ascii_array << (8 - shift))
+
+def circular_shift(ascii_array: np.ndarray, key: List[int], n: int) -> np.ndarray:
+    """
+    Performs a circular array shift where each element is moved forward by key[n] positions.
+
+    Args:
+        ascii_array: The array of ASCII values to shift.
+        key: The list of integers to use as shift amounts.
+        n: The index of the key to use for the shift amount.
+
+    Returns:
+        A new array with elements shifted circularly.
+    """
+    shift_amount = key[n] % len(ascii_array)
+    return np.concatenate((ascii_array[shift_amount:], ascii_array[:shift_amount]))
+
+def unshift(ascii_array: np.ndarray, key: List[int], n: int) -> np.ndarray:
+    """
+    Reverses a circular array shift by moving elements backward.
+
+    Args:
+        ascii_array: The array of shifted ASCII values to unshift.
+        key: The list of integers used as shift amounts.
+        n: The index of the key used for the shift amount.
+
+    Returns:
+        A new array with elements unshifted to their original positions.
+    """
+    shift_amount = key[n] % len(ascii_array)
+    split = len(ascii_array) - shift_amount
+    return np.concatenate((ascii_array[split:], ascii_array[:split]))
+
+def xor_base(ascii_array: np.ndarray, key: List[int], base: int, start_idx: int, end_idx: int, schedule: Any=None) -> np.ndarray:
+    """
+    Applies a sequence of XOR operations on an array of ASCII values using a base value and a key.
+
+    The chain of outputs is computed as a cumulative XOR scan seeded with `base`.
+
+    Args:
+        ascii_array: The array of ASCII values to transform.
+        key: The list of integers to XOR with each value.
+        base: The initial value to XOR with the first element.
+        start_idx: The index of the key to start using for XOR operations.
+        end_idx: The index of the key to stop using for XOR operations.
+        schedule: The `KeySchedule` of the key slice, if already built. Default is None.
+
+    Returns:
+        A new array of transformed ASCII values.
+    """
+    if not len(ascii_array):
+        return ascii_array.copy()
+    scan = np.bitwise_xor.accumulate(ascii_array ^ _key_cycle(key, start_idx, end_idx, len(ascii_array), schedule))
+    return scan ^ _base_byte(base)
+
+def unxor_base(ascii_array: np.ndarray, key: List[int], base: int, start_idx: int, end_idx: int, schedule: Any=None) -> np.ndarray:
+    """
+    Reverses the sequence of XOR operations on an array of ASCII values using a base value and a key.
+
+    Args:
+        ascii_array: The array of transformed ASCII values to transform back to the original order.
+        key: The list of integers used to XOR with each value.
+        base: The initial value used to XOR with the first element.
+        start_idx: The index of the key to start using for XOR operations.
+        end_idx: The index of the key to stop using for XOR operations.
+        schedule: The `KeySchedule` of the key slice, if already built. Default is None.
+
+    Returns:
+        A new array of ASCII values in the original order.
+    """
+    if not len(ascii_array):
+        return ascii_array.copy()
+    previous = np.empty_like(ascii_array)
+    previous[0], previous[1:] = _base_byte(base), ascii_array[:-1]
+    return ascii_array ^ _key_cycle(key, start_idx, end_idx, len(ascii_array), schedule) ^ previous
+
+def xor_add(ascii_array: np.ndarray, key: List[int], start_idx: int, end_idx: int, schedule: Any=None) -> np.ndarray:
+    """
+    Applies a sequence of addition and XOR operations on an array of ASCII values using a key.
+
+    Args:
+        ascii_array: The array of ASCII values to transform.
+        key: The list of integers to use for addition and XOR operations.
+        start_idx: The index of the key to start using for operations.
+        end_idx: The index of the key to stop using for operations.
+        schedule: The `KeySchedule` of the key slice, if already built. Default is None.
+
+    Returns:
+        A new array of transformed ASCII values.
+    """
+    return (ascii_array + _key_masked(key, start_idx, end_idx, len(ascii_array), schedule)) ^ 128
+
+def xor_unadd(ascii_array: np.ndarray, key: List[int], start_idx: int, end_idx: int, schedule: Any=None) -> np.ndarray:
+    """
+    Reverses the sequence of addition and XOR operations on an array of ASCII values using a key.
+
+    Args:
+        ascii_array: The array of transformed ASCII values to transform back to the original order.
+        key: The list of integers used for addition and XOR operations.
+        start_idx: The index of the key to start using for operations.
+        end_idx: The index of the key to stop using for operations.
+        schedule: The `KeySchedule` of the key slice, if already built. Default is None.
+
+    Returns:
+        A new array of ASCII values in the original order.
+    """
+    return (ascii_array ^ 128) - _key_masked(key, start_idx, end_idx, len(ascii_array), schedule)
+
+def interleave_key(ascii_array: np.ndarray, key: List[int], start_idx: int, end_idx: int, schedule: Any=None) -> np.ndarray:
+    """
+    Interleaves an array of ASCII values with the key slice, repeated as many times as needed.
+
+    Args:
+        ascii_array: The array of ASCII values to interleave.
+        key: The list of integers to interleave with `ascii_array`.
+        start_idx: The index of the key to start using for interleaving.
+        end_idx: The index of the key to stop using for interleaving.
+        schedule: The `KeySchedule` of the key slice, if already built. Default is None.
+
+    Returns:
+        A new array of interleaved ASCII values and key values.
+    """
+    interleaved = np.empty(2 * len(ascii_array), dtype=np.uint8)
+    interleaved[0::2], interleaved[1::2] = ascii_array, _key_cycle(key, start_idx, end_idx, len(ascii_array), schedule)
+    return interleaved
+
+def deinterleave_key(ascii_array: np.ndarray, key: List[int], start_idx: int, end_idx: int) -> np.ndarray:
+    """
+    Deinterleaves an array of ASCII values and key values.
+
+    Args:
+        ascii_array: The array of interleaved ASCII values and key values to transform back to the original order.
+        key: The list of integers used to interleave with `ascii_array`.
+        start_idx: The index of the key to start using for deinterleaving.
+        end_idx: The index of the key to stop using for deinterleaving.
+
+    Returns:
+        A new array of ASCII values in the original order.
+    """
+    return ascii_array[::2]
+
+def reverse(ascii_array: np.ndarray) -> np.ndarray:
+    """
+    Reverses an array of ASCII values.
+
+    Args:
+        ascii_array: The array of ASCII values to reverse.
+
+    Returns:
+        A new array of ASCII values in the reverse order.
+    """
+    return ascii_array[::-1]
+
+def translate(ascii_array: np.ndarray, table: bytes) -> np.ndarray:
+    """
+    Maps every byte in an array through a translation table.
+
+    Args:
+        ascii_array: The array of byte values to translate.
+        table: A 256-byte table, `table[b]` being the new value of `b`.
+
+    Returns:
+        A new array of translated byte values.
+    """
+    return np.frombuffer(table, dtype=np.uint8)[ascii_array]
+
+def gather(ascii_array: np.ndarray, permutation: Any) -> np.ndarray:
+    """
+    Reorders an array of ASCII values with precomputed gather indices.
+
+    Args:
+        ascii_array: The array of ASCII values to reorder.
+        permutation: The `optimizer.Permutation` giving the source index of every output value.
+
+    Returns:
+        A new array of reordered ASCII values.
+    """
+    indices = permutation.array(len(ascii_array))
+    return ascii_array if indices is None else ascii_array[indices]
@@ -0,0 +1,211 @@
+from collections import OrderedDict
+from operator import itemgetter
+from threading import Lock
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+
+from .steps import BoundStep, STEPS, BYTE_MAP_STEPS, PERMUTATION_STEPS, INVERSE_PAIRS, POSITION_LOCAL, OPAQUE
+from . import utils, codegen
+
+class Permutation:
+    """The gather indices of a run of reordering steps, computed once per message length."""
+
+    def __init__(self, steps: List[BoundStep], maxsize: int=64):
+        """
+        Args:
+            steps: The bound reordering steps (`PERMUTATION_STEPS`), in execution order.
+            maxsize: The number of message lengths to keep the indices of. Default is 64.
+        """
+        self.steps = steps
+        self.kernels = [STEPS[step.name].kernel("python", utils) for step in steps]
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._lock = Lock()
+
+    def _cached(self, kind: str, length: int, build: Callable) -> Any:
+        with self._lock:
+            if (kind, length) in self._cache:
+                self._cache.move_to_end((kind, length))
+                return self._cache[(kind, length)]
+        value = build()
+        with self._lock:
+            self._cache[(kind, length)] = value
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return value
+
+    def _build_indices(self, length: int) -> Optional[List[int]]:
+        indices = list(range(length))
+        for step, kernel in zip(self.steps, self.kernels):
+            indices = kernel(indices, *step.args)
+        return None if indices == list(range(length)) else indices
+
+    def indices(self, length: int) -> Optional[List[int]]:
+        """
+        Returns the source index of every output value for a message length.
+
+        Args:
+            length: The length of the message.
+
+        Returns:
+            The indices, or None if the steps leave the message unchanged.
+        """
+        return self._cached("indices", length, lambda: self._build_indices(length))
+
+    def getter(self, length: int) -> Optional[Callable]:
+        """Returns an `operator.itemgetter` gathering the indices, or None if the steps leave the message unchanged."""
+        def build():
+            indices = self.indices(length)
+            if indices is None:
+                return None
+            if len(indices) == 1:
+                return lambda values: [values[indices[0]]]
+            return itemgetter(*indices) if indices else (lambda values: [])
+        return self._cached("getter", length, build)
+
+    def array(self, length: int) -> Optional[np.ndarray]:
+        """Returns the indices as a NumPy array, or None if the steps leave the message unchanged."""
+        def build():
+            indices = self.indices(length)
+            return None if indices is None else np.array(indices, dtype=np.intp)
+        return self._cached("array", length, build)
+
+def mixes_bytes(steps: List[BoundStep], key: List[int]) -> bool:
+    """
+    Checks whether the key values and `xor_base` bases mixed into the message are bytes.
+
+    The "bytes" and "numpy" backends hold every value as a byte, so they can only run such steps.
+
+    Args:
+        steps: The bound steps to check.
+        key: The key the steps use.
+
+    Returns:
+        True if every key value and base is in the range 0-255.
+    """
+    if not all(0 <= k <= 255 for k in key):
+        return False
+    return all(0 <= step.params['base'] <= 255 for step in steps if step.name in ('xor_base', 'unxor_base'))
+
+def carries_bytes(steps: List[BoundStep], key: List[int]) -> bool:
+    """
+    Checks whether every value flowing through the steps stays a byte.
+
+    Messages always start as bytes, so values can only leave the 0-255 range through
+    key values or an `xor_base` base that aren't bytes themselves, or through a registered
+    step that doesn't only map bytes or move them around (see `steps.register_step`).
+
+    Args:
+        steps: The bound steps to check.
+        key: The key the steps use.
+
+    Returns:
+        True if every intermediate value is a byte.
+    """
+    if any(not STEPS[step.name].builtin and STEPS[step.name].kind in (POSITION_LOCAL, OPAQUE) for step in steps if step.name in STEPS):
+        return False
+    return mixes_bytes(steps, key)
+
+def byte_table(steps: List[BoundStep]) -> bytes:
+    """
+    Composes position-independent byte maps into a single translation table.
+
+    Args:
+        steps: The bound byte map steps, in execution order.
+
+    Returns:
+        A 256-byte table mapping every byte value to its value after all the steps.
+    """
+    table = list(range(256))
+    for step in steps:
+        table = STEPS[step.name].kernel("python", utils)(table, *step.args)
+    return bytes(table)
+
+def fuse_byte_maps(steps: List[BoundStep], backend: Any) -> List[BoundStep]:
+    """
+    Replaces every run of consecutive byte map steps (`BYTE_MAP_STEPS`) with one `translate` step.
+
+    Args:
+        steps: The bound steps, in execution order.
+        backend: The backend module implementing `translate`.
+
+    Returns:
+        The steps with the byte map runs fused.
+    """
+    fused, run = [], []
+    for step in steps + [None]:
+        if step is not None and step.name in BYTE_MAP_STEPS:
+            run.append(step)
+            continue
+        if run:
+            table = byte_table(run)
+            fused.append(BoundStep('translate', backend.translate, (table,), {'steps': tuple(s.name for s in run)}))
+            run = []
+        if step is not None:
+            fused.append(step)
+    return fused
+
+def cancel_inverse_pairs(steps: List[BoundStep]) -> List[BoundStep]:
+    """
+    Removes adjacent steps cancelling each other out (`INVERSE_PAIRS`), such as `swap` + `swap`.
+
+    Args:
+        steps: The bound steps, in execution order.
+
+    Returns:
+        The remaining steps.
+    """
+    remaining = []
+    for step in steps:
+        if remaining and (remaining[-1].name, step.name) in INVERSE_PAIRS:
+            remaining.pop()
+        else:
+            remaining.append(step)
+    return remaining
+
+def fuse_permutations(steps: List[BoundStep], backend: Any) -> List[BoundStep]:
+    """
+    Replaces every run of two or more consecutive reordering steps (`PERMUTATION_STEPS`) with one `gather` step.
+
+    Args:
+        steps: The bound steps, in execution order.
+        backend: The backend module implementing `gather`.
+
+    Returns:
+        The steps with the reordering runs fused.
+    """
+    fused, run = [], []
+    for step in steps + [None]:
+        if step is not None and step.name in PERMUTATION_STEPS:
+            run.append(step)
+            continue
+        if len(run) > 1:
+            fused.append(BoundStep('gather', backend.gather, (Permutation(run),), {'steps': tuple(s.name for s in run)}))
+        else:
+            fused.extend(run)
+        run = []
+        if step is not None:
+            fused.append(step)
+    return fused
+
+def optimize(steps: List[BoundStep], key: List[int], backend: Any) -> List[BoundStep]:
+    """
+    Rewrites bound steps into fewer passes producing the same output.
+
+    Args:
+        steps: The bound steps, in execution order.
+        key: The key the steps use.
+        backend: The backend module running the steps.
+
+    Returns:
+        The optimized steps.
+    """
+    steps = cancel_inverse_pairs(steps)
+    carries = carries_bytes(steps, key)
+    if carries:
+        steps = fuse_byte_maps(steps, backend)
+    steps = fuse_permutations(steps, backend)
+    if carries and backend is utils:
+        steps = codegen.fuse_loops(steps)
+    return steps
@@ -0,0 +1,191 @@
+from multiprocessing import get_context
+from os import cpu_count
+from pickle import dumps
+from typing import Any, Iterable, List, Tuple, Union
+
+import numpy as np
+
+from .exceptions import AsciiChiperException, InvalidModelException
+from .models import DecryptionModel, EncryptionModel
+from .pipeline import CompiledPipeline, encode_message
+
+# Shared memory blocks need Python 3.8; the rest of the package still works without them
+try:
+    from multiprocessing import resource_tracker
+    from multiprocessing.shared_memory import SharedMemory
+except ImportError:
+    resource_tracker = SharedMemory = None
+
+# The pipeline of the worker process, compiled once by `_init_worker`
+_worker = {}
+
+def _init_worker(seed: int, model: Union[EncryptionModel, DecryptionModel], backend: str) -> None:
+    _worker["pipeline"] = CompiledPipeline.from_model(seed, model, backend)
+
+def _share(chunks: List[bytes]) -> Tuple["SharedMemory", np.ndarray]:
+    """Copies byte strings into a new shared memory block, returning it with the offsets of the strings."""
+    offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+    np.cumsum([len(chunk) for chunk in chunks], out=offsets[1:])
+    memory = SharedMemory(create=True, size=max(int(offsets[-1]), 1))
+    memory.buf[:int(offsets[-1])] = b"".join(chunks)
+    return memory, offsets
+
+def _read(name: str, offsets: List[int]) -> List[bytes]:
+    """Reads the byte strings between the offsets of a shared memory block."""
+    memory = SharedMemory(name=name)
+    try: data = bytes(memory.buf[offsets[0]:offsets[-1]])
+    finally: memory.close()
+    return [data[start - offsets[0]:end - offsets[0]] for start, end in zip(offsets, offsets[1:])]
+
+def _take(name: str, offsets: List[int]) -> List[bytes]:
+    """Reads the byte strings of a shared memory block created by a worker, then frees it."""
+    try: return _read(name, offsets)
+    finally:
+        memory = SharedMemory(name=name)
+        memory.close()
+        memory.unlink()
+
+def _encrypt_shard(name: str, offsets: List[int]) -> Tuple[str, List[int], List[int]]:
+    """Encrypts encoded messages from shared memory, writing them to a new shared memory block.
+
+    Returns:
+        The name of the block, the offsets of the encrypted messages and the positions of the ones that failed.
+    """
+    outputs = _worker["pipeline"].encrypt_encoded(_read(name, offsets))
+    memory, output_offsets = _share([b"" if data is None else data for data in outputs])
+    memory.close()
+    return memory.name, output_offsets.tolist(), [i for i, data in enumerate(outputs) if data is None]
+
+def _decrypt_shard(name: str, offsets: List[int]) -> List[Any]:
+    """Decrypts messages from shared memory (see `CompiledPipeline.decrypt_many`)."""
+    return _worker["pipeline"].decrypt_many([data.decode("utf-8") for data in _read(name, offsets)])
+
+class ParallelChiper:
+    """Encrypts and decrypts large batches with a single model on a pool of processes."""
+
+    def __init__(
+        self,
+        seed: int,
+        model: Union[EncryptionModel, DecryptionModel],
+        workers: int=None,
+        backend: str="numpy",
+        shard_size: int=8192,
+        start_method: str=None,
+    ):
+        """
+        Args:
+            seed: The seed to use for key generation.
+            model: The model to use. It is sent once to every worker, so its step parameters must be
+                picklable: use `KeyRelative` (e.g. `Chiper.MIDDLE_OF_KEY`) instead of lambdas.
+            workers: The number of worker processes. Default is the number of CPUs.
+            backend: The backend the workers run the steps with, one of `BACKENDS`. Default is "numpy".
+            shard_size: The number of messages sent to a worker at once. Smaller batches are
+                processed in this process. Default is 8192.
+            start_method: The `multiprocessing` start method ("fork", "spawn"...). Default is the platform's.
+
+        Raises:
+            AsciiChiperException: If shared memory isn't available (before Python 3.8).
+            InvalidModelException: If the model can't be sent to the workers.
+            InvalidKeyInputException: If the key can't be generated or the model is invalid.
+            InvalidModeException: If one of the steps is invalid.
+        """
+        if SharedMemory is None:
+            raise AsciiChiperException("ParallelChiper requires Python 3.8 or later (multiprocessing.shared_memory)")
+        try: dumps((seed, model))
+        except Exception as e:
+            raise InvalidModelException(f"Invalid model: it can't be sent to the worker processes ({e}). Use KeyRelative instead of lambdas.")
+        self.pipeline = CompiledPipeline.from_model(seed, model, backend)
+        self.seed, self.model, self.backend, self.shard_size = seed, model, backend, shard_size
+        self.workers = workers or cpu_count() or 1
+        # Forked workers must share this process' tracker, or theirs would unlink the blocks it still uses
+        resource_tracker.ensure_running()
+        self._pool = get_context(start_method).Pool(self.workers, _init_worker, (seed, model, backend))
+
+    def encrypt_many(self, messages: Iterable[Union[str, dict, int]]) -> List[Union[str, AsciiChiperException]]:
+        """
+        ### Encrypts many messages on the worker processes.
+
+        The messages are cleaned here, then sent to the workers through shared memory in shards
+        of `shard_size`; the encrypted messages come back the same way.
+
+        Args:
+            `messages` (Iterable[Union[str, dict, int]]): The messages to encrypt.
+
+        Returns:
+            List[Union[str, AsciiChiperException]]: The encrypted messages, in order, with the
+                exception raised for each message that couldn't be encrypted.
+        """
+        messages = list(messages)
+        inputs = [encode_message(message, self.pipeline.codec) for message in messages]
+        valid = [i for i, data in enumerate(inputs) if data is not None]
+        if len(valid) <= self.shard_size:
+            outputs = self.pipeline.encrypt_encoded(inputs)
+        else:
+            outputs = [None] * len(messages)
+            memory, offsets = _share([inputs[i] for i in valid])
+            try:
+                starts = range(0, len(valid), self.shard_size)
+                tasks = [(memory.name, offsets[start:start + self.shard_size + 1].tolist()) for start in starts]
+                for start, (name, output_offsets, failed) in zip(starts, self._pool.starmap(_encrypt_shard, tasks)):
+                    for i, data in enumerate(_take(name, output_offsets)):
+                        outputs[valid[start + i]] = data
+                    for i in failed:
+                        outputs[valid[start + i]] = None
+            finally:
+                memory.close()
+                memory.unlink()
+        results = []
+        for message, data in zip(messages, outputs):
+            if data is None:
+                # Run the message on its own, which raises the same exception as `CompiledPipeline.encrypt`
+                try: results.append(self.pipeline.encrypt(message))
+                except AsciiChiperException as e: results.append(e)
+            else: results.append(data.decode("utf-8"))
+        return results
+
+    def decrypt_many(self, messages: Iterable[str]) -> List[Union[str, dict, int, AsciiChiperException]]:
+        """
+        ### Decrypts many messages on the worker processes.
+
+        The messages are sent to the workers through shared memory in shards of `shard_size`.
+
+        Args:
+            `messages` (Iterable[str]): The messages to decrypt.
+
+        Returns:
+            List[Union[str, dict, int, AsciiChiperException]]: The decrypted messages, in order, with the
+                `DecryptionException` raised for each message that couldn't be decrypted.
+        """
+        messages = list(messages)
+        if len(messages) <= self.shard_size:
+            return self.pipeline.decrypt_many(messages)
+        results, inputs, valid = [None] * len(messages), [], []
+        for i, message in enumerate(messages):
+            try:
+                inputs.append(message.encode("utf-8"))
+                valid.append(i)
+            except:
+                try: results[i] = self.pipeline.decrypt(message)
+                except AsciiChiperException as e: results[i] = e
+        memory, offsets = _share(inputs)
+        try:
+            starts = range(0, len(valid), self.shard_size)
+            tasks = [(memory.name, offsets[start:start + self.shard_size + 1].tolist()) for start in starts]
+            for start, decrypted in zip(starts, self._pool.starmap(_decrypt_shard, tasks)):
+                for i, result in enumerate(decrypted):
+                    results[valid[start + i]] = result
+        finally:
+            memory.close()
+            memory.unlink()
+        return results
+
+    def close(self) -> None:
+        """Stops the worker processes."""
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self) -> "ParallelChiper":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
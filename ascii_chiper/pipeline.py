@@ -0,0 +1,679 @@
+from base64 import b64encode, b64decode
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .key_generator import KeyGenerator
+from .exceptions import AsciiChiperException, InvalidModeException, InvalidBackendException, InvalidCodecException, \
+    InvalidStartIndexException, InvalidEndIndexException, InvalidKeyInputException, \
+        EncryptionException, DecryptionException
+from .models import DecryptionModel, EncryptionModel
+from .codec import get_codec
+from .steps import BoundStep, STEPS, ENCRYPTION_STEPS, DECRYPTION_STEPS
+from .key_schedule import KeySchedule
+from .optimizer import mixes_bytes, optimize
+from . import utils, bytes_utils, numpy_utils, numpy_batch, chunked, stream
+
+class KeyRelative:
+    """A step parameter computed from the length of the key, like a lambda but picklable.
+
+    The value is `int((length + add) / div) % mod`, e.g. `KeyRelative(-1)` for the last index
+    of the key or `KeyRelative(mod=5)` for `lambda k: k % 5`.
+    """
+
+    def __init__(self, add: int=0, div: int=1, mod: int=None):
+        """
+        Args:
+            add: The number to add to the key length. Default is 0.
+            div: The number to divide the result by, truncating it. Default is 1.
+            mod: The modulo to apply last, if any. Default is None.
+        """
+        self.add, self.div, self.mod = add, div, mod
+
+    def __call__(self, length: int) -> int:
+        value = length + self.add
+        if self.div != 1:
+            value = int(value / self.div)
+        if self.mod is not None:
+            value %= self.mod
+        return value
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, KeyRelative) and (self.add, self.div, self.mod) == (other.add, other.div, other.mod)
+
+    def __hash__(self) -> int:
+        return hash((KeyRelative, self.add, self.div, self.mod))
+
+    def __repr__(self) -> str:
+        return f"KeyRelative(add={self.add}, div={self.div}, mod={self.mod})"
+
+PENULTIMATE_OF_KEY = KeyRelative(-1)
+MIDDLE_OF_KEY = KeyRelative(-1, 2)
+
+# Backend name -> module implementing the steps and the ascii/base64 conversions
+BACKENDS = {
+    "python": utils,
+    "bytes": bytes_utils,
+    "numpy": numpy_utils,
+}
+
+# Backend name -> module running the steps on many messages at once (see `CompiledPipeline.encrypt_many`)
+BATCH_BACKENDS = {
+    "numpy": numpy_batch,
+}
+
+def get_backend(name: str) -> Any:
+    """Returns the module implementing a backend.
+
+    Args:
+        name: The name of the backend, one of `BACKENDS`.
+
+    Returns:
+        The backend module.
+
+    Raises:
+        InvalidBackendException: If the backend doesn't exist.
+    """
+    try: return BACKENDS[name]
+    except (KeyError, TypeError): raise InvalidBackendException(f"Invalid backend: {name}")
+
+def format_step_params(step_params: Dict[str, Any], key: List[int]) -> Tuple:
+    """Formats the parameters for a step.
+
+    Args:
+        step_params: The parameters to format.
+        key: The key to use for formatting.
+
+    Returns:
+        Tuple: The formatted `index`, `start`, `end` and `base` parameters.
+    """
+    index, start, end, base = step_params.get('index', 0), step_params.get('start', 0), \
+        step_params.get('end', len(key)), step_params.get('base', 113)
+    if callable(index): index = index(len(key))
+    if callable(start): start = start(len(key))
+    if callable(end): end = end(len(key))
+    if callable(base): base = base(len(key))
+    if start == "PENULTIMATE_OF_KEY": start = PENULTIMATE_OF_KEY(len(key))
+    if start == "MIDDLE_OF_KEY": start = MIDDLE_OF_KEY(len(key))
+    if end == "PENULTIMATE_OF_KEY": end = PENULTIMATE_OF_KEY(len(key))
+    if end == "MIDDLE_OF_KEY": end = MIDDLE_OF_KEY(len(key))
+    if base == "PENULTIMATE_OF_KEY": base = PENULTIMATE_OF_KEY(len(key))
+    if base == "MIDDLE_OF_KEY": base = MIDDLE_OF_KEY(len(key))
+    if start < 0 or start >= len(key):
+        raise InvalidStartIndexException(f"Invalid start index: {start}")
+    if end < 0 or end > len(key):
+        raise InvalidEndIndexException(f"Invalid end index: {end}")
+    return index, start, end, base
+
+def check_message_type(message: Any) -> None:
+    """Checks the type of a message to encrypt.
+
+    Args:
+        message: The message to check.
+    """
+    if not isinstance(message, (str, int, dict, list, float)):
+        raise InvalidKeyInputException("Invalid message input: message must be a string, integer, float, list or dictionary.")
+
+def check_inputs_types(key: List[int], base: int, len: int, steps: List[Dict[str, Any]], message: Union[str, int, Dict]) -> None:
+    """Checks the types of the inputs.
+
+    Args:
+        key: The key to check.
+        base: The base to check.
+        len: The length of the key to check.
+        steps: The steps to check.
+        message: The message to check.
+    """
+    if base is not False and not isinstance(base, int):
+        raise InvalidKeyInputException("Invalid base input: base must be an integer.")
+
+    if len is not False and not isinstance(len, int):
+        raise InvalidKeyInputException("Invalid len input: len must be an integer.")
+
+    if not isinstance(steps, list) or not all(isinstance(step, dict) and isinstance(next(iter(step.keys())), str) and isinstance(next(iter(step.values())), dict) for step in steps):
+        raise InvalidKeyInputException("Invalid steps input: steps must be a list of dictionaries in the format {str, dict}.")
+
+    check_message_type(message)
+
+def encode_message(message: Any, codec: str="json") -> Optional[bytes]:
+    """Checks and encodes a message to encrypt (see `codec.py`), returning it as bytes.
+
+    Args:
+        message: The message to encode.
+        codec: The name of the codec to encode the message with. Default is "json".
+
+    Returns:
+        Optional[bytes]: The encoded message, or None if the message can't be encrypted.
+    """
+    try:
+        check_message_type(message)
+        return get_codec(codec).encode(message).encode("latin-1")
+    except:
+        return None
+
+def bind_steps(
+    steps: List[Dict[str, Dict]],
+    key: List[int],
+    table: Dict[str, Tuple],
+    backend: Any=utils,
+    schedules: Dict[Tuple[int, int], KeySchedule]=None,
+) -> List[BoundStep]:
+    """Resolves the parameters of every step and looks up its kernel (see `steps.STEPS`).
+
+    Args:
+        steps: The steps to bind, in execution order.
+        key: The key the steps will use.
+        table: The step table to look the steps up in (`ENCRYPTION_STEPS` or `DECRYPTION_STEPS`).
+        backend: The backend module running the steps, one of the modules of `BACKENDS`. Default is `utils`.
+        schedules: The key schedules already built for `key`, by (start, end). New ones are added to it.
+
+    Returns:
+        List[BoundStep]: The bound steps.
+
+    Raises:
+        InvalidModeException: If a step is not part of the table.
+    """
+    schedules = {} if schedules is None else schedules
+    backend_name = next(name for name, module in BACKENDS.items() if module is backend)
+    bound = []
+    for item in steps:
+        step_name, step_params = next(iter(item.items()))
+        index, start, end, base = format_step_params(step_params, key)
+        if step_name not in table:
+            raise InvalidModeException(f"Invalid mode: {step_name}")
+        values = {'key': key, 'index': index, 'start': start, 'end': end, 'base': base,
+            'cyclic': bool(step_params.get('cyclic', False))}
+        if 'schedule' in table[step_name]:
+            if (start, end) not in schedules:
+                schedules[(start, end)] = KeySchedule(key, start, end)
+            values['schedule'] = schedules[(start, end)]
+        kernel = STEPS[step_name].kernel(backend_name, backend)
+        bound.append(BoundStep(step_name, kernel, tuple(values[name] for name in table[step_name]), values))
+    return bound
+
+class CompiledPipeline:
+    """A set of encryption steps resolved once against a key, ready to encrypt and decrypt many messages."""
+
+    @staticmethod
+    def from_model(
+        seed: int,
+        model: Union[EncryptionModel, DecryptionModel],
+        backend: str="python",
+        use_cache: bool=True,
+        workers: int=None,
+    ) -> "CompiledPipeline":
+        """Generates the key of a model and compiles its steps.
+
+        Args:
+            seed: The seed to use for key generation.
+            model: The model to compile.
+            backend: The backend running the steps, one of `BACKENDS`. Default is "python".
+            use_cache: Whether to take the key from `KeyGenerator.cache`. Default is True.
+            workers: The number of threads processing a large message (see `CompiledPipeline`). Default is None.
+
+        Returns:
+            CompiledPipeline: The compiled pipeline.
+
+        Raises:
+            InvalidKeyInputException: If the key can't be generated or the model is invalid.
+        """
+        base, lenght, steps = model()
+        try: key = KeyGenerator(seed, use_cache).create_key(base, lenght)
+        except: raise InvalidKeyInputException("Invalid key input")
+        check_inputs_types(key, base, lenght, steps, "")
+        codec = getattr(model, "codec", "json")
+        if isinstance(model, DecryptionModel):
+            return CompiledPipeline(key, EncryptionModel.from_decryption_model(model).encrypt_steps, steps, backend, workers=workers, codec=codec)
+        return CompiledPipeline(key, steps, backend=backend, workers=workers, codec=codec)
+
+    def __init__(
+        self,
+        key: List[int],
+        encrypt_steps: List[Dict[str, Dict]]=None,
+        decrypt_steps: List[Dict[str, Dict]]=None,
+        backend: str="python",
+        optimized: bool=True,
+        workers: int=None,
+        chunk_size: int=chunked.CHUNK_SIZE,
+        codec: str="json",
+    ):
+        """
+        Args:
+            key: The key used by the steps.
+            encrypt_steps: The encryption steps. If None, the pipeline can only decrypt.
+            decrypt_steps: The decryption steps, as stored in a `DecryptionModel`.
+                If None, they are derived from `encrypt_steps`.
+            backend: The backend running the steps, one of `BACKENDS`. Default is "python". The "bytes" and
+                "numpy" backends hold every value as a byte: when a key value or an `xor_base` base isn't one,
+                the steps run on the "python" backend instead, which `backend` then tells.
+            optimized: Whether to fuse the steps that can run as a single pass (see `optimizer.py`). Default is True.
+            workers: The number of threads splitting the messages of at least two chunks into chunks processed
+                in parallel (see `chunked.py`), on the "numpy" backend. Default is None, processing every message at once.
+            chunk_size: The number of bytes per chunk. Default is `chunked.CHUNK_SIZE`.
+            codec: The format of the messages before encryption, one of `CODECS` (see `codec.py`). Default is "json".
+
+        Raises:
+            InvalidBackendException: If the backend doesn't exist.
+            InvalidCodecException: If the codec doesn't exist.
+        """
+        if decrypt_steps is None and encrypt_steps is not None:
+            decrypt_steps = DecryptionModel.from_encryption_model(EncryptionModel(0, 0, encrypt_steps)).decrypt_steps
+        self.key, self.backend, self.workers, self.chunk_size = key, backend, workers, chunk_size
+        self.encrypt_steps, self.decrypt_steps = encrypt_steps, decrypt_steps
+        self._backend = get_backend(backend)
+        self.codec, self._codec = codec, get_codec(codec)
+        self.schedules = {}
+        self._bind()
+        if self._backend is not utils and not mixes_bytes((self._encrypt or []) + (self._decrypt or []), key):
+            # The other backends hold every value as a byte: run the steps on lists instead
+            self.backend, self._backend = "python", utils
+            self._bind()
+        if optimized:
+            self._encrypt = optimize(self._encrypt, key, self._backend) if self._encrypt is not None else None
+            self._decrypt = optimize(self._decrypt, key, self._backend) if self._decrypt is not None else None
+        self._numpy_pipeline = self if self.backend == "numpy" else None
+
+    def _bind(self) -> None:
+        """Binds the encryption and decryption steps to the key and the backend."""
+        if self.encrypt_steps is not None:
+            self._encrypt = bind_steps(self.encrypt_steps, self.key, ENCRYPTION_STEPS, self._backend, self.schedules)
+        else: self._encrypt = None
+        if self.decrypt_steps is not None:
+            self._decrypt = bind_steps(list(reversed(self.decrypt_steps)), self.key, DECRYPTION_STEPS, self._backend, self.schedules)
+        else: self._decrypt = None
+
+    def encrypt(self, message: Union[str, dict, int]) -> str:
+        """Encrypts a message.
+
+        Args:
+            message: The message to encrypt.
+
+        Returns:
+            str: The encrypted message.
+
+        Raises:
+            InvalidKeyInputException: If the message type is not supported.
+            EncryptionException: If the encryption fails.
+        """
+        check_message_type(message)
+        if self._encrypt is None:
+            raise InvalidModeException("Invalid mode: the pipeline has no encryption steps")
+        try:
+            ascii_list = self._run(self._encrypt, self._backend.string_to_ascii(self._codec.encode(message)))
+            return self._backend.ascii_to_base64(ascii_list)
+        except:
+            raise EncryptionException("Encryption failed")
+
+    def decrypt(self, message: str) -> Union[str, dict, int]:
+        """Decrypts a message.
+
+        Args:
+            message: The message to decrypt.
+
+        Returns:
+            The decrypted message.
+
+        Raises:
+            DecryptionException: If the decryption fails.
+        """
+        if self._decrypt is None:
+            raise InvalidModeException("Invalid mode: the pipeline has no decryption steps")
+        try:
+            ascii_list = self._run(self._decrypt, self._backend.base64_to_ascii(message))
+            return self._codec.decode(self._backend.ascii_to_string(ascii_list))
+        except:
+            raise DecryptionException("Decryption failed")
+
+    def _run(self, steps: List[BoundStep], ascii_list: Any) -> Any:
+        """Runs the steps on a message, chunk by chunk on the worker threads if it's large enough."""
+        if self.workers and self.backend == "numpy" and len(ascii_list) >= 2 * self.chunk_size:
+            return chunked.run(steps, ascii_list, chunked.get_executor(self.workers), self.chunk_size)
+        for step in steps:
+            ascii_list = step(ascii_list)
+        return ascii_list
+
+    def source(self, decrypt: bool=False) -> str:
+        """Returns the source of the loops generated for the steps (see `codegen.py`), for debugging.
+
+        Args:
+            decrypt: Whether to return the loops of the decryption steps instead of the encryption ones. Default is False.
+
+        Returns:
+            str: The source of every generated loop, in execution order, or an empty string if there's none.
+        """
+        steps = (self._decrypt if decrypt else self._encrypt) or []
+        return "\n".join(step.params['source'] for step in steps if step.name == 'loop')
+
+    def _numpy_steps(self, decrypt: bool) -> List[BoundStep]:
+        """Returns the steps of the NumPy backend the streams and byte buffers run, compiling them on first use."""
+        if self._numpy_pipeline is None:
+            pipeline = CompiledPipeline(
+                self.key, self.encrypt_steps, self.decrypt_steps, "numpy",
+                workers=self.workers, chunk_size=self.chunk_size, codec=self.codec
+            )
+            if pipeline.backend != "numpy":
+                raise InvalidKeyInputException("Invalid key input: streams need key values and bases in the range 0-255.")
+            self._numpy_pipeline = pipeline
+        steps = self._numpy_pipeline._decrypt if decrypt else self._numpy_pipeline._encrypt
+        if steps is None:
+            raise InvalidModeException(f"Invalid mode: the pipeline has no {'decryption' if decrypt else 'encryption'} steps")
+        return steps
+
+    def _check_streamed_encryption(self) -> None:
+        """Rejects the encryption steps `dump` and `encrypt_stream` would reject, whose messages were cut short or can't be streamed back."""
+        if self._numpy_pipeline._encrypt is not None:
+            stream.StreamSteps(self._numpy_pipeline._encrypt)
+
+    def encrypt_stream(self, reader: Any, writer: Any, chunk_size: int=stream.STREAM_CHUNK_SIZE) -> int:
+        """Encrypts the text of a file-like object chunk by chunk, writing the base64 output to another one.
+
+        The output is the same as `encrypt(reader.read())`, without holding the text in memory. The steps
+        needing the whole message (`reverse`, `circular_shift`) and a non-cyclic `interleave` (keeping only
+        the first characters) can't be streamed. The steps run on the NumPy backend, so the key values must be bytes.
+
+        Args:
+            reader: The file-like object to read the text from, in text or binary (UTF-8) mode.
+            writer: The file-like object to write the encrypted text to, in text or binary mode.
+            chunk_size: The number of characters or bytes read at once. Default is `stream.STREAM_CHUNK_SIZE`.
+
+        Returns:
+            int: The number of characters written.
+
+        Raises:
+            InvalidModeException: If one of the steps can't be streamed.
+            InvalidCodecException: If the codec can't be streamed.
+            EncryptionException: If the encryption fails.
+        """
+        steps = self._numpy_steps(False)
+        if not self._codec.string_prefixes:
+            raise InvalidCodecException(f"Invalid codec: {self.codec} messages can't be streamed")
+        try: return stream.encrypt_stream(steps, reader, writer, chunk_size, self._codec)
+        except InvalidModeException: raise
+        except: raise EncryptionException("Encryption failed")
+
+    def decrypt_stream(self, reader: Any, writer: Any, chunk_size: int=stream.STREAM_CHUNK_SIZE) -> int:
+        """Decrypts the base64 text of a file-like object chunk by chunk, writing the decrypted text to another one.
+
+        The input must be the encryption of a string, e.g. written by `encrypt_stream`.
+
+        Args:
+            reader: The file-like object to read the encrypted text from, in text or binary mode.
+            writer: The file-like object to write the decrypted text to, in text or binary (UTF-8) mode.
+            chunk_size: The number of characters or bytes read at once. Default is `stream.STREAM_CHUNK_SIZE`.
+
+        Returns:
+            int: The number of characters written.
+
+        Raises:
+            InvalidModeException: If one of the steps can't be streamed.
+            InvalidCodecException: If the codec can't be streamed.
+            DecryptionException: If the decryption fails.
+        """
+        steps = self._numpy_steps(True)
+        self._check_streamed_encryption()
+        if not self._codec.string_prefixes:
+            raise InvalidCodecException(f"Invalid codec: {self.codec} messages can't be streamed")
+        try: return stream.decrypt_stream(steps, reader, writer, chunk_size, self._codec)
+        except InvalidModeException: raise
+        except: raise DecryptionException("Decryption failed")
+
+    def dump(self, message: Union[str, dict, int], writer: Any, chunk_size: int=stream.STREAM_CHUNK_SIZE) -> int:
+        """Encrypts a message, writing the base64 output to a file-like object while the codec serializes it.
+
+        The output is the same as `encrypt(message)`, but dictionaries and lists are serialized and encrypted
+        a piece at a time, so the memory used is the message itself plus a few chunks instead of its whole
+        serialization and encryption. Like `encrypt_stream`, the steps run on the NumPy backend, and the
+        steps needing the whole message and a non-cyclic `interleave` (keeping only the first characters) can't be used.
+
+        Args:
+            message: The message to encrypt.
+            writer: The file-like object to write the encrypted message to, in text or binary mode.
+            chunk_size: The number of characters of the serialized message encrypted at once. Default is `stream.STREAM_CHUNK_SIZE`.
+
+        Returns:
+            int: The number of characters written.
+
+        Raises:
+            InvalidKeyInputException: If the message type is not supported.
+            InvalidModeException: If one of the steps can't be streamed.
+            EncryptionException: If the encryption fails.
+        """
+        check_message_type(message)
+        steps = self._numpy_steps(False)
+        try: return stream.dump(steps, message, writer, chunk_size, self._codec)
+        except InvalidModeException: raise
+        except: raise EncryptionException("Encryption failed")
+
+    def load(self, reader: Any, chunk_size: int=stream.STREAM_CHUNK_SIZE) -> Union[str, dict, int]:
+        """Decrypts a message from a file-like object, parsing it as it's decrypted.
+
+        The input can be written by `dump` or `encrypt`. The `json` and `tagged` codecs parse the message
+        a chunk at a time, without holding its whole encryption or serialization; the `binary` codec
+        parses it once it's decrypted. When the pipeline has encryption steps, they must be streamable
+        too, like for `dump`.
+
+        Args:
+            reader: The file-like object to read the encrypted message from, in text or binary mode.
+            chunk_size: The number of characters or bytes read at once. Default is `stream.STREAM_CHUNK_SIZE`.
+
+        Returns:
+            The decrypted message.
+
+        Raises:
+            InvalidModeException: If one of the steps can't be streamed.
+            DecryptionException: If the decryption fails.
+        """
+        steps = self._numpy_steps(True)
+        self._check_streamed_encryption()
+        try: return stream.load(steps, reader, chunk_size, self._codec)
+        except InvalidModeException: raise
+        except: raise DecryptionException("Decryption failed")
+
+    def encrypt_bytes(self, data: Union[bytes, bytearray, memoryview]) -> bytes:
+        """Encrypts raw bytes, without the JSON cleaning and the base64 encoding of `encrypt`.
+
+        The steps run on the pipeline's backend: directly on the buffer on the "numpy" backend, on a
+        `bytearray` or list copy of it on the others. The output values must be bytes.
+
+        Args:
+            data: The bytes to encrypt, or any object exposing a contiguous buffer.
+
+        Returns:
+            bytes: The encrypted bytes.
+
+        Raises:
+            InvalidKeyInputException: If `data` is not a bytes-like object.
+            EncryptionException: If the encryption fails.
+        """
+        return bytes(self._run_bytes(False, data))
+
+    def decrypt_bytes(self, data: Union[bytes, bytearray, memoryview]) -> bytes:
+        """Decrypts bytes encrypted by `encrypt_bytes`.
+
+        Args:
+            data: The bytes to decrypt, or any object exposing a contiguous buffer.
+
+        Returns:
+            bytes: The decrypted bytes.
+
+        Raises:
+            InvalidKeyInputException: If `data` is not a bytes-like object.
+            DecryptionException: If the decryption fails.
+        """
+        return bytes(self._run_bytes(True, data))
+
+    def encrypt_into(self, data: Union[bytes, bytearray, memoryview], buffer: Union[bytearray, memoryview]) -> int:
+        """Encrypts raw bytes like `encrypt_bytes`, writing them at the start of a writable buffer instead of a new bytes object.
+
+        Args:
+            data: The bytes to encrypt, or any object exposing a contiguous buffer.
+            buffer: The writable buffer (`bytearray`, `memoryview`, `mmap`...) to write the encrypted bytes to.
+
+        Returns:
+            int: The number of bytes written.
+
+        Raises:
+            InvalidKeyInputException: If `data` is not a bytes-like object.
+            EncryptionException: If the encryption fails or the buffer is too small or read-only.
+        """
+        return self._run_into(False, data, buffer)
+
+    def decrypt_into(self, data: Union[bytes, bytearray, memoryview], buffer: Union[bytearray, memoryview]) -> int:
+        """Decrypts bytes like `decrypt_bytes`, writing them at the start of a writable buffer instead of a new bytes object.
+
+        Args:
+            data: The bytes to decrypt, or any object exposing a contiguous buffer.
+            buffer: The writable buffer to write the decrypted bytes to.
+
+        Returns:
+            int: The number of bytes written.
+
+        Raises:
+            InvalidKeyInputException: If `data` is not a bytes-like object.
+            DecryptionException: If the decryption fails or the buffer is too small or read-only.
+        """
+        return self._run_into(True, data, buffer)
+
+    def _run_bytes(self, decrypt: bool, data: Any) -> Union[bytes, bytearray, np.ndarray]:
+        """Runs the encryption or decryption steps of the pipeline's backend on a bytes-like object, returning a contiguous bytes-like output."""
+        steps = self._decrypt if decrypt else self._encrypt
+        if steps is None:
+            raise InvalidModeException(f"Invalid mode: the pipeline has no {'decryption' if decrypt else 'encryption'} steps")
+        try:
+            if self.backend == "numpy":
+                # A view of the buffer, without copying it: the NumPy steps never write to their input
+                ascii_list = np.frombuffer(data, dtype=np.uint8)
+            else:
+                with memoryview(data) as view, view.cast("B") as values:
+                    # The bytes steps run in place, so they get their own copy
+                    ascii_list = bytearray(values) if self.backend == "bytes" else values.tolist()
+        except: raise InvalidKeyInputException("Invalid message input: message must be a bytes-like object.")
+        try:
+            output = self._run(steps, ascii_list)
+            if self.backend == "numpy":
+                return np.ascontiguousarray(output)
+            return output if self.backend == "bytes" else bytes(output)
+        except: raise (DecryptionException("Decryption failed") if decrypt else EncryptionException("Encryption failed"))
+
+    def _run_into(self, decrypt: bool, data: Any, buffer: Any) -> int:
+        output = self._run_bytes(decrypt, data)
+        failed, action = (DecryptionException, "Decryption") if decrypt else (EncryptionException, "Encryption")
+        try: view = memoryview(buffer)
+        except: raise failed(f"{action} failed: the output must be a writable buffer")
+        with view:
+            if view.readonly:
+                raise failed(f"{action} failed: the output buffer is read-only")
+            try: target = view.cast("B")
+            except: raise failed(f"{action} failed: the output must be a contiguous buffer")
+            with target:
+                if len(target) < len(output):
+                    raise failed(f"{action} failed: the output buffer is too small ({len(output)} bytes needed)")
+                target[:len(output)] = output
+        return len(output)
+
+    def encrypt_many(self, messages: Iterable[Union[str, dict, int]]) -> List[Union[str, AsciiChiperException]]:
+        """Encrypts many messages, reporting the failures per message.
+
+        Args:
+            messages: The messages to encrypt.
+
+        Returns:
+            List[Union[str, AsciiChiperException]]: The encrypted messages, in order. A message that
+                can't be encrypted gets the exception raised by `encrypt` in its place.
+
+        Raises:
+            InvalidModeException: If the pipeline has no encryption steps.
+        """
+        if self._encrypt is None:
+            raise InvalidModeException("Invalid mode: the pipeline has no encryption steps")
+        messages = list(messages)
+        results = []
+        for message, data in zip(messages, self.encrypt_encoded([encode_message(message, self.codec) for message in messages])):
+            if data is None:
+                # Run the message on its own, which raises the same exception as `encrypt`
+                try: results.append(self.encrypt(message))
+                except AsciiChiperException as e: results.append(e)
+            else: results.append(data.decode("utf-8"))
+        return results
+
+    def decrypt_many(self, messages: Iterable[str]) -> List[Union[str, dict, int, AsciiChiperException]]:
+        """Decrypts many messages, reporting the failures per message.
+
+        Args:
+            messages: The messages to decrypt.
+
+        Returns:
+            List[Union[str, dict, int, AsciiChiperException]]: The decrypted messages, in order. A message that
+                can't be decrypted gets the exception raised by `decrypt` (e.g. `DecryptionException`) in its place.
+
+        Raises:
+            InvalidModeException: If the pipeline has no decryption steps.
+        """
+        if self._decrypt is None:
+            raise InvalidModeException("Invalid mode: the pipeline has no decryption steps")
+        messages = list(messages)
+        if self._batches(self._decrypt) and len(messages) > 1:
+            try: return self._decrypt_batch(messages)
+            except (ArithmeticError, IndexError, ValueError): pass # A step failing on some values (e.g. an empty message): run the messages one by one, which reports the failures per message
+        results = []
+        for message in messages:
+            try: results.append(self.decrypt(message))
+            except AsciiChiperException as e: results.append(e)
+        return results
+
+    def _batches(self, steps: List[BoundStep]) -> bool:
+        """Whether the steps can run on a batch of messages at once (see `numpy_batch.supports`)."""
+        return self.backend in BATCH_BACKENDS and BATCH_BACKENDS[self.backend].supports(steps)
+
+    def _run_batch(self, steps: List[BoundStep], inputs: List[Any]) -> List[Any]:
+        """Runs the steps on the inputs (bytes, or None for the messages that failed to convert) by blocks of similar lengths."""
+        batch = BATCH_BACKENDS[self.backend]
+        outputs = [None] * len(inputs)
+        indices = [i for i, data in enumerate(inputs) if data is not None]
+        for block in batch.blocks([len(inputs[i]) for i in indices]):
+            rows = [indices[i] for i in block.tolist()]
+            for row, data in zip(rows, batch.unpack(*batch.run(steps, *batch.pack([inputs[row] for row in rows])))):
+                outputs[row] = data
+        return outputs
+
+    def encrypt_encoded(self, inputs: List[Optional[bytes]]) -> List[Optional[bytes]]:
+        """Encrypts messages already cleaned and encoded (see `encode_message`).
+
+        Args:
+            inputs: The encoded messages, or None for the messages to skip.
+
+        Returns:
+            List[Optional[bytes]]: The encrypted messages, base64 encoded, in order. The messages skipped
+                or failing to encrypt get None in their place.
+        """
+        if self._batches(self._encrypt) and sum(data is not None for data in inputs) > 1:
+            try: return [None if data is None else b64encode(data) for data in self._run_batch(self._encrypt, inputs)]
+            except (ArithmeticError, IndexError, ValueError): pass # A step failing on some values (e.g. an empty message): run the messages one by one, to only skip the ones failing
+        return [None if data is None else self._encrypt_encoded_one(data) for data in inputs]
+
+    def _encrypt_encoded_one(self, data: bytes) -> Optional[bytes]:
+        """Encrypts a single encoded message, or returns None if it fails."""
+        try:
+            ascii_list = self._backend.string_to_ascii(data.decode("latin-1"))
+            for step in self._encrypt:
+                ascii_list = step(ascii_list)
+            return self._backend.ascii_to_base64(ascii_list).encode("utf-8")
+        except:
+            return None
+
+    def _decrypt_batch(self, messages: List[str]) -> List[Union[str, dict, int, AsciiChiperException]]:
+        """Decrypts many messages at once with the batch backend."""
+        inputs = []
+        for message in messages:
+            try: inputs.append(b64decode(message))
+            except: inputs.append(None)
+        results = []
+        for message, data in zip(messages, self._run_batch(self._decrypt, inputs)):
+            try:
+                if data is None:
+                    raise ValueError("Invalid message")
+                results.append(self._codec.decode(data.decode("latin-1")))
+            except:
+                try: results.append(self.decrypt(message))
+                except AsciiChiperException as e: results.append(e)
+        return results
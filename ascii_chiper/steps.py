@@ -0,0 +1,229 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .exceptions import InvalidModeException
+from . import utils
+
+# Every step of a model is looked up in `STEPS` by name. A step registers its kernel (the function
+# running it on a list of ASCII values), the name of its inverse step, the resolved parameters passed
+# after the values, the modes it can be used in, and its kind, which tells the optimizer, the chunked
+# runs and the streams how they can treat it. The built-in steps use the function with the same name of
+# every backend module; registered steps use their kernel, or the kernel given for a backend.
+# The tables below (`ENCRYPTION_STEPS`, `BYTE_MAP_STEPS`...) are kept in sync with `STEPS`.
+
+# Kinds of steps
+BYTEWISE = 'bytewise'  # Maps every byte value to another one regardless of its position
+POSITION_LOCAL = 'local'  # Computes the values at a position from the value and key value at that position
+PERMUTATION = 'permutation'  # Only moves (or drops) values around, whatever the values are
+OPAQUE = 'opaque'  # Anything else, always run as is
+KINDS = (BYTEWISE, POSITION_LOCAL, PERMUTATION, OPAQUE)
+
+# The resolved parameters a step can take (see `pipeline.bind_steps`); `schedule` is the
+# `KeySchedule` of the step's key slice, shared by every step using the same slice.
+PARAMS = ('key', 'index', 'start', 'end', 'base', 'cyclic', 'schedule')
+
+class StepDefinition:
+    """A registered step."""
+
+    __slots__ = ("name", "inverse", "params", "kind", "encrypt", "decrypt", "function", "kernels", "involution")
+
+    def __init__(
+        self,
+        name: str,
+        inverse: str,
+        params: Tuple[str, ...],
+        kind: str,
+        encrypt: bool,
+        decrypt: bool,
+        function: Optional[Callable],
+        kernels: Dict[str, Callable],
+        involution: bool,
+    ):
+        self.name, self.inverse, self.params, self.kind = name, inverse, params, kind
+        self.encrypt, self.decrypt, self.involution = encrypt, decrypt, involution
+        self.function, self.kernels = function, kernels
+
+    @property
+    def builtin(self) -> bool:
+        """Whether the step is implemented by the backend modules."""
+        return self.function is None
+
+    def kernel(self, backend: str, module: Any) -> Callable:
+        """
+        Returns the function running the step on a backend.
+
+        Args:
+            backend: The name of the backend, one of `pipeline.BACKENDS`.
+            module: The backend module.
+
+        Returns:
+            The kernel given for the backend, the backend's function for a built-in step, or else the
+            step's kernel running on the values converted to a list (see `to_list`/`from_list`).
+        """
+        if backend in self.kernels:
+            return self.kernels[backend]
+        if self.function is None:
+            return getattr(module, self.name)
+        if module is utils:
+            return self.function
+        function = self.function
+        return lambda values, *args: module.from_list(function(module.to_list(values), *args))
+
+    def __repr__(self) -> str:
+        return f"StepDefinition({self.name!r}, inverse={self.inverse!r}, kind={self.kind!r})"
+
+# Step name -> definition
+STEPS: Dict[str, StepDefinition] = {}
+
+# Step name -> names of the resolved parameters passed after the ascii list, by mode
+ENCRYPTION_STEPS: Dict[str, Tuple[str, ...]] = {}
+DECRYPTION_STEPS: Dict[str, Tuple[str, ...]] = {}
+
+# Steps of each kind
+BYTE_MAP_STEPS = set()
+POSITION_LOCAL_STEPS = set()
+PERMUTATION_STEPS = set()
+
+# Pairs of steps cancelling each other out when run one after the other
+INVERSE_PAIRS = set()
+
+def _sync() -> None:
+    """Rebuilds the tables derived from `STEPS`."""
+    tables = (ENCRYPTION_STEPS, DECRYPTION_STEPS, BYTE_MAP_STEPS, POSITION_LOCAL_STEPS, PERMUTATION_STEPS, INVERSE_PAIRS)
+    for table in tables:
+        table.clear()
+    kinds = {BYTEWISE: BYTE_MAP_STEPS, POSITION_LOCAL: POSITION_LOCAL_STEPS, PERMUTATION: PERMUTATION_STEPS}
+    for name, step in STEPS.items():
+        if step.encrypt: ENCRYPTION_STEPS[name] = step.params
+        if step.decrypt: DECRYPTION_STEPS[name] = step.params
+        if step.kind in kinds: kinds[step.kind].add(name)
+        # Only steps without parameters are sure to cancel out, whatever the parameters of the model are
+        if not step.params and step.inverse in STEPS:
+            INVERSE_PAIRS.add((name, step.inverse))
+            if step.involution: INVERSE_PAIRS.add((name, name))
+    # Every step with a registered inverse maps to the Python function of its inverse
+    for name in [name for name in utils.OPPOSITE_ENCRYPTION_FUNCTIONS if name not in STEPS]:
+        del utils.OPPOSITE_ENCRYPTION_FUNCTIONS[name]
+    for name, step in STEPS.items():
+        if step.inverse in STEPS:
+            utils.OPPOSITE_ENCRYPTION_FUNCTIONS[name] = STEPS[step.inverse].kernel("python", utils)
+
+def register_step(
+    name: str,
+    function: Callable,
+    inverse: str,
+    params: Iterable[str]=(),
+    kind: str=OPAQUE,
+    kernels: Dict[str, Callable]=None,
+    encrypt: bool=True,
+    decrypt: bool=True,
+    involution: bool=False,
+    replace: bool=False,
+) -> StepDefinition:
+    """
+    Registers a step, which models can then use like the built-in ones.
+
+    A step and its inverse are registered separately, each naming the other one as its inverse.
+
+    Args:
+        name: The name of the step in the models.
+        function: The kernel of the step, taking a list of ASCII values and the resolved `params`,
+            and returning the new list of values. Values must stay in the range 0-255.
+        inverse: The name of the step reversing it, used to derive a decryption model from an encryption
+            one (see `DecryptionModel.from_encryption_model`) and the other way around.
+        params: The names of the resolved parameters passed to the kernel after the values, in order, among
+            `PARAMS`. Default is none.
+        kind: What the step does, one of `KINDS`: `BYTEWISE` steps are fused into translation tables,
+            `PERMUTATION` steps into gathers (their kernel then runs on indices instead of bytes) and
+            `BYTEWISE` steps also run chunk by chunk in streams and chunked runs. Default is `OPAQUE`.
+        kernels: Kernels running the step on other backends, by backend name (e.g. "numpy"), with the
+            same parameters. The backends without one convert their values to a list for `function`.
+        encrypt: Whether the step can be used in encryption steps. Default is True.
+        decrypt: Whether the step can be used in decryption steps. Default is True.
+        involution: Whether running the step twice leaves the message unchanged (like `reverse`). Default is False.
+        replace: Whether to replace a step registered with the same name. Built-in steps can't be replaced. Default is False.
+
+    Returns:
+        StepDefinition: The registered step.
+
+    Raises:
+        InvalidModeException: If the step already exists, or its parameters or kind are invalid.
+
+    Examples:
+        >>> from ascii_chiper import register_step
+        >>> def add_index(ascii_list, key, index): return [(v + key[index]) % 256 for v in ascii_list]
+        >>> def sub_index(ascii_list, key, index): return [(v - key[index]) % 256 for v in ascii_list]
+        >>> register_step("add_index", add_index, "sub_index", ("key", "index"), kind="bytewise", decrypt=False)
+        StepDefinition('add_index', inverse='sub_index', kind='bytewise')
+        >>> register_step("sub_index", sub_index, "add_index", ("key", "index"), kind="bytewise", encrypt=False)
+        StepDefinition('sub_index', inverse='add_index', kind='bytewise')
+    """
+    params = tuple(params)
+    if not isinstance(name, str) or not name:
+        raise InvalidModeException(f"Invalid mode: {name!r} is not a valid step name")
+    if name in STEPS and (not replace or STEPS[name].builtin):
+        raise InvalidModeException(f"Invalid mode: {name} is already registered")
+    if function is None or not callable(function):
+        raise InvalidModeException(f"Invalid mode: the kernel of {name} must be callable")
+    if any(param not in PARAMS for param in params):
+        raise InvalidModeException(f"Invalid mode: the parameters of {name} must be among {PARAMS}")
+    if kind not in KINDS:
+        raise InvalidModeException(f"Invalid mode: the kind of {name} must be one of {KINDS}")
+    STEPS[name] = StepDefinition(name, inverse, params, kind, encrypt, decrypt, function, dict(kernels or {}), involution)
+    _sync()
+    return STEPS[name]
+
+def unregister_step(name: str) -> None:
+    """
+    Removes a registered step.
+
+    Args:
+        name: The name of the step.
+
+    Raises:
+        InvalidModeException: If the step doesn't exist or is a built-in step.
+    """
+    if name not in STEPS:
+        raise InvalidModeException(f"Invalid mode: {name} is not a registered step")
+    if STEPS[name].builtin:
+        raise InvalidModeException(f"Invalid mode: {name} is a built-in step and can't be removed")
+    del STEPS[name]
+    _sync()
+
+def _builtin(name: str, inverse: str, params: Tuple[str, ...], kind: str, encrypt: bool, involution: bool=False) -> None:
+    STEPS[name] = StepDefinition(name, inverse, params, kind, encrypt, not encrypt or name == 'reverse', None, {}, involution)
+
+_builtin('reverse', 'reverse', (), PERMUTATION, True, involution=True)
+_builtin('swap', 'swap_back', (), PERMUTATION, True, involution=True)
+_builtin('circular_shift', 'unshift', ('key', 'index'), PERMUTATION, True)
+_builtin('xor_shift', 'xor_unshift', ('key', 'index'), BYTEWISE, True)
+_builtin('rotate', 'unrotate', ('key', 'index'), BYTEWISE, True)
+_builtin('xor_base', 'unxor_base', ('key', 'base', 'start', 'end', 'schedule'), POSITION_LOCAL, True)
+_builtin('xor_add', 'xor_unadd', ('key', 'start', 'end', 'schedule'), POSITION_LOCAL, True)
+_builtin('interleave', 'deinterleave', ('key', 'start', 'end', 'cyclic', 'schedule'), POSITION_LOCAL, True)
+_builtin('interleave_key', 'deinterleave_key', ('key', 'start', 'end', 'schedule'), POSITION_LOCAL, True)
+_builtin('swap_back', 'swap', (), PERMUTATION, False, involution=True)
+_builtin('unshift', 'circular_shift', ('key', 'index'), PERMUTATION, False)
+_builtin('xor_unshift', 'xor_shift', ('key', 'index'), BYTEWISE, False)
+_builtin('unrotate', 'rotate', ('key', 'index'), BYTEWISE, False)
+_builtin('unxor_base', 'xor_base', ('key', 'base', 'start', 'end', 'schedule'), POSITION_LOCAL, False)
+_builtin('xor_unadd', 'xor_add', ('key', 'start', 'end', 'schedule'), POSITION_LOCAL, False)
+_builtin('deinterleave', 'interleave', ('key',), PERMUTATION, False)
+_builtin('deinterleave_key', 'interleave_key', ('key', 'start', 'end'), PERMUTATION, False)
+_sync()
+
+class BoundStep:
+    """A step whose parameters have been resolved against a key."""
+
+    __slots__ = ("name", "function", "args", "params")
+
+    def __init__(self, name: str, function: Callable, args: Tuple, params: Dict[str, Any]=None):
+        self.name = name
+        self.function = function
+        self.args = args
+        self.params = params or {}
+
+    def __call__(self, ascii_list: List[int]) -> List[int]:
+        return self.function(ascii_list, *self.args)
+
+    def __repr__(self) -> str:
+        return f"BoundStep({self.name!r})"
@@ -0,0 +1,331 @@
+from base64 import b64encode, b64decode
+from codecs import getincrementaldecoder
+from io import BufferedIOBase, RawIOBase
+from json import loads
+import re
+from typing import Any, Callable, Iterator, List, Type
+
+import numpy as np
+
+from .chunked import LOCAL_STEPS, is_byte_step
+from .codec import JsonCodec
+from .exceptions import InvalidModeException
+from .numpy_utils import _base_byte
+from .steps import BoundStep
+
+# Runs the steps of a pipeline on a text read from a file-like object, a chunk at a time, so the
+# memory used doesn't grow with the text. Every step carries what it needs from one chunk to the
+# next: the position of the next value (key offset, pair parity), the last value of the `xor_base`
+# chain, the unpaired value of `swap`. The base64 output is encoded in blocks of 3 bytes.
+# The text is encoded as a string by the codec of the pipeline, exactly like `CompiledPipeline.encrypt(text)` would.
+# `dump` and `load` do the same for any message, serialized and parsed in pieces by the codec.
+
+# The default number of characters read at once
+STREAM_CHUNK_SIZE = 1 << 20
+
+# Steps needing the whole message, which can't be streamed
+WHOLE_MESSAGE_STEPS = {'reverse', 'circular_shift', 'unshift'}
+
+# Steps carrying a value from one chunk to the next
+CARRY_STEPS = {'swap', 'swap_back', 'xor_base', 'unxor_base'}
+
+# A JSON string body up to its first incomplete escape or closing quote
+_JSON_STRING_BODY = re.compile(r'(?:[^\\"]+|\\(?:u[0-9a-fA-F]{4}|[^u]))*')
+# A high surrogate escape, whose low surrogate can be in the next chunk
+_HIGH_SURROGATE = re.compile(r'\\u[dD][89abAB][0-9a-fA-F]{2}$')
+
+class StreamStep:
+    """A bound step of the NumPy backend running on consecutive chunks of a message."""
+
+    def __init__(self, step: BoundStep):
+        """
+        Args:
+            step: The bound step.
+
+        Raises:
+            InvalidModeException: If the step needs the whole message, can't run chunk by chunk, or is a
+                non-cyclic `interleave` (which truncates the message).
+        """
+        if step.name in WHOLE_MESSAGE_STEPS:
+            raise InvalidModeException(f"Invalid mode: {step.name} needs the whole message and can't be streamed")
+        if step.name == 'interleave' and not step.params.get('cyclic'):
+            # Only keeps as many values as the key slice has: a stream would be cut short
+            raise InvalidModeException("Invalid mode: interleave keeps only the first values of the message and can't be streamed unless cyclic")
+        if not (is_byte_step(step.name) or step.name in LOCAL_STEPS or step.name in CARRY_STEPS):
+            raise InvalidModeException(f"Invalid mode: {step.name} can't be streamed")
+        self.step = step
+        self.position = 0
+        self.carry = None
+
+    def feed(self, chunk: np.ndarray) -> np.ndarray:
+        """Runs the step on the next chunk, returning the values it can output so far."""
+        if not len(chunk):
+            return chunk
+        step, name = self.step, self.step.name
+        if is_byte_step(name):
+            output = step(chunk)
+        elif name in LOCAL_STEPS:
+            output = LOCAL_STEPS[name](chunk, self.position, *step.args)
+        elif name in ('swap', 'swap_back'):
+            if self.carry is not None:
+                chunk = np.concatenate((self.carry, chunk))
+            paired = len(chunk) - len(chunk) % 2
+            output, self.carry = step(chunk[:paired]), chunk[paired:].copy()
+        elif name == 'xor_base':
+            key, base, start_idx, end_idx, schedule = step.args
+            carry = _base_byte(base) if self.carry is None else self.carry
+            output = np.bitwise_xor.accumulate(chunk ^ schedule.cycle_array(len(chunk), self.position)) ^ carry
+            self.carry = output[-1]
+        elif name == 'unxor_base':
+            key, base, start_idx, end_idx, schedule = step.args
+            previous = np.empty_like(chunk)
+            previous[0] = _base_byte(base) if self.carry is None else self.carry
+            previous[1:] = chunk[:-1]
+            output, self.carry = chunk ^ schedule.cycle_array(len(chunk), self.position) ^ previous, chunk[-1]
+        else:
+            raise InvalidModeException(f"Invalid mode: {name} can't be streamed")
+        self.position += len(chunk)
+        return output
+
+    def flush(self) -> np.ndarray:
+        """Returns the values held back at the end of the message."""
+        if self.step.name in ('swap', 'swap_back') and self.carry is not None:
+            carry, self.carry = self.carry, None
+            return carry # The last value of an odd-length message stays in place
+        return np.empty(0, dtype=np.uint8)
+
+class StreamSteps:
+    """The steps of a pipeline running on consecutive chunks of a message."""
+
+    def __init__(self, steps: List[BoundStep]):
+        """
+        Args:
+            steps: The bound steps of the NumPy backend, in execution order. Fused gathers are
+                run as the steps they're made of.
+
+        Raises:
+            InvalidModeException: If one of the steps needs the whole message.
+        """
+        steps = [inner for step in steps for inner in (step.args[0].steps if step.name == 'gather' else (step,))]
+        self.steps = [StreamStep(step) for step in steps]
+
+    def feed(self, chunk: np.ndarray) -> np.ndarray:
+        for step in self.steps:
+            chunk = step.feed(chunk)
+        return chunk
+
+    def flush(self) -> np.ndarray:
+        output = np.empty(0, dtype=np.uint8)
+        for step in self.steps:
+            output = np.concatenate((step.feed(output), step.flush()))
+        return output
+
+def _reader(reader: Any, chunk_size: int, text: bool) -> Callable[[], str]:
+    """Returns a function reading the next chunk of a text or binary file-like object as a string ('' at the end)."""
+    decoder = getincrementaldecoder("utf-8")() if text else None
+    def read():
+        while True:
+            data = reader.read(chunk_size)
+            if isinstance(data, str):
+                return data
+            if not data:
+                return decoder.decode(b"", final=True) if decoder else ""
+            data = decoder.decode(data) if decoder else data.decode("ascii")
+            if data:
+                return data
+    return read
+
+def _writer(writer: Any) -> Callable[[str], int]:
+    """Returns a function writing a string to a text or binary file-like object."""
+    binary = isinstance(writer, (RawIOBase, BufferedIOBase))
+    def write(data):
+        writer.write(data.encode("utf-8") if binary else data)
+        return len(data)
+    return write
+
+def _batched(pieces: Iterator[str], size: int) -> Iterator[str]:
+    """Joins consecutive pieces of a text into chunks of at least `size` characters (but the last one)."""
+    batch, length = [], 0
+    for piece in pieces:
+        batch.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield "".join(batch)
+            batch, length = [], 0
+    if batch:
+        yield "".join(batch)
+
+def _write_encrypted(stream: StreamSteps, pieces: Iterator[str], write: Callable[[str], int]) -> int:
+    """Runs the steps on consecutive pieces of an encoded text, writing the output as base64 in blocks of 3 bytes."""
+    pending, written = b"", 0
+    for piece in pieces:
+        output = pending + stream.feed(np.frombuffer(piece.encode("latin-1"), dtype=np.uint8)).tobytes()
+        aligned = len(output) - len(output) % 3
+        if aligned:
+            written += write(b64encode(output[:aligned]).decode("ascii"))
+        pending = output[aligned:]
+    output = pending + stream.flush().tobytes()
+    return written + (write(b64encode(output).decode("ascii")) if output else 0)
+
+def _decrypted_pieces(stream: StreamSteps, read: Callable[[], str]) -> Iterator[str]:
+    """Decodes consecutive chunks of a base64 text in blocks of 4 characters, yielding the output of the steps."""
+    encoded = ""
+    while True:
+        text = read()
+        if not text:
+            break
+        encoded += "".join(text.split())
+        aligned = len(encoded) - len(encoded) % 4
+        if aligned:
+            yield stream.feed(np.frombuffer(b64decode(encoded[:aligned], validate=True), dtype=np.uint8)).tobytes().decode("latin-1")
+        encoded = encoded[aligned:]
+    if encoded:
+        raise ValueError("Invalid base64 input")
+    yield stream.flush().tobytes().decode("latin-1")
+
+def _string_pieces(read: Callable[[], str], codec: Type) -> Iterator[str]:
+    """Encodes consecutive chunks of a text as a single string."""
+    # The encoding of every chunk, without the prefix and opening quote of the string but before the first
+    # chunk, nor the closing quote but after the last one
+    prefix, first = codec.encode("")[:-1], True
+    while True:
+        text = read()
+        if not text and not first:
+            break
+        cleaned = codec.encode(text)
+        yield cleaned[:-1] if first else cleaned[len(prefix):-1]
+        first = False
+    yield '"'
+
+def encrypt_stream(
+    steps: List[BoundStep],
+    reader: Any,
+    writer: Any,
+    chunk_size: int=STREAM_CHUNK_SIZE,
+    codec: Type=JsonCodec,
+) -> int:
+    """
+    Encrypts the text of a file-like object as a string, writing the base64 output to another one.
+
+    Args:
+        steps: The bound encryption steps of the NumPy backend.
+        reader: The file-like object to read the text from, in text or binary (UTF-8) mode.
+        writer: The file-like object to write the encrypted text to, in text or binary mode.
+        chunk_size: The number of characters or bytes read at once. Default is `STREAM_CHUNK_SIZE`.
+        codec: The codec encoding the text, whose string encoding must be a JSON string after a prefix. Default is `JsonCodec`.
+
+    Returns:
+        int: The number of characters written.
+
+    Raises:
+        InvalidModeException: If one of the steps needs the whole message.
+    """
+    stream = StreamSteps(steps)
+    return _write_encrypted(stream, _string_pieces(_reader(reader, chunk_size, True), codec), _writer(writer))
+
+def decrypt_stream(
+    steps: List[BoundStep],
+    reader: Any,
+    writer: Any,
+    chunk_size: int=STREAM_CHUNK_SIZE,
+    codec: Type=JsonCodec,
+) -> int:
+    """
+    Decrypts a text encrypted by `encrypt_stream` (or the encryption of a string) from a file-like object,
+    writing the text to another one.
+
+    Args:
+        steps: The bound decryption steps of the NumPy backend.
+        reader: The file-like object to read the base64 text from, in text or binary mode.
+        writer: The file-like object to write the decrypted text to, in text or binary (UTF-8) mode.
+        chunk_size: The number of characters or bytes read at once. Default is `STREAM_CHUNK_SIZE`.
+        codec: The codec the text was encoded with. Default is `JsonCodec`.
+
+    Returns:
+        int: The number of characters written.
+
+    Raises:
+        InvalidModeException: If one of the steps needs the whole message.
+        ValueError: If the input is not valid base64 or not the encryption of a string.
+    """
+    stream, read, write = StreamSteps(steps), _reader(reader, chunk_size, False), _writer(writer)
+    body, written, started = "", 0, False
+
+    def unescape(text: str, final: bool) -> None:
+        nonlocal body, written, started
+        body += text
+        if not started:
+            if not final and len(body) < max(map(len, codec.string_prefixes)):
+                return
+            prefix = next((prefix for prefix in codec.string_prefixes if body.startswith(prefix)), None)
+            if prefix is None:
+                raise ValueError("The message is not the encryption of a string")
+            body, started = body[len(prefix):], True
+        end = _JSON_STRING_BODY.match(body).end()
+        surrogate = _HIGH_SURROGATE.search(body, 0, end)
+        if surrogate and not final:
+            end = surrogate.start()
+        if end:
+            written += write(loads('"' + body[:end] + '"'))
+        body = body[end:]
+
+    for text in _decrypted_pieces(stream, read):
+        unescape(text, False)
+    unescape("", True)
+    if not started or body != '"':
+        raise ValueError("The message is not the encryption of a string")
+    return written
+
+def dump(
+    steps: List[BoundStep],
+    message: Any,
+    writer: Any,
+    chunk_size: int=STREAM_CHUNK_SIZE,
+    codec: Type=JsonCodec,
+) -> int:
+    """
+    Encrypts a message, writing the base64 output to a file-like object as the codec serializes it,
+    without holding the whole serialized message.
+
+    Args:
+        steps: The bound encryption steps of the NumPy backend.
+        message: The message to encrypt.
+        writer: The file-like object to write the encrypted message to, in text or binary mode.
+        chunk_size: The number of characters of the serialized message encrypted at once. Default is `STREAM_CHUNK_SIZE`.
+        codec: The codec serializing the message. Default is `JsonCodec`.
+
+    Returns:
+        int: The number of characters written.
+
+    Raises:
+        InvalidModeException: If one of the steps needs the whole message.
+    """
+    stream = StreamSteps(steps)
+    return _write_encrypted(stream, _batched(codec.iterencode(message), chunk_size), _writer(writer))
+
+def load(
+    steps: List[BoundStep],
+    reader: Any,
+    chunk_size: int=STREAM_CHUNK_SIZE,
+    codec: Type=JsonCodec,
+) -> Any:
+    """
+    Decrypts a message from a file-like object, parsing it as it's decrypted.
+
+    Args:
+        steps: The bound decryption steps of the NumPy backend.
+        reader: The file-like object to read the base64 text from, in text or binary mode.
+        chunk_size: The number of characters or bytes read at once. Default is `STREAM_CHUNK_SIZE`.
+        codec: The codec the message was serialized with. Default is `JsonCodec`.
+
+    Returns:
+        The decrypted message.
+
+    Raises:
+        InvalidModeException: If one of the steps needs the whole message.
+        ValueError: If the input is not valid base64 or the decrypted message can't be parsed.
+    """
+    stream, parser = StreamSteps(steps), codec.parser()
+    for text in _decrypted_pieces(stream, _reader(reader, chunk_size, False)):
+        parser.feed(text)
+    return parser.close()
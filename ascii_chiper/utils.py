@@ -1,5 +1,7 @@
-from typing import List
+from typing import Any, List
 from base64 import b64encode, b64decode
+from itertools import accumulate, chain
+from operator import xor
 from re import sub
 from json import dumps, loads, JSONDecodeError
 
@@ -109,18 +111,22 @@ def xor_unshift(ascii_list: List[int], key: List[int], n: int=0) -> List[int]:
     shift = key[n] % 7 + 1
     return [(c >> shift | c << 8 - shift) & 255 for c in ascii_list]
 
-def interleave(ascii_list: List[int], key: int, start: List[int], end: int) -> List[int]: 
+def interleave(ascii_list: List[int], key: int, start: List[int], end: int, cyclic: bool=False, schedule: Any=None) -> List[int]: 
     """
     Interleaves two lists of ASCII values by taking one value from each list at a time.
 
     Args:
         ascii_list: The first list of ASCII values to interleave.
         key: The second list of ASCII values to interleave.
-
+        cyclic: Whether to repeat the key slice over the whole list, as `interleave_key` does.
+            If False, the list is truncated to the length of the key slice. Default is False.
+        schedule: The `KeySchedule` of the key slice, if already built. Default is None.
 
     Returns:
         A new list of interleaved ASCII values.
     """
+    if cyclic:
+        return interleave_key(ascii_list, key, start, end, schedule)
     return [val for pair in zip(ascii_list, key[start:end]) for val in pair]
 
 def deinterleave(interleaved_list: List[int], key: List[int]) -> List[int]:
@@ -201,55 +207,61 @@ def unshift(ascii_list: List[int], key: List[int], n: int) -> List[int]:
     length = len(ascii_list)
     return [ascii_list[(i - shift_amount + length) % length] for i in range(length)]
 
-def xor_base(ascii_list: List[int], key: List[int], base: int, start_idx: int, end_idx: int) -> List[int]:
+def _key_values(key: List[int], start_idx: int, end_idx: int, length: int, schedule: Any=None) -> List[int]:
+    """Returns `length` values of the key slice repeated cyclically, from the schedule if there is one."""
+    if schedule is not None:
+        return schedule.cycle(length)
+    key_slice = key[start_idx:end_idx]
+    return key_slice * (length // len(key_slice) + 1) if length else []
+
+def xor_base(ascii_list: List[int], key: List[int], base: int, start_idx: int, end_idx: int, schedule: Any=None) -> List[int]:
     """
     Applies a sequence of XOR operations on a list of ASCII values using a base value and a key.
 
+    Each output value is the XOR of the input value, the key value and the previous output
+    (`base` for the first one), which is a cumulative XOR scan seeded with `base`.
+
     Args:
         ascii_list: The list of ASCII values to transform.
         key: The list of integers to XOR with each value in `ft`.
         base: The initial value to XOR with the first element in `ft`.
         start_idx: The index of the key to start using for XOR operations.
         end_idx: The index of the key to stop using for XOR operations.
+        schedule: The `KeySchedule` of the key slice, if already built. Default is None.
 
     Returns:
         A new list of transformed ASCII values.
     """
-    key_slice = key[start_idx:end_idx]
-    key_len = len(key_slice)
-    final = []
-    current_base = base
-    for i in range(len(ascii_list)):
-        xor = ascii_list[i] ^ key_slice[i % key_len] ^ current_base
-        final.append(xor)
-        current_base = xor
-    return final
+    if not ascii_list:
+        return []
+    key_values = _key_values(key, start_idx, end_idx, len(ascii_list), schedule)
+    scan = accumulate(chain((base,), map(xor, ascii_list, key_values)), xor)
+    next(scan)
+    return list(scan)
 
-def unxor_base(ascii_list: List[int], key: List[int], base: int, start_idx: int, end_idx: int) -> List[int]:
+def unxor_base(ascii_list: List[int], key: List[int], base: int, start_idx: int, end_idx: int, schedule: Any=None) -> List[int]:
     """
     Reverses the sequence of XOR operations on a list of ASCII values using a base value and a key.
 
+    Every value only depends on the encrypted value before it, so the whole list is undone in one pass.
+
     Args:
         ascii_list: The list of transformed ASCII values to transform back to the original order.
         key: The list of integers used to XOR with each value in `ft`.
         base: The initial value used to XOR with the first element in `ft`.
         start_idx: The index of the key to start using for XOR operations.
         end_idx: The index of the key to stop using for XOR operations.
+        schedule: The `KeySchedule` of the key slice, if already built. Default is None.
     
     Returns:
         A new list of ASCII values in the original order.
     """
-    key_slice = key[start_idx:end_idx]
-    key_len = len(key_slice)
-    final = []
-    current_base = base
-    for i in range(len(ascii_list)):
-        xor = ascii_list[i] ^ key_slice[i % key_len] ^ current_base
-        final.append(xor)
-        current_base = ascii_list[i]  # Use the encrypted value as the next base
-    return final
+    if not ascii_list:
+        return []
+    key_values = _key_values(key, start_idx, end_idx, len(ascii_list), schedule)
+    return list(map(xor, map(xor, ascii_list, key_values), chain((base,), ascii_list)))
 
-def xor_add(ascii_list: List[int], key: List[int], start_idx: int, end_idx: int) -> List[int]:
+def xor_add(ascii_list: List[int], key: List[int], start_idx: int, end_idx: int, schedule: Any=None) -> List[int]:
     """
     Applies a sequence of addition and XOR operations on a list of ASCII values using a key.
 
@@ -258,20 +270,17 @@ def xor_add(ascii_list: List[int], key: List[int], start_idx: int, end_idx: int)
         key: The list of integers to use for addition and XOR operations.
         start_idx: The index of the key to start using for operations.
         end_idx: The index of the key to stop using for operations.
+        schedule: The `KeySchedule` of the key slice, if already built. Default is None.
 
     Returns:
         A new list of transformed ASCII values.
     """
-    ft_len = len(ascii_list)
-    key_len = len(key[start_idx:end_idx])
-    transformed_values = []
-    for i in range(ft_len):
-        value = ascii_list[i]
-        key_value = key[start_idx:end_idx][i % key_len] & 127
-        transformed_values.append((value + key_value) % 256 ^ 128)
-    return transformed_values
+    if schedule is not None:
+        return [(value + key_value) % 256 ^ 128 for value, key_value in zip(ascii_list, schedule.masked(len(ascii_list)))]
+    key_values = _key_values(key, start_idx, end_idx, len(ascii_list))
+    return [(value + (key_value & 127)) % 256 ^ 128 for value, key_value in zip(ascii_list, key_values)]
 
-def xor_unadd(ascii_list: List[int], key: List[int], start_idx: int, end_idx: int) -> List[int]:
+def xor_unadd(ascii_list: List[int], key: List[int], start_idx: int, end_idx: int, schedule: Any=None) -> List[int]:
     """
     Reverses the sequence of addition and XOR operations on a list of ASCII values using a key.
 
@@ -280,24 +289,18 @@ def xor_unadd(ascii_list: List[int], key: List[int], start_idx: int, end_idx: in
         key: The list of integers used for addition and XOR operations.
         start_idx: The index of the key to start using for operations.
         end_idx: The index of the key to stop using for operations.
+        schedule: The `KeySchedule` of the key slice, if already built. Default is None.
 
     Returns:
         A new list of ASCII values in the original order.
     """
-    ft_len = len(ascii_list)
-    key_len = len(key[start_idx:end_idx])
-    original_values = []
-    for i in range(ft_len):
-        value = ascii_list[i]
-        key_value = key[start_idx:end_idx][i % key_len] & 127
-        # First XOR with 128 to undo the last operation
-        unxored = value ^ 128
-        # Then subtract the key value and handle negative numbers with modulo
-        result = (unxored - key_value) % 256
-        original_values.append(result)
-    return original_values
-
-def interleave_key(ascii_list: List[int], key: List[int], start_idx: int, end_idx: int) -> List[int]:
+    # XOR with 128 to undo the last operation, then subtract the key value modulo 256
+    if schedule is not None:
+        return [(value ^ 128) - key_value & 255 for value, key_value in zip(ascii_list, schedule.masked(len(ascii_list)))]
+    key_values = _key_values(key, start_idx, end_idx, len(ascii_list))
+    return [(value ^ 128) - (key_value & 127) & 255 for value, key_value in zip(ascii_list, key_values)]
+
+def interleave_key(ascii_list: List[int], key: List[int], start_idx: int, end_idx: int, schedule: Any=None) -> List[int]:
     """
     Interleaves a list of ASCII values with corresponding key values.
 
@@ -306,15 +309,14 @@ def interleave_key(ascii_list: List[int], key: List[int], start_idx: int, end_id
         key: The list of integers to interleave with `ascii_list`.
         start_idx: The index of the key to start using for interleaving.
         end_idx: The index of the key to stop using for interleaving.
+        schedule: The `KeySchedule` of the key slice, if already built. Default is None.
 
     Returns:
         A new list of interleaved ASCII values and key values.
     """
-    key_len = len(key[start_idx:end_idx])
-    interleaved_list = []
-    for i, value in enumerate(ascii_list):
-        interleaved_list.append(value)
-        interleaved_list.append(key[start_idx:end_idx][i % key_len])
+    interleaved_list = [0] * (2 * len(ascii_list))
+    interleaved_list[0::2] = ascii_list
+    interleaved_list[1::2] = _key_values(key, start_idx, end_idx, len(ascii_list), schedule)[:len(ascii_list)]
     return interleaved_list
 
 def deinterleave_key(ascii_list: List[int], key: List[int], start_idx: int, end_idx: int) -> List[int]:
@@ -330,11 +332,7 @@ def deinterleave_key(ascii_list: List[int], key: List[int], start_idx: int, end_
     Returns:
         A new list of ASCII values in the original order.
     """
-    _ = len(key[start_idx:end_idx])
-    original_list = []
-    for i in range(0, len(ascii_list), 2):
-        original_list.append(ascii_list[i])
-    return original_list
+    return ascii_list[::2]
 
 def reverse(ascii_list: List[int]) -> List[int]:
     """
@@ -348,6 +346,33 @@ def reverse(ascii_list: List[int]) -> List[int]:
     """
     return ascii_list[::-1]
 
+def translate(ascii_list: List[int], table: bytes) -> List[int]:
+    """
+    Maps every byte in a list through a translation table.
+
+    Args:
+        ascii_list: The list of byte values to translate.
+        table: A 256-byte table, `table[b]` being the new value of `b`.
+
+    Returns:
+        A new list of translated byte values.
+    """
+    return list(bytes(ascii_list).translate(table))
+
+def gather(ascii_list: List[int], permutation: Any) -> List[int]:
+    """
+    Reorders a list of ASCII values with precomputed gather indices.
+
+    Args:
+        ascii_list: The list of ASCII values to reorder.
+        permutation: The `optimizer.Permutation` giving the source index of every output value.
+
+    Returns:
+        A new list of reordered ASCII values.
+    """
+    getter = permutation.getter(len(ascii_list))
+    return ascii_list if getter is None else list(getter(ascii_list))
+
 OPPOSITE_ENCRYPTION_FUNCTIONS = {
     'swap': swap_back,
     'swap_back': swap,
@@ -378,15 +403,8 @@ def clean_input(string: str) -> str:
     Returns:
         The cleaned string.
     """
-    # Convert unicode character to escaped unicode
-    def escape_unicode(uu):
-        return "\\u" + ("0000" + hex(ord(uu))[2:])[-4:]
-
-    # Regular expression to match Unicode characters
-    unicode_regex = r'[\u007F-\uFFFF]'
-
-    # Replace Unicode characters with escaped Unicode
-    return sub(unicode_regex, lambda m: escape_unicode(m.group(0)), dumps(string, separators=(',', ':')))
+    # `dumps` escapes every non-ASCII character as \uXXXX: only DEL is left to escape
+    return dumps(string, separators=(',', ':')).replace('\x7f', '\\u007f')
 
 def revert_clean_input(cleaned_string: str) -> str:
     """
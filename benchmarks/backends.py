@@ -0,0 +1,40 @@
+from random import choice
+from timeit import timeit
+import tracemalloc
+
+from ascii_chiper.pipeline import CompiledPipeline, BACKENDS
+from ascii_chiper.key_generator import KeyGenerator
+
+# Benchmarks the time and peak memory of a compiled pipeline on every backend. `interleave` is cyclic,
+# so the whole message goes through every step.
+
+STEPS = [
+    {"interleave": {"cyclic": True}},
+    {"swap": {}},
+    {"xor_shift": {"index": 0}},
+    {"xor_add": {"start": 0}},
+    {"xor_base": {"base": 113, "start": 0}},
+    {"interleave_key": {"start": 0}},
+    {"reverse": {}},
+]
+
+key = KeyGenerator(123).create_key(113, 40)
+alphabet = "abcdefghijklmnopqrstuvwxyz ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.,"
+
+for size in (1_000, 100_000, 1_000_000):
+    message = "".join(choice(alphabet) for _ in range(size))
+    number = max(1, 1_000_000 // size)
+    print(f"{size:,} characters")
+    expected = None
+    for backend in BACKENDS:
+        pipeline = CompiledPipeline(key, STEPS, backend=backend)
+        encrypted = pipeline.encrypt(message)
+        expected = expected or encrypted
+        assert encrypted == expected and pipeline.decrypt(encrypted) == message
+        encrypt = timeit(lambda: pipeline.encrypt(message), number=number) / number
+        decrypt = timeit(lambda: pipeline.decrypt(encrypted), number=number) / number
+        tracemalloc.start()
+        pipeline.encrypt(message)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"  {backend:<8} encrypt {encrypt * 1000:10.3f} ms  decrypt {decrypt * 1000:10.3f} ms  peak {peak / 1e6:8.2f} MB")
@@ -0,0 +1,55 @@
+from json import dumps
+from random import choice, randint
+from re import sub
+from timeit import timeit
+
+from ascii_chiper import clean_input, revert_clean_input
+from ascii_chiper.codec import TaggedCodec, BinaryCodec
+
+# Benchmarks the single-pass `clean_input` and the `tagged` and `binary` codecs against the original
+# regex-based `clean_input` and the `revert_clean_input` fallback cascade.
+
+def regex_clean_input(string):
+    def escape_unicode(uu):
+        return "\\u" + ("0000" + hex(ord(uu))[2:])[-4:]
+    return sub(r'[\u007F-\uFFFF]', lambda m: escape_unicode(m.group(0)), dumps(string, separators=(',', ':')))
+
+def failed_tagged_decode(broken):
+    try: TaggedCodec.decode(broken)
+    except ValueError: pass
+
+def text(size, alphabet):
+    return "".join(choice(alphabet) for _ in range(size))
+
+ascii_alphabet = "abcdefghijklmnopqrstuvwxyz ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.,"
+unicode_alphabet = "àéîõüßçñ€αβγδ漢字かな😀\x7f" + ascii_alphabet[:10]
+
+for size in (1_000, 100_000, 1_000_000):
+    messages = {
+        "ascii": text(size, ascii_alphabet),
+        "non-ascii": text(size, unicode_alphabet),
+        "dict": {str(i): [randint(0, 1000), text(8, unicode_alphabet)] for i in range(size // 20)},
+    }
+    number = max(1, 1_000_000 // size)
+    print(f"{size:,} characters")
+    for kind, message in messages.items():
+        cleaned, tagged, binary = clean_input(message), TaggedCodec.encode(message), BinaryCodec.encode(message)
+        assert cleaned == regex_clean_input(message)
+        assert revert_clean_input(cleaned) == message and TaggedCodec.decode(tagged) == message
+        assert BinaryCodec.decode(binary) == message
+        # A message that doesn't parse as JSON goes through the whole fallback cascade
+        broken = cleaned[:-1]
+        results = {
+            "encode regex": timeit(lambda: regex_clean_input(message), number=number),
+            "encode single-pass": timeit(lambda: clean_input(message), number=number),
+            "encode tagged": timeit(lambda: TaggedCodec.encode(message), number=number),
+            "encode binary": timeit(lambda: BinaryCodec.encode(message), number=number),
+            "decode json": timeit(lambda: revert_clean_input(cleaned), number=number),
+            "decode tagged": timeit(lambda: TaggedCodec.decode(tagged), number=number),
+            "decode binary": timeit(lambda: BinaryCodec.decode(binary), number=number),
+            "decode json fallback": timeit(lambda: revert_clean_input(broken), number=number),
+            "decode tagged failure": timeit(lambda: failed_tagged_decode(tagged[:-1]), number=number),
+        }
+        print(f"  {kind} (json {len(cleaned):,} bytes, binary {len(binary):,} bytes)")
+        for name, seconds in results.items():
+            print(f"    {name:<22} {seconds / number * 1000:10.3f} ms")
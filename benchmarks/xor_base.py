@@ -0,0 +1,53 @@
+from random import randint
+from timeit import timeit
+
+import numpy as np
+
+from ascii_chiper import utils, numpy_utils
+
+# Benchmarks the cumulative-XOR scan implementation of xor_base/unxor_base against
+# the original sequential loop, on both backends.
+
+def sequential_xor_base(ascii_list, key, base, start_idx, end_idx):
+    key_slice = key[start_idx:end_idx]
+    key_len = len(key_slice)
+    final = []
+    current_base = base
+    for i in range(len(ascii_list)):
+        xor = ascii_list[i] ^ key_slice[i % key_len] ^ current_base
+        final.append(xor)
+        current_base = xor
+    return final
+
+def sequential_unxor_base(ascii_list, key, base, start_idx, end_idx):
+    key_slice = key[start_idx:end_idx]
+    key_len = len(key_slice)
+    final = []
+    current_base = base
+    for i in range(len(ascii_list)):
+        final.append(ascii_list[i] ^ key_slice[i % key_len] ^ current_base)
+        current_base = ascii_list[i]
+    return final
+
+key = [randint(0, 255) for _ in range(64)]
+for size in (10_000, 100_000, 1_000_000, 10_000_000):
+    ascii_list = [randint(0, 127) for _ in range(size)]
+    ascii_array = np.array(ascii_list, dtype=np.uint8)
+    encrypted = utils.xor_base(ascii_list, key, 113, 0, 64)
+    encrypted_array = np.array(encrypted, dtype=np.uint8)
+    assert encrypted == sequential_xor_base(ascii_list, key, 113, 0, 64)
+    assert numpy_utils.xor_base(ascii_array, key, 113, 0, 64).tolist() == encrypted
+    assert numpy_utils.unxor_base(encrypted_array, key, 113, 0, 64).tolist() == ascii_list
+
+    number = max(1, 1_000_000 // size)
+    results = {
+        "xor_base sequential": timeit(lambda: sequential_xor_base(ascii_list, key, 113, 0, 64), number=number),
+        "xor_base python": timeit(lambda: utils.xor_base(ascii_list, key, 113, 0, 64), number=number),
+        "xor_base numpy": timeit(lambda: numpy_utils.xor_base(ascii_array, key, 113, 0, 64), number=number),
+        "unxor_base sequential": timeit(lambda: sequential_unxor_base(encrypted, key, 113, 0, 64), number=number),
+        "unxor_base python": timeit(lambda: utils.unxor_base(encrypted, key, 113, 0, 64), number=number),
+        "unxor_base numpy": timeit(lambda: numpy_utils.unxor_base(encrypted_array, key, 113, 0, 64), number=number),
+    }
+    print(f"{size:,} bytes")
+    for name, seconds in results.items():
+        print(f"  {name:<22} {seconds / number * 1000:10.3f} ms")